@@ -1,11 +1,8 @@
 from __future__ import annotations
 
-import json
-import subprocess
-import tempfile
-from pathlib import Path
 from typing import Any, Dict
-import sys  
+
+from src.housing_agent.pipeline import daemon_protocol
 
 def _fill_missing_keys(hm: Dict[str, Any]) -> Dict[str, Any]:
     hm.setdefault("summary", "")
@@ -24,36 +21,32 @@ def _fill_missing_keys(hm: Dict[str, Any]) -> Dict[str, Any]:
     hm["eligible_policies"] = fixed
     return hm
 
+def _run_in_process(user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    # 데몬이 없을 때 : 현재 프로세스에서 직접 실행 (retriever 서비스는 이 프로세스에 남아 다음 호출부터 재사용)
+    from src.housing_agent.pipeline.housing_opinion_prompt import run_from_profile
+
+    return run_from_profile(user_profile)
+
+
 def run_housing(user_profile: Dict[str, Any]) -> Dict[str, Any]:
     """
-    housing_agent CLI 실행 → JSON 출력 파싱 → housing_memo 반환
+    주거 의견서 데몬(Unix 소켓) 요청 → housing_memo 반환
+    데몬이 떠 있지 않으면 프로세스 내 실행으로 대체
+    데몬 응답이 DEFAULT_TIMEOUT_S 안에 오지 않으면 데몬 실패로 처리 (멈춘 데몬에서 무한 대기하지 않음)
     실패 시: '가짜 추천' 대신 '연동 실패 안내' 반환
     """
     try:
-        with tempfile.TemporaryDirectory() as td:
-            td_path = Path(td)
-            profile_path = td_path / "user_profile.json"
-            profile_path.write_text(json.dumps(user_profile, ensure_ascii=False), encoding="utf-8")
-
-            cmd = [
-                sys.executable,  # "python" 대신 현재 venv 파이썬을 강제
-                "-m",
-                "src.housing_agent.pipeline.housing_opinion_prompt",
-                "--user-profile-path",
-                str(profile_path),
-                "--json",
-            ]
+        try:
+            data = daemon_protocol.request(
+                {"op": "housing", "user_profile": user_profile}, timeout=daemon_protocol.DEFAULT_TIMEOUT_S
+            )
+        except daemon_protocol.DaemonUnavailableError:
+            data = _run_in_process(user_profile)
 
-            proc = subprocess.run(cmd, capture_output=True, text=True)
-
-            if proc.returncode != 0:
-                raise RuntimeError(proc.stderr.strip() or proc.stdout.strip())
-
-            data = json.loads(proc.stdout)
-            hm = data["housing_memo"] if isinstance(data, dict) and "housing_memo" in data else data
-            hm = _fill_missing_keys(hm)
-            hm["_status"] = "ok"  
-            return hm
+        hm = data["housing_memo"] if isinstance(data, dict) and "housing_memo" in data else data
+        hm = _fill_missing_keys(hm)
+        hm["_status"] = "ok"  
+        return hm
 
     except Exception as e:
         hm = {
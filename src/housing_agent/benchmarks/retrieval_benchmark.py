@@ -0,0 +1,440 @@
+# 검색 경로 처리량/지연 벤치마크 코드
+
+"""
+합성 정책 말뭉치로 retriever 검색 성능을 측정해 JSON으로 기록
+
+흐름 (배율별)
+- 현재 규모(--base-policies) 기준 1x/10x/100x 합성 정책 생성 (seed 고정)
+- chunking 단계 함수로 청크/메타데이터/필터 인덱스/sparse 인덱스/offset 색인 생성
+- 문자 bigram feature hashing으로 결정적인 가짜 임베딩 생성 (OpenAI 호출 없음)
+- faiss_building CLI로 index-type별 인덱스 생성
+- run_retrieval / run_retrieval_batch를 단건/배치 x 필터 없음/있음으로 반복 호출해 QPS, p50/p95/p99 지연 측정
+
+출력
+- data/benchmarks/retrieval_<commit>_<시각>.json : 커밋 간 비교용
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.housing_agent.pipeline.chunk_store import build_chunk_offsets
+from src.housing_agent.pipeline.chunking import build_eligibility_index, build_policy_metadata_map, chunk_policy
+from src.housing_agent.pipeline.embedding import build_manifest_row
+from src.housing_agent.pipeline.manifest import build_manifest_columns, manifest_path_for, save_manifest_columns
+from src.housing_agent.pipeline.near_dup import MIN_TEXT_LEN, near_duplicate_groups
+from src.housing_agent.pipeline.retriever import (
+    RetrievalFilters,
+    get_retriever_service,
+    run_retrieval,
+    run_retrieval_batch,
+)
+from src.housing_agent.pipeline.sparse_index import build_sparse_index, save_sparse_index
+
+DEFAULT_OUT_DIR = ROOT / "data" / "benchmarks"
+
+CATEGORIES = ("finance", "housing_supply", "housing_cost", "dormitory")
+SIDO = ("서울특별시", "부산광역시", "대구광역시", "인천광역시", "광주광역시", "대전광역시", "경기도", "강원특별자치도", "전북특별자치도")
+SIGUNGU = ("관악구", "강남구", "마포구", "해운대구", "수원시", "성남시", "유성구", "부평구", "전주시")
+CATEGORY_TERMS = {
+    "finance": ("전세자금 대출", "보증금 융자", "이자 지원", "주택도시기금 대출"),
+    "housing_supply": ("행복주택", "매입임대", "전세임대", "공공임대 입주"),
+    "housing_cost": ("월세 지원", "주거급여", "이사비 지원", "중개수수료 지원"),
+    "dormitory": ("기숙사 입사", "연합기숙사", "학사 입주", "생활관 모집"),
+}
+
+# 벤치마크 질의 (build_auto_query 형태 + 짧은 키워드 질의)
+QUERY_TEMPLATES = (
+    "{age}세 {sido} 거주 희망 청년(1인가구) 월세 중심 조건에 맞는 청년 주거 지원 정책 추천",
+    "{age}세 {sido} {gu} 거주 희망 신혼부부 전세 중심 월소득 {income}만원 조건에 맞는 청년 주거 지원 정책 추천",
+    "{term} 신청 자격",
+    "{term} 지원 금액과 기간",
+    "{sido} {term} 신청 방법",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="retriever 처리량/지연 벤치마크")
+    parser.add_argument("--scales", type=str, default="1,10,100", help="말뭉치 배율 목록 (쉼표 구분)")
+    parser.add_argument("--base-policies", type=int, default=150, help="1x 기준 정책 수")
+    parser.add_argument("--dim", type=int, default=256, help="가짜 임베딩 차원")
+    parser.add_argument("--index-types", type=str, default="flat,ivf_flat,hnsw", help="faiss_building index-type 목록")
+    parser.add_argument("--compression", type=str, default="none", help="faiss_building compression")
+    parser.add_argument("--num-queries", type=int, default=200, help="시나리오별 측정 질의 수")
+    parser.add_argument("--batch-size", type=int, default=16, help="배치 시나리오의 배치 크기")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 워밍업 질의 수")
+    parser.add_argument("--top-k", type=int, default=5, help="검색 top-k")
+    parser.add_argument(
+        "--near-dup",
+        action="store_true",
+        help="근사 중복 군집(dup_group_id)도 계산 (템플릿 합성 말뭉치는 후보쌍이 많아 느림, 기본은 텍스트 dedup fallback)",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="합성 말뭉치/질의 seed")
+    parser.add_argument("--work-dir", type=Path, default=None, help="합성 산출물 경로 (기본: 임시 디렉터리)")
+    parser.add_argument("--keep-work-dir", action="store_true", help="임시 산출물 삭제하지 않음")
+    parser.add_argument("--out", type=Path, default=None, help="결과 json 경로")
+    return parser.parse_args()
+
+
+def hash_embedding(text: str, dim: int) -> np.ndarray:
+
+    # 문자 bigram feature hashing : 같은 텍스트는 항상 같은 벡터, 겹치는 표현이 많을수록 가까움
+    codes = np.frombuffer((text or " ").lower().encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < 2:
+        codes = np.concatenate([codes, np.zeros(2 - len(codes), dtype=np.uint64)])
+    with np.errstate(over="ignore"):
+        h = (codes[:-1] * np.uint64(1000003) + codes[1:]) * np.uint64(0x9E3779B97F4A7C15)
+    buckets = (h >> np.uint64(33)) % np.uint64(dim)
+    signs = np.where((h >> np.uint64(7)) & np.uint64(1), 1.0, -1.0)
+    return np.bincount(buckets.astype(np.int64), weights=signs, minlength=dim).astype(np.float32)
+
+
+def synthetic_policies(num_policies: int, seed: int) -> List[Dict[str, Any]]:
+
+    # policies_v2.json 형식의 합성 정책 (chunk_policy가 실제와 비슷한 청크 수를 만들도록 섹션 길이 조절)
+    rng = random.Random(seed)
+    policies: List[Dict[str, Any]] = []
+    for i in range(num_policies):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        term = rng.choice(CATEGORY_TERMS[category])
+        sido = rng.sample(SIDO, rng.choice([0, 1, 1, 2]))
+        sigungu = rng.sample(SIGUNGU, rng.choice([0, 0, 1]))
+        age_min = rng.choice([None, 19, 19, 20])
+        age_max = rng.choice([None, 29, 34, 39])
+        amount = rng.choice([20, 30, 50, 100, 200])
+
+        eligibility = "\n".join(
+            f"- 조건 {j + 1}: 만 {age_min or 19}세 이상 {age_max or 39}세 이하, 중위소득 {rng.choice([60, 100, 150])}% 이하, "
+            f"무주택 세대 구성원, {', '.join(sido) or '전국'} 거주 ({term} 대상 {i}-{j})"
+            for j in range(rng.randint(3, 8))
+        )
+        benefit = "\n\n".join(
+            f"{term} 월 최대 {amount}만원, 최대 {rng.choice([12, 24, 36])}개월 지원. "
+            f"지원 항목 {j + 1}: 임차보증금, 월 임대료, 관리비 일부 ({i}-{j})"
+            for j in range(rng.randint(2, 6))
+        )
+        process = "\n".join(
+            f"{j + 1}단계: 온라인 신청 후 서류 제출, 자격 검증, 결과 안내 (접수처 {rng.choice(SIGUNGU)} 주민센터)"
+            for j in range(rng.randint(2, 5))
+        )
+        policies.append(
+            {
+                "policy_id": f"BENCH_{i:06d}",
+                "title": f"{(sido or ['전국'])[0]} 청년 {term} {i}",
+                "category": category,
+                "provider": f"{(sido or ['국토교통부'])[0]} 주거복지과",
+                "region": ", ".join(sido),
+                "source_url": f"https://example.org/policy/{i}",
+                "eligibility_struct": {
+                    "age_min": age_min,
+                    "age_max": age_max,
+                    "regions": {"sido": sido, "sigungu": sigungu},
+                },
+                "eligibility_text": eligibility,
+                "benefit_text": benefit,
+                "process_text": process,
+            }
+        )
+    return policies
+
+
+def write_jsonl(path: Path, rows: List[Dict[str, Any]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def build_corpus(out_dir: Path, num_policies: int, dim: int, seed: int, near_dup: bool = False) -> Dict[str, Any]:
+
+    """
+    합성 정책 -> chunking/embedding 단계와 같은 형식의 산출물
+    - 반환: 산출물 경로 + 말뭉치 통계
+    """
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    policies = synthetic_policies(num_policies, seed)
+    chunks: List[Dict[str, Any]] = []
+    for p in policies:
+        chunks.extend(chunk_policy(p))
+
+    paths = {
+        "chunks": out_dir / "chunked.jsonl",
+        "metadata": out_dir / "metadata.json",
+        "eligibility_index": out_dir / "eligibility_index.json",
+        "sparse_index": out_dir / "sparse_index.npz",
+        "vectors": out_dir / "embeddings.npy",
+        "mapping": out_dir / "embedding_mapping.jsonl",
+        "embed_log": out_dir / "embedding_log.json",
+    }
+    write_jsonl(paths["chunks"], chunks)
+    build_chunk_offsets(paths["chunks"])
+    meta_map = build_policy_metadata_map(policies)
+    with open(paths["metadata"], "w", encoding="utf-8") as f:
+        json.dump(meta_map, f, ensure_ascii=False)
+    with open(paths["eligibility_index"], "w", encoding="utf-8") as f:
+        json.dump(build_eligibility_index(meta_map), f, ensure_ascii=False)
+    save_sparse_index(paths["sparse_index"], build_sparse_index(chunks))
+
+    texts = [str(c.get("text", "")) for c in chunks]
+    dup_groups: List[Optional[int]] = (
+        list(near_duplicate_groups(texts, min_len=MIN_TEXT_LEN)) if near_dup else [None] * len(texts)
+    )
+    manifest = [build_manifest_row(c, i, dup_groups[i]) for i, c in enumerate(chunks)]
+    write_jsonl(paths["mapping"], manifest)
+    save_manifest_columns(manifest_path_for(paths["mapping"]), build_manifest_columns(manifest), paths["mapping"])
+    np.save(paths["vectors"], np.vstack([hash_embedding(t, dim) for t in texts]))
+    with open(paths["embed_log"], "w", encoding="utf-8") as f:
+        embed_log: Dict[str, Any] = {"model": f"hash-bigram-{dim}", "num_vectors": len(chunks), "dimension": dim}
+        if near_dup:
+            embed_log["dup_min_len"] = MIN_TEXT_LEN
+        json.dump(embed_log, f)
+
+    return {
+        "paths": paths,
+        "num_policies": len(policies),
+        "num_chunks": len(chunks),
+        "build_seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def build_index(corpus: Dict[str, Any], index_type: str, compression: str) -> Dict[str, Any]:
+
+    # faiss_building CLI 그대로 실행 (index-type별 파일 분리)
+    paths = corpus["paths"]
+    out_dir = paths["vectors"].parent
+    index_path = out_dir / f"index_{index_type}_{compression}.faiss"
+    info_path = out_dir / f"index_{index_type}_{compression}_log.json"
+    cmd = [
+        sys.executable,
+        "-m",
+        "src.housing_agent.pipeline.faiss_building",
+        "--vectors", str(paths["vectors"]),
+        "--mapping", str(paths["mapping"]),
+        "--embed-log", str(paths["embed_log"]),
+        "--out-index", str(index_path),
+        "--out-info", str(info_path),
+        "--index-type", index_type,
+        "--compression", compression,
+        "--eval-queries", "100",
+    ]
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=str(ROOT), check=True, capture_output=True, text=True)
+    build_seconds = round(time.perf_counter() - t0, 3)
+    with open(info_path, "r", encoding="utf-8") as f:
+        info = json.load(f)
+    return {"index": index_path, "index_log": info_path, "build_seconds": build_seconds, "info": info}
+
+
+def make_queries(num_queries: int, seed: int) -> List[str]:
+    rng = random.Random(seed + 1)
+    out: List[str] = []
+    for _ in range(num_queries):
+        category = rng.choice(CATEGORIES)
+        out.append(
+            rng.choice(QUERY_TEMPLATES).format(
+                age=rng.randint(19, 39),
+                sido=rng.choice(SIDO),
+                gu=rng.choice(SIGUNGU),
+                income=rng.choice([180, 250, 320]),
+                term=rng.choice(CATEGORY_TERMS[category]),
+            )
+        )
+    return out
+
+
+def make_filters(num_queries: int, seed: int) -> List[RetrievalFilters]:
+    rng = random.Random(seed + 2)
+    return [
+        RetrievalFilters(
+            age=rng.randint(19, 39),
+            region_sido=rng.choice(SIDO),
+            region_sigungu=rng.choice(("",) + SIGUNGU),
+        )
+        for _ in range(num_queries)
+    ]
+
+
+def latency_summary(latencies_ms: List[float], num_queries: int, elapsed_s: float) -> Dict[str, Any]:
+    arr = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        "num_queries": int(num_queries),
+        "num_calls": int(len(arr)),
+        "qps": round(num_queries / elapsed_s, 2) if elapsed_s > 0 else None,
+        "latency_ms": {
+            "mean": round(float(arr.mean()), 4),
+            "p50": round(float(np.percentile(arr, 50)), 4),
+            "p95": round(float(np.percentile(arr, 95)), 4),
+            "p99": round(float(np.percentile(arr, 99)), 4),
+        },
+    }
+
+
+def timed_calls(calls: List[Callable[[], Any]], num_queries: int, warmup: int) -> Dict[str, Any]:
+    for call in calls[:warmup]:
+        call()
+    latencies: List[float] = []
+    start = time.perf_counter()
+    for call in calls:
+        t0 = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return latency_summary(latencies, num_queries, time.perf_counter() - start)
+
+
+def run_scenarios(
+    args: argparse.Namespace,
+    corpus: Dict[str, Any],
+    built: Dict[str, Any],
+    queries: List[str],
+    filters: List[RetrievalFilters],
+) -> Dict[str, Any]:
+
+    """
+    단건/배치 x 필터 없음/있음 4개 시나리오
+    - 결과 캐시와 질의 임베딩 캐시는 끄고 측정 (반복 질의가 캐시로 빠지지 않도록)
+    - 질의 임베딩은 hash_embedding 주입 (네트워크 지연 제외)
+    """
+
+    paths = corpus["paths"]
+    base = SimpleNamespace(
+        index=built["index"],
+        index_log=built["index_log"],
+        mapping=paths["mapping"],
+        chunks=paths["chunks"],
+        metadata=paths["metadata"],
+        eligibility_index=paths["eligibility_index"],
+        sparse_index=paths["sparse_index"],
+        query_model="",
+        api_key_env="OPENAI_API_KEY",
+        query="",
+        top_k=args.top_k,
+        age=-1,
+        region_sido="",
+        region_sigungu="",
+        disable_query_cache=True,
+        disable_result_cache=True,
+    )
+    service = get_retriever_service(base)
+    service.embedder = lambda texts: [hash_embedding(t, args.dim) for t in texts]
+
+    def single(query: str, f: Optional[RetrievalFilters]) -> Callable[[], Any]:
+        ns = SimpleNamespace(**vars(base))
+        ns.query = query
+        if f is not None:
+            ns.age, ns.region_sido, ns.region_sigungu = f.age, f.region_sido, f.region_sigungu
+        return lambda: run_retrieval(ns)
+
+    def batch(qs: List[str], fs: Optional[List[RetrievalFilters]]) -> Callable[[], Any]:
+        return lambda: run_retrieval_batch(base, qs, fs)
+
+    n = len(queries)
+    bs = max(1, args.batch_size)
+    starts = range(0, n, bs)
+    return {
+        "load_timings_ms": service.load_timings_ms,
+        "single_unfiltered": timed_calls([single(q, None) for q in queries], n, args.warmup),
+        "single_filtered": timed_calls([single(q, f) for q, f in zip(queries, filters)], n, args.warmup),
+        "batch_unfiltered": timed_calls([batch(queries[s : s + bs], None) for s in starts], n, 1),
+        "batch_filtered": timed_calls([batch(queries[s : s + bs], filters[s : s + bs]) for s in starts], n, 1),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=str(ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    args = parse_args()
+    scales = [int(x) for x in args.scales.split(",") if x.strip()]
+    index_types = [x.strip() for x in args.index_types.split(",") if x.strip()]
+    if not scales or any(s <= 0 for s in scales):
+        raise ValueError(f"--scales 형식 오류: {args.scales}")
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="retrieval_bench_"))
+    queries = make_queries(args.num_queries, args.seed)
+    filters = make_filters(args.num_queries, args.seed)
+    commit = git_commit()
+    created_at = datetime.now(timezone.utc)
+
+    runs: List[Dict[str, Any]] = []
+    try:
+        for scale in scales:
+            corpus = build_corpus(
+                work_dir / f"scale_{scale}x",
+                args.base_policies * scale,
+                args.dim,
+                args.seed,
+                near_dup=args.near_dup,
+            )
+            print(f"[corpus] {scale}x policies= {corpus['num_policies']}, chunks= {corpus['num_chunks']}")
+            for index_type in index_types:
+                built = build_index(corpus, index_type, args.compression)
+                scenarios = run_scenarios(args, corpus, built, queries, filters)
+                info = built["info"]
+                runs.append(
+                    {
+                        "scale": scale,
+                        "num_policies": corpus["num_policies"],
+                        "num_chunks": corpus["num_chunks"],
+                        "corpus_build_seconds": corpus["build_seconds"],
+                        "index_type": index_type,
+                        "compression": args.compression,
+                        "index_build_seconds": built["build_seconds"],
+                        "index_memory": info.get("memory"),
+                        "index_evaluation": info.get("evaluation"),
+                        **scenarios,
+                    }
+                )
+                s = scenarios["single_unfiltered"]
+                print(
+                    f"[bench] {scale}x {index_type}: single qps= {s['qps']}, "
+                    f"p50= {s['latency_ms']['p50']}ms, p99= {s['latency_ms']['p99']}ms, "
+                    f"batch qps= {scenarios['batch_unfiltered']['qps']}"
+                )
+    finally:
+        if args.work_dir is None and not args.keep_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    out_path = args.out or DEFAULT_OUT_DIR / f"retrieval_{commit or 'nogit'}_{created_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created_at": created_at.isoformat(),
+        "git_commit": commit,
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "runs": runs,
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[done] benchmark: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
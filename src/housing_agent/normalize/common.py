@@ -134,22 +134,34 @@ def extract_age_range(text: str) -> Tuple[Optional[int], Optional[int]]:
 
 # 소득 최대값 추출
 def extract_income_max(text: str) -> Optional[int]:
+    return extract_income_limit(text)[0]
+
+# 소득 상한 + 기간 단위 추출 (만원, "month" / "year" / 문맥으로 알 수 없으면 None)
+def extract_income_limit(text: str) -> Tuple[Optional[int], Optional[str]]:
     if not text:
-        return None
+        return None, None
 
     # 소득 문맥에서만 추출해 차량/기타 금액 오탐을 줄임
     income_context = r"(소득|연소득|월소득|기준중위소득|도시근로자)"
 
-    m = re.search(rf"{income_context}[^\n]{{0,20}}(\d+)\s*만원\s*이하", text)
+    # 금액은 숫자 경계부터 잡음 (앞 문맥 반복이 숫자 앞자리를 먹지 않도록), "5,000" 같은 쉼표 허용
+    m = re.search(rf"{income_context}[^\n]{{0,20}}?(?<![\d,])(\d[\d,]*)\s*만원\s*이하", text)
     if m:
-        return int(m.group(2))
-
-    # "연소득 4천 이하" 형태
-    m = re.search(rf"{income_context}[^\n]{{0,20}}(\d+)\s*천\s*이하", text)
+        amount = int(m.group(2).replace(",", ""))
+        # 소득 표현 바로 앞~금액 사이의 연/월 표기로 기간 판단 (예: "연소득", "연간 소득", "월평균 소득")
+        window = text[max(0, m.start() - 5) : m.start(2)]
+        if re.search(r"연\s*소득|연간|연봉", window):
+            return amount, "year"
+        if re.search(r"월\s*소득|월평균|매월", window):
+            return amount, "month"
+        return amount, None
+
+    # "연소득 4천 이하" 형태 (천만원 단위는 연 소득 표기)
+    m = re.search(rf"{income_context}[^\n]{{0,20}}?(?<![\d,])(\d+)\s*천\s*이하", text)
     if m:
-        return int(m.group(2)) * 1000
+        return int(m.group(2)) * 1000, "year"
 
-    return None
+    return None, None
 
 # 무주택 여부
 def detect_no_house(text: str):
@@ -159,6 +171,23 @@ def detect_no_house(text: str):
         return True
     return None
 
+# 대상 가구 유형 추출 (자격 문구에 나온 표기 -> 표준 유형명, 나온 순서 무관하게 표 순서로 반환)
+HOUSEHOLD_TYPE_PATTERNS: List[Tuple[str, str]] = [
+    ("청년", r"청년"),
+    ("신혼부부", r"신혼|예비\s*부부"),
+    ("1인 가구", r"1인\s*가구|단독\s*세대"),
+    ("다자녀", r"다자녀"),
+    ("한부모", r"한부모"),
+    ("고령자", r"고령자|노인|만\s*65세\s*이상"),
+    ("대학생", r"대학생|재학생"),
+]
+
+
+def extract_household_types(text: str) -> List[str]:
+    if not text:
+        return []
+    return [name for name, pattern in HOUSEHOLD_TYPE_PATTERNS if re.search(pattern, text)]
+
 # 지역명 추출 (시/도, 시/군/구)
 def extract_regions(text: str) -> Dict[str, List[str]]:
     if not text:
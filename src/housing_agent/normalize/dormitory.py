@@ -8,10 +8,12 @@ from src.housing_agent.normalize.common import (
     # norm_keep_lines,
     dedup_texts,
     extract_age_range,
-    extract_income_max,
+    extract_income_limit,
     detect_no_house,
+    extract_household_types,
     extract_regions,
 )
+from src.housing_agent.normalize.keyword_matcher import KeywordMatcher
 
 def grouping_key(item: Dict[str, Any]) -> Tuple[str, str]:
     return (item.get("dorm_name") or "").strip(), (item.get("source_url") or "").strip()
@@ -85,9 +87,10 @@ def as_header(line: str) -> Optional[str]:
             return h
     return None
 
+CONTACT_MATCHER = KeywordMatcher({"contact": ["문의", "연락", "전화", "담당", "TEL", "Tel", "☎", "콜센터"]})
+
 def is_contact_line(line: str) -> bool:
-    s = line or ""
-    return any(k in s for k in ["문의", "연락", "전화", "담당", "TEL", "Tel", "☎", "콜센터"])
+    return CONTACT_MATCHER.any_match(line or "")
 
 def split_lines(text: str) -> List[str]:
     lines = [ln.strip() for ln in (text or "").split("\n") if ln.strip()]
@@ -188,16 +191,18 @@ def normalize_dormitory_group(items: List[Dict[str, Any]], seq_idx: int) -> Dict
     process_text = "\n".join([t for t in [apply_text, contact_text] if t]).strip() or None
 
     age_min, age_max = extract_age_range(eligibility_text or "")
-    income_max_m = extract_income_max(eligibility_text or "")
+    income_max_m, income_period = extract_income_limit(eligibility_text or "")
     requires_no_house = detect_no_house(eligibility_text or "")
+    household_types = extract_household_types(eligibility_text or "")
     regions = extract_regions(eligibility_text or "")
 
     eligibility_struct = {
         "age_min": age_min,
         "age_max": age_max,
         "income_max_m": income_max_m,
+        "income_period": income_period,
         "asset_max_m": None,
-        "household_types": [],
+        "household_types": household_types,
         "requires_no_house": requires_no_house,
         "regions": regions,
         "housing_types": ["기숙사"],
@@ -8,33 +8,31 @@ from src.housing_agent.normalize.common import (
     dedup_texts,
     join_lines,
     extract_age_range,
-    extract_income_max,
+    extract_income_limit,
     detect_no_house,
+    extract_household_types,
     extract_regions,
 )
+from src.housing_agent.normalize.keyword_matcher import KeywordMatcher
+
+# 섹션 제목 분류 키워드 (dict 순서 = 우선순위)
+SECTION_MATCHER = KeywordMatcher({
+    "eligibility": ["대출 대상", "지원 대상", "자격", "대상자", "대상"],
+    "apply": ["신청 시기", "신청 기간", "신청 방법", "신청 절차", "제출 서류", "신청"],
+    "contact": ["상담문의", "문의", "연락처", "업무취급은행"],
+    "benefit": [
+        "대상 주택", "대출 한도", "대출금리", "이용기간", "상환방법", "우대금리",
+        "고객부담비용", "중도상환수수료", "유의사항", "담보", "평가"
+    ],
+})
 
 # 섹션 제목을 기준으로 bucket 분류
 def section_map(title: str) -> str:
 
     t = norm_keep_lines(title)
 
-    if any(k in t for k in ["대출 대상", "지원 대상", "자격", "대상자", "대상"]):
-        return "eligibility"
-
-    if any(k in t for k in ["신청 시기", "신청 기간", "신청 방법", "신청 절차", "제출 서류", "신청"]):
-        return "apply"
-
-    if any(k in t for k in ["상담문의", "문의", "연락처", "업무취급은행"]):
-        return "contact"
-
-    if any(k in t for k in [
-        "대상 주택", "대출 한도", "대출금리", "이용기간", "상환방법", "우대금리",
-        "고객부담비용", "중도상환수수료", "유의사항", "담보", "평가"
-    ]):
-        return "benefit"
-
-    # 명확히 분류 안 되는 경우
-    return "other"
+    # 명확히 분류 안 되는 경우 other
+    return SECTION_MATCHER.first_group(t) or "other"
 
 # eligibility 내부 분리
 COND_KEYWORDS = [
@@ -123,16 +121,18 @@ def normalize_finance(raw: Dict[str, Any]) -> Dict[str, Any]:
 
     # eligibility_struct 생성
     age_min, age_max = extract_age_range(eligibility_text or "")
-    income_max_m = extract_income_max(eligibility_text or "")
+    income_max_m, income_period = extract_income_limit(eligibility_text or "")
     requires_no_house = detect_no_house(eligibility_text or "")
+    household_types = extract_household_types(eligibility_text or "")
     regions = extract_regions(eligibility_text or "")
 
     eligibility_struct = {
         "age_min": age_min,
         "age_max": age_max,
         "income_max_m": income_max_m,
+        "income_period": income_period,
         "asset_max_m": None,
-        "household_types": [],
+        "household_types": household_types,
         "requires_no_house": requires_no_house,
         "regions": regions,
         "housing_types": [],
@@ -8,10 +8,21 @@ from src.housing_agent.normalize.common import (
     dedup_texts,
     join_lines,
     extract_age_range,
-    extract_income_max,
+    extract_income_limit,
     detect_no_house,
+    extract_household_types,
     extract_regions,
 )
+from src.housing_agent.normalize.keyword_matcher import KeywordMatcher
+
+# 섹션 제목 분류 키워드 (dict 순서 = 우선순위)
+SECTION_MATCHER = KeywordMatcher({
+    "eligibility": ["지원대상", "대상", "자격", "신청자격", "신청대상"],
+    "condition": ["지원요건", "요건", "조건", "소득", "무주택", "연령", "자산", "기준"],
+    "benefit": ["지원내용", "혜택", "지원금", "금액", "지원범위", "감면", "할인", "한도"],
+    "apply": ["신청방법", "신청", "접수", "제출서류", "서류", "기간", "절차", "방법"],
+    "contact": ["문의", "연락처", "전화", "상담", "담당", "기관"],
+})
 
 # table을 line으로 변환
 def table_to_lines(tb: Dict[str, Any]) -> List[str]:
@@ -27,18 +38,7 @@ def table_to_lines(tb: Dict[str, Any]) -> List[str]:
 # sections title, texts 매핑
 def section_map(title: str) -> str:
     t = norm_keep_lines(title).replace("\n", " ")
-
-    if any(k in t for k in ["지원대상", "대상", "자격", "신청자격", "신청대상"]):
-        return "eligibility"
-    if any(k in t for k in ["지원요건", "요건", "조건", "소득", "무주택", "연령", "자산", "기준"]):
-        return "condition"
-    if any(k in t for k in ["지원내용", "혜택", "지원금", "금액", "지원범위", "감면", "할인", "한도"]):
-        return "benefit"
-    if any(k in t for k in ["신청방법", "신청", "접수", "제출서류", "서류", "기간", "절차", "방법"]):
-        return "apply"
-    if any(k in t for k in ["문의", "연락처", "전화", "상담", "담당", "기관"]):
-        return "contact"
-    return "other"
+    return SECTION_MATCHER.first_group(t) or "other"
 
 # main normalize function
 def normalize_housing_cost_etc(item: Dict[str, Any], seq_idx: int) -> Dict[str, Any]:
@@ -89,16 +89,18 @@ def normalize_housing_cost_etc(item: Dict[str, Any], seq_idx: int) -> Dict[str,
     process_text = "\n".join([t for t in [apply_text, contact_text] if t]).strip() or None
 
     age_min, age_max = extract_age_range(eligibility_text or "")
-    income_max_m = extract_income_max(eligibility_text or "")
+    income_max_m, income_period = extract_income_limit(eligibility_text or "")
     requires_no_house = detect_no_house(eligibility_text or "")
+    household_types = extract_household_types(eligibility_text or "")
     regions = extract_regions(eligibility_text or "")
 
     eligibility_struct = {
         "age_min": age_min,
         "age_max": age_max,
         "income_max_m": income_max_m,
+        "income_period": income_period,
         "asset_max_m": None,
-        "household_types": [],
+        "household_types": household_types,
         "requires_no_house": requires_no_house,
         "regions": regions,
         "housing_types": [],
@@ -5,8 +5,9 @@ from typing import Any, Dict
 from src.housing_agent.normalize.common import (
     make_seq_id,
     extract_age_range,
-    extract_income_max,
+    extract_income_limit,
     detect_no_house,
+    extract_household_types,
     extract_regions,
 )
 
@@ -31,15 +32,17 @@ def normalize_housing_supply(item: Dict[str, Any], seq_idx: int | None = None) -
     regions = extract_regions(region_hint + "\n" + (eligibility_text or ""))
 
     age_min, age_max = extract_age_range(eligibility_text or "")
-    income_max_m = extract_income_max(eligibility_text or "")
+    income_max_m, income_period = extract_income_limit(eligibility_text or "")
     requires_no_house = detect_no_house(eligibility_text or "")
+    household_types = extract_household_types(eligibility_text or "")
 
     eligibility_struct = {
         "age_min": age_min,
         "age_max": age_max,
         "income_max_m": income_max_m,
+        "income_period": income_period,
         "asset_max_m": None,
-        "household_types": [],
+        "household_types": household_types,
         "requires_no_house": requires_no_house,
         "regions": regions,
         "housing_types": [],
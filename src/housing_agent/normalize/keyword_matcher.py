@@ -0,0 +1,123 @@
+# 다중 키워드 매칭 코드 (Aho-Corasick)
+
+"""
+그룹별 키워드 사전 -> 한 번의 텍스트 스캔으로 그룹별 hit 수 계산
+
+- 모듈 import 시점에 오토마톤을 1회 생성해 재사용
+- hit 수는 '텍스트에 등장한 서로 다른 키워드 수' (기존 sum(k in text) 방식과 동일한 기준)
+- 같은 키워드가 여러 그룹에 속하면 각 그룹에 모두 반영 (예: "금리" -> finance, BENEFIT)
+
+옵션
+- lowercase: 텍스트/키워드 소문자화 후 비교
+- ignore_spaces: 공백을 건너뛰고 비교 (키워드도 공백 제거)
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+
+class KeywordMatcher:
+
+    def __init__(
+        self,
+        groups: Dict[str, Iterable[str]],
+        lowercase: bool = False,
+        ignore_spaces: bool = False,
+    ) -> None:
+        self.lowercase = lowercase
+        self.ignore_spaces = ignore_spaces
+        self.group_names: List[str] = list(groups.keys())
+
+        # pattern -> 속한 그룹 목록
+        self.patterns: List[str] = []
+        self.pattern_groups: List[List[str]] = []
+        pattern_index: Dict[str, int] = {}
+        for group, keywords in groups.items():
+            for kw in keywords:
+                p = self._prepare(kw)
+                if not p:
+                    continue
+                idx = pattern_index.get(p)
+                if idx is None:
+                    idx = len(self.patterns)
+                    pattern_index[p] = idx
+                    self.patterns.append(p)
+                    self.pattern_groups.append([])
+                if group not in self.pattern_groups[idx]:
+                    self.pattern_groups[idx].append(group)
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for idx, p in enumerate(self.patterns):
+            self._insert(p, idx)
+        self._link()
+
+    def _prepare(self, text: str) -> str:
+        t = text or ""
+        if self.lowercase:
+            t = t.lower()
+        if self.ignore_spaces:
+            t = "".join(t.split())
+        return t
+
+    def _insert(self, pattern: str, idx: int) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(idx)
+
+    def _link(self) -> None:
+        # BFS로 failure link 생성, 출력 목록은 failure 노드 출력까지 합침
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def matched_patterns(self, text: str) -> Set[int]:
+        found: Set[int] = set()
+        node = 0
+        t = (text or "").lower() if self.lowercase else (text or "")
+        for ch in t:
+            if self.ignore_spaces and ch.isspace():
+                continue
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node]:
+                found.update(self._out[node])
+        return found
+
+    def counts(self, text: str) -> Dict[str, int]:
+        out = {g: 0 for g in self.group_names}
+        for idx in self.matched_patterns(text):
+            for g in self.pattern_groups[idx]:
+                out[g] += 1
+        return out
+
+    def first_group(self, text: str, order: Optional[Sequence[str]] = None) -> Optional[str]:
+        # order 순서대로 hit가 있는 첫 그룹 (없으면 None)
+        counts = self.counts(text)
+        for g in order or self.group_names:
+            if counts.get(g, 0) > 0:
+                return g
+        return None
+
+    def any_match(self, text: str) -> bool:
+        return bool(self.matched_patterns(text))
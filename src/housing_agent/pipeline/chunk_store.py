@@ -0,0 +1,163 @@
+# 청크 JSONL offset 색인 코드
+
+"""
+policies_v2_chunked.jsonl 전체를 파싱하지 않고 필요한 청크만 읽기 위한 저장소
+
+파일 구성 (청크 JSONL 옆에 생성)
+- {stem}.offsets.npy : int64 (n, 2) = (바이트 offset, 바이트 길이), chunk_id 정렬 순서
+- {stem}.ids.npy     : 고정폭 유니코드 chunk_id 배열 (정렬, searchsorted로 조회)
+- {stem}.offsets.json: 원본 JSONL 크기/수정시각 (원본이 바뀌면 다시 생성)
+
+조회
+- offset/ids 배열은 np.load(mmap_mode="r"), JSONL은 mmap으로 열어 요청한 줄 구간만 슬라이스 후 파싱
+- 프로세스 시작 비용과 메모리가 청크 수에 비례해 늘지 않음
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+def store_paths(chunk_path: Path) -> Tuple[Path, Path, Path]:
+    base = chunk_path.with_suffix("")
+    return (
+        base.with_name(base.name + ".offsets.npy"),
+        base.with_name(base.name + ".ids.npy"),
+        base.with_name(base.name + ".offsets.json"),
+    )
+
+
+def _source_stamp(chunk_path: Path) -> Dict[str, int]:
+    st = chunk_path.stat()
+    return {"source_size": int(st.st_size), "source_mtime_ns": int(st.st_mtime_ns)}
+
+
+def build_chunk_offsets(chunk_path: Path) -> Dict[str, Any]:
+
+    """
+    JSONL을 바이트 단위로 한 번 훑어 chunk_id별 (offset, length) 색인 파일 생성
+    - chunk_id가 없는 줄은 건너뜀, 같은 chunk_id가 여러 번 나오면 마지막 줄 사용 (dict 로딩과 동일)
+    """
+
+    if not chunk_path.exists():
+        raise FileNotFoundError(f"청크 파일이 없습니다: {chunk_path}")
+
+    spans: Dict[str, Tuple[int, int]] = {}
+    offset = 0
+    with open(chunk_path, "rb") as f:
+        for line_no, line in enumerate(f, start=1):
+            start = offset
+            offset += len(line)
+            body = line.strip()
+            if not body:
+                continue
+            try:
+                row = json.loads(body)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"JSONL 파싱 오류: {chunk_path}:{line_no}") from exc
+            chunk_id = row.get("chunk_id")
+            if chunk_id:
+                spans[str(chunk_id)] = (start, len(line))
+
+    ids = sorted(spans.keys())
+    width = max([len(c) for c in ids] + [1])
+    id_arr = np.asarray(ids, dtype=f"<U{width}")
+    offsets = np.asarray([spans[c] for c in ids], dtype=np.int64).reshape(-1, 2)
+
+    offsets_path, ids_path, meta_path = store_paths(chunk_path)
+    np.save(offsets_path, offsets)
+    np.save(ids_path, id_arr)
+    meta = {**_source_stamp(chunk_path), "num_chunks": len(ids)}
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+class ChunkStore:
+
+    """
+    chunk_id -> 청크 dict 지연 조회
+    - open(): 색인이 없거나 원본 JSONL과 맞지 않으면 다시 생성
+    - get()/text(): 요청한 청크 줄만 파싱
+    - positions()/text_at(): 위치를 미리 구해 둔 호출자는 chunk_id 조회 없이 필요한 길이만 읽음
+    """
+
+    def __init__(self, chunk_path: Path) -> None:
+        offsets_path, ids_path, _ = store_paths(chunk_path)
+        self.chunk_path = chunk_path
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        self.ids = np.load(ids_path, mmap_mode="r")
+        self._file = open(chunk_path, "rb")
+        size = chunk_path.stat().st_size
+        self._mm: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    @classmethod
+    def open(cls, chunk_path: Path) -> "ChunkStore":
+        if not chunk_path.exists():
+            raise FileNotFoundError(f"청크 파일이 없습니다: {chunk_path}")
+        offsets_path, ids_path, meta_path = store_paths(chunk_path)
+        fresh = False
+        if offsets_path.exists() and ids_path.exists() and meta_path.exists():
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            stamp = _source_stamp(chunk_path)
+            fresh = all(meta.get(k) == v for k, v in stamp.items())
+        if not fresh:
+            build_chunk_offsets(chunk_path)
+        return cls(chunk_path)
+
+    def __len__(self) -> int:
+        return int(len(self.ids))
+
+    def _position(self, chunk_id: str) -> int:
+        pos = int(np.searchsorted(self.ids, chunk_id))
+        if pos < len(self.ids) and str(self.ids[pos]) == chunk_id:
+            return pos
+        return -1
+
+    def positions(self, chunk_ids: Union[List[str], np.ndarray]) -> np.ndarray:
+        # chunk_id 목록(또는 문자열 배열) -> 색인 위치 (없으면 -1), searchsorted 한 번으로 계산
+        if not len(self.ids) or not len(chunk_ids):
+            return np.full(len(chunk_ids), -1, dtype=np.int64)
+        query = np.asarray(chunk_ids, dtype=str)
+        pos = np.minimum(np.searchsorted(self.ids, query), len(self.ids) - 1).astype(np.int64)
+        pos[self.ids[pos] != query] = -1
+        return pos
+
+    def get(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_at(self._position(str(chunk_id)))
+
+    def get_at(self, pos: int) -> Optional[Dict[str, Any]]:
+        if pos < 0 or self._mm is None:
+            return None
+        start, length = (int(x) for x in self.offsets[pos])
+        # 해당 줄 바이트 구간만 잘라 파싱 (파일 나머지는 페이지 캐시에만 머묾)
+        return json.loads(self._mm[start : start + length]) if length else None
+
+    def get_many(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for chunk_id in chunk_ids:
+            row = self.get(chunk_id)
+            if row is not None:
+                out[str(chunk_id)] = row
+        return out
+
+    def text(self, chunk_id: str) -> str:
+        row = self.get(chunk_id)
+        return str((row or {}).get("text", ""))
+
+    def text_at(self, pos: int, max_chars: int = 0) -> str:
+        # 위치의 청크 본문 (max_chars > 0이면 앞부분만 잘라 반환해 긴 본문을 결과에 복사하지 않음)
+        text = str((self.get_at(pos) or {}).get("text", ""))
+        return text[:max_chars] if max_chars > 0 else text
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
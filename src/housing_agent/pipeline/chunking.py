@@ -4,14 +4,18 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+from src.housing_agent.pipeline.chunk_store import build_chunk_offsets, store_paths
+from src.housing_agent.pipeline.sparse_index import build_sparse_index, save_sparse_index
 
 ROOT = Path(__file__).resolve().parents[3]
 
 INPUT_PATH = ROOT / "data" / "processed" / "policies_v2.json"
 OUTPUT_PATH = ROOT / "data" / "processed" / "policies_v2_chunked.jsonl"
 META_MAP_PATH = ROOT / "data" / "processed" / "policies_v2_metadata.json"
+ELIGIBILITY_INDEX_PATH = ROOT / "data" / "processed" / "policies_v2_eligibility_index.json"
+SPARSE_INDEX_PATH = ROOT / "data" / "processed" / "policies_v2_sparse_index.npz"
 
 # 임베딩 모델 일반 권장 기준 : 700~1200 chars
 MAX_CHARS = 900
@@ -212,6 +216,109 @@ def build_policy_metadata_map(policies: List[Dict[str, Any]]) -> Dict[str, Any]:
     return out
 
 
+# 지역 posting key 정규화 (retriever의 지역 비교와 동일한 기준)
+def region_key(value: Any) -> str:
+    return str(value or "").strip().replace(" ", "")
+
+
+def _region_postings(meta_map: Dict[str, Any], policy_ids: List[str], field: str) -> Dict[str, Any]:
+    postings: Dict[str, List[int]] = {}
+    unrestricted: List[int] = []
+    for ordinal, pid in enumerate(policy_ids):
+        es = (meta_map[pid] or {}).get("eligibility_struct") or {}
+        values = ((es.get("regions") or {}).get(field)) or []
+        keys = sorted({region_key(x) for x in values if str(x).strip()})
+        if not keys:
+            # 지역 정보가 비어 있으면 모든 지역 질의에서 통과
+            unrestricted.append(ordinal)
+            continue
+        for k in keys:
+            postings.setdefault(k, []).append(ordinal)
+    return {"postings": dict(sorted(postings.items())), "unrestricted": unrestricted}
+
+
+def monthly_income_limit(es: Dict[str, Any]) -> Optional[int]:
+
+    """
+    eligibility_struct 소득 상한 -> 월 소득 기준 상한 (만원)
+    - 연 단위는 12로 나눈 값(내림) : 월 소득 m이 통과 <=> m * 12 <= 연 상한
+    - 기간 단위를 모르는 값(income_period 없음, 구버전 메타데이터 포함)은 None = 소득 필터 미적용
+    """
+
+    value = es.get("income_max_m")
+    if value is None:
+        return None
+    period = es.get("income_period")
+    if period == "month":
+        return int(value)
+    if period == "year":
+        return int(value) // 12
+    return None
+
+
+def _struct_columns(meta_map: Dict[str, Any], policy_ids: List[str]) -> Dict[str, List[Any]]:
+    # 소득/자산/무주택/가구·주거 유형 조건을 정책 ordinal 순서 열로 정리 (값 없음은 None / 빈 리스트)
+    columns: Dict[str, List[Any]] = {
+        "monthly_income_max_m": [],
+        "asset_max_m": [],
+        "requires_no_house": [],
+        "household_types": [],
+        "housing_types": [],
+    }
+    for pid in policy_ids:
+        es = (meta_map[pid] or {}).get("eligibility_struct") or {}
+        columns["monthly_income_max_m"].append(monthly_income_limit(es))
+        value = es.get("asset_max_m")
+        columns["asset_max_m"].append(int(value) if value is not None else None)
+        no_house = es.get("requires_no_house")
+        columns["requires_no_house"].append(None if no_house is None else bool(no_house))
+        for name in ("household_types", "housing_types"):
+            columns[name].append(sorted({str(x).strip() for x in es.get(name) or [] if str(x).strip()}))
+    return columns
+
+
+def build_eligibility_index(meta_map: Dict[str, Any]) -> Dict[str, Any]:
+
+    """
+    정책 메타데이터 -> 필터 평가용 사전 계산 인덱스
+
+    - policy_ids: 정책 ordinal -> policy_id
+    - age: age_min / age_max 기준 정렬 배열 (값 배열 + ordinal 배열)
+      - age_min이 없으면 하한 없음(-1), age_max가 없으면 상한 없음(999)으로 취급
+      - 나이 a 질의 = (age_min <= a 인 앞부분) ∩ (age_max >= a 인 뒷부분)
+    - regions: 정규화된 시/도, 시/군/구 -> 정책 ordinal posting list + 지역 제한 없는 정책 목록
+    - struct: 월 소득 기준 소득 상한, 자산 상한, 무주택 요건, 가구/주거 유형 (정책 ordinal 순서 열, 조건 없음은 None/빈 리스트)
+    """
+
+    policy_ids = sorted(str(pid) for pid in meta_map.keys())
+
+    mins: List[Tuple[int, int]] = []
+    maxs: List[Tuple[int, int]] = []
+    for ordinal, pid in enumerate(policy_ids):
+        es = (meta_map[pid] or {}).get("eligibility_struct") or {}
+        age_min = es.get("age_min")
+        age_max = es.get("age_max")
+        mins.append((int(age_min) if age_min is not None else -1, ordinal))
+        maxs.append((int(age_max) if age_max is not None else 999, ordinal))
+    mins.sort()
+    maxs.sort()
+
+    return {
+        "policy_ids": policy_ids,
+        "age": {
+            "min_values": [v for v, _ in mins],
+            "min_order": [o for _, o in mins],
+            "max_values": [v for v, _ in maxs],
+            "max_order": [o for _, o in maxs],
+        },
+        "regions": {
+            "sido": _region_postings(meta_map, policy_ids, "sido"),
+            "sigungu": _region_postings(meta_map, policy_ids, "sigungu"),
+        },
+        "struct": _struct_columns(meta_map, policy_ids),
+    }
+
+
 def main() -> None:
     with open(INPUT_PATH, "r", encoding="utf-8") as f:
         policies = json.load(f)
@@ -229,10 +336,20 @@ def main() -> None:
     with open(META_MAP_PATH, "w", encoding="utf-8") as f:
         json.dump(meta_map, f, ensure_ascii=False, indent=2)
 
+    eligibility_index = build_eligibility_index(meta_map)
+    with open(ELIGIBILITY_INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump(eligibility_index, f, ensure_ascii=False)
+
+    save_sparse_index(SPARSE_INDEX_PATH, build_sparse_index(all_chunks))
+    build_chunk_offsets(OUTPUT_PATH)
+
     print(f"input_policies: {len(policies)}")
     print(f"output_chunks: {len(all_chunks)}")
     print(f"saved: {OUTPUT_PATH}")
     print(f"saved: {META_MAP_PATH}")
+    print(f"saved: {ELIGIBILITY_INDEX_PATH}")
+    print(f"saved: {SPARSE_INDEX_PATH}")
+    print(f"saved: {store_paths(OUTPUT_PATH)[0]}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+# 주거 의견서 데몬 소켓 프로토콜 코드
+
+"""
+housing_daemon과 클라이언트(housing_adapter)가 공유하는 Unix 소켓 메시지 형식
+
+메시지
+- 4바이트 big-endian 길이 + UTF-8 JSON 본문
+- 요청: {"op": "housing", "user_profile": {...}} / {"op": "ping"}
+- 응답: {"ok": true, "result": ...} / {"ok": false, "error": "..."}
+- 한 연결에서 요청/응답을 여러 번 주고받을 수 있음
+
+표준 라이브러리만 사용 (클라이언트 쪽에서 faiss/openai/numpy를 import하지 않음)
+"""
+
+from __future__ import annotations
+
+import getpass
+import json
+import os
+import socket
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 사용자별 기본 소켓 경로 (공용 임시 디렉터리에서 다른 사용자의 데몬 소켓에 붙지 않도록)
+DEFAULT_SOCKET_PATH = Path(
+    os.getenv("HOUSING_AGENT_SOCKET") or Path(tempfile.gettempdir()) / f"housing_agent-{getpass.getuser()}.sock"
+)
+# 클라이언트 요청 1건의 응답 대기 시간(초), 검색 + LLM 생성까지 포함
+DEFAULT_TIMEOUT_S = float(os.getenv("HOUSING_AGENT_DAEMON_TIMEOUT") or 120.0)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024 # 메시지 1개 최대 크기 (잘못된 길이 헤더로 메모리를 잡지 않도록)
+HEADER = struct.Struct(">I")
+
+
+class DaemonUnavailableError(ConnectionError):
+    # 데몬 소켓이 없거나 연결을 받지 않음 (호출자는 프로세스 내 실행으로 대체 가능)
+    pass
+
+
+def send_message(sock: socket.socket, obj: Dict[str, Any]) -> None:
+    body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    if len(body) > MAX_MESSAGE_BYTES:
+        raise ValueError(f"메시지가 너무 큽니다: {len(body)} bytes")
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        part = sock.recv(min(size - len(buf), 1 << 20))
+        if not part:
+            break
+        buf.extend(part)
+    return bytes(buf)
+
+
+def recv_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+
+    """
+    메시지 1개 수신
+    - 메시지 경계에서 상대가 연결을 닫으면 None
+    - 헤더/본문 도중 끊기거나 크기 초과, JSON 형식 오류면 ValueError
+    """
+
+    header = _recv_exact(sock, HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise ValueError("메시지 헤더 수신 중 연결이 끊겼습니다.")
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"메시지가 너무 큽니다: {size} bytes")
+    body = _recv_exact(sock, size)
+    if len(body) < size:
+        raise ValueError("메시지 본문 수신 중 연결이 끊겼습니다.")
+    try:
+        obj = json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError("메시지 JSON 파싱 오류") from exc
+    if not isinstance(obj, dict):
+        raise ValueError("메시지 형식이 dict가 아닙니다.")
+    return obj
+
+
+def connect(socket_path: Path = DEFAULT_SOCKET_PATH, timeout: Optional[float] = None) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+    except (FileNotFoundError, ConnectionRefusedError, PermissionError) as exc:
+        sock.close()
+        raise DaemonUnavailableError(f"주거 의견서 데몬에 연결할 수 없습니다: {socket_path}") from exc
+    return sock
+
+
+def request(
+    payload: Dict[str, Any],
+    socket_path: Path = DEFAULT_SOCKET_PATH,
+    timeout: Optional[float] = None,
+) -> Any:
+
+    """
+    요청 1건 전송 후 result 반환
+    - 데몬이 없거나 접근 권한이 없으면 DaemonUnavailableError (연결 이후 실패와 구분)
+    - timeout 안에 응답이 없으면 TimeoutError
+    - 데몬이 처리 중 오류를 돌려주면 RuntimeError
+    """
+
+    with connect(socket_path, timeout=timeout) as sock:
+        try:
+            send_message(sock, payload)
+            response = recv_message(sock)
+        except socket.timeout as exc:
+            raise TimeoutError(f"데몬 응답 대기 시간({timeout}초)을 넘었습니다.") from exc
+    if response is None:
+        raise ConnectionError("데몬이 응답 없이 연결을 닫았습니다.")
+    if not response.get("ok"):
+        raise RuntimeError(str(response.get("error") or "데몬 처리 오류"))
+    return response.get("result")
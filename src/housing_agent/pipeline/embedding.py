@@ -6,7 +6,8 @@ from __future__ import annotations
 
 출력
 - .npy : 임베딩 벡터 행렬
-- manifest.jsonl: vector_idx -> 원본 chunk 메타 매핑
+- manifest.jsonl: vector_idx -> 원본 chunk 메타 매핑 (근사 중복 군집 dup_group_id 포함)
+- manifest/: 같은 매핑의 vector_idx 정렬 열 배열 (열별 .npy, 정수 코드 + 문자열 테이블, retriever가 mmap으로 로딩)
 - meta.json: 디버깅용, 기록 저장
 """
 
@@ -17,14 +18,17 @@ import random
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
 
 import numpy as np
 
+from src.housing_agent.pipeline.manifest import build_manifest_columns, manifest_path_for, save_manifest_columns
+from src.housing_agent.pipeline.near_dup import MIN_TEXT_LEN, near_duplicate_groups
 
 ROOT = Path(__file__).resolve().parents[3]
+
 DEFAULT_INPUT = ROOT / "data" / "processed" / "policies_v2_chunked.jsonl"
 DEFAULT_OUT_DIR = ROOT / "data" / "vectorstore"
 DEFAULT_VEC_PATH = DEFAULT_OUT_DIR / "policies_v2_embeddings.npy"
@@ -113,7 +117,7 @@ def embed_batch(
     raise RuntimeError(f"API 호출 실패: {last_error}")
 
 
-def build_manifest_row(row: Dict[str, Any], vector_idx: int) -> Dict[str, Any]:
+def build_manifest_row(row: Dict[str, Any], vector_idx: int, dup_group_id: Optional[int]) -> Dict[str, Any]:
 
     return {
         "vector_idx": vector_idx,
@@ -122,6 +126,7 @@ def build_manifest_row(row: Dict[str, Any], vector_idx: int) -> Dict[str, Any]:
         "category": row.get("category"),
         "title": row.get("title"),
         "section": row.get("section"),
+        "dup_group_id": dup_group_id,
     }
 
 
@@ -149,6 +154,9 @@ def main() -> None:
     if not rows:
         raise ValueError("처리할 청크가 없습니다.")
 
+    # 근사 중복 군집 (vector_idx = rows 순서이므로 군집 id도 vector_idx 기준)
+    dup_groups = near_duplicate_groups([str(r.get("text", "")) for r in rows], min_len=MIN_TEXT_LEN)
+
     client = OpenAI(api_key=api_key)
 
     vectors: List[List[float]] = []
@@ -173,7 +181,7 @@ def main() -> None:
         for row, vector in zip(batch_rows, emb):
             vector_idx = len(vectors)
             vectors.append(vector)
-            manifest.append(build_manifest_row(row, vector_idx))
+            manifest.append(build_manifest_row(row, vector_idx, dup_groups[vector_idx]))
 
         done += len(batch_rows)
         print(f"[progress] {done}/{total} embedded")
@@ -191,6 +199,8 @@ def main() -> None:
     with open(args.out_manifest, "w", encoding="utf-8") as f:
         for row in manifest:
             f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    columnar_path = manifest_path_for(args.out_manifest)
+    save_manifest_columns(columnar_path, build_manifest_columns(manifest), args.out_manifest)
 
     # 실행 요약(meta) 파일
     meta = {
@@ -202,12 +212,16 @@ def main() -> None:
         "batch_size": args.batch_size,
         "vectors_path": str(args.out_vectors),
         "manifest_path": str(args.out_manifest),
+        "columnar_manifest_path": str(columnar_path),
+        "num_dup_groups": len(set(dup_groups)),
+        "dup_min_len": MIN_TEXT_LEN,
     }
     with open(args.out_meta, "w", encoding="utf-8") as f:
         json.dump(meta, f, ensure_ascii=False, indent=2)
 
     print(f"[done] vectors: {args.out_vectors}")
     print(f"[done] mapping: {args.out_manifest}")
+    print(f"[done] columnar mapping: {columnar_path}")
     print(f"[done] log: {args.out_meta}")
 
 
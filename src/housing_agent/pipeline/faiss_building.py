@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import math
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 import faiss
 
 import numpy as np
@@ -16,6 +19,8 @@ DEFAULT_MAPPING_PATH = ROOT / "data" / "vectorstore" / "policies_v2_embedding_ma
 DEFAULT_EMBED_LOG_PATH = ROOT / "data" / "vectorstore" / "policies_v2_embedding_log.json"
 DEFAULT_INDEX_PATH = ROOT / "data" / "vectorstore" / "policies_v2_index.faiss"
 DEFAULT_INDEX_INFO_PATH = ROOT / "data" / "vectorstore" / "policies_v2_index_log.json"
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw")
+COMPRESSIONS = ("none", "sq8", "fp16", "pq", "opq")
 
 
 def parse_args() -> argparse.Namespace:
@@ -32,6 +37,45 @@ def parse_args() -> argparse.Namespace:
         default="cosine",
         help="검색 거리 기준",
     )
+    parser.add_argument(
+        "--representatives-only",
+        action="store_true",
+        help="근사 중복 군집(dup_group_id)별 대표 벡터만 인덱싱",
+    )
+    parser.add_argument("--index-type", type=str, choices=INDEX_TYPES, default="flat", help="인덱스 종류")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF 클러스터 수(0이면 벡터 수 기준 자동)")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF 검색 시 탐색 클러스터 수")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW 노드당 연결 수(M)")
+    parser.add_argument("--ef-construction", type=int, default=40, help="HNSW 생성 시 efConstruction")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW 검색 시 efSearch")
+    parser.add_argument(
+        "--compression",
+        type=str,
+        choices=COMPRESSIONS,
+        default="none",
+        help="벡터 압축 방식 (sq8: 8bit 스칼라 양자화, fp16: half precision, pq/opq: product quantization)",
+    )
+    parser.add_argument("--pq-m", type=int, default=0, help="PQ 부분공간 수(0이면 차원/16 근처 약수로 자동)")
+    parser.add_argument("--pq-nbits", type=int, default=8, help="PQ 부분공간당 코드 비트 수")
+    parser.add_argument(
+        "--refine-factor",
+        type=int,
+        default=4,
+        help="압축 인덱스에서 k*factor개 후보를 뽑아 원본 벡터(npy, mmap)로 재정렬 (1이면 재정렬 안 함)",
+    )
+    parser.add_argument("--eval-queries", type=int, default=200, help="recall/latency 측정 질의 수(0이면 생략)")
+    parser.add_argument("--eval-k", type=int, default=10, help="recall@k의 k")
+    parser.add_argument(
+        "--shard-by-category",
+        action="store_true",
+        help="카테고리별 샤드 인덱스를 따로 빌드 ({out-index 이름}_shards/{category}.faiss)",
+    )
+    parser.add_argument(
+        "--shard-categories",
+        type=str,
+        default="",
+        help="다시 빌드할 샤드 카테고리(쉼표 구분, 비우면 전체). 나머지 샤드 파일은 그대로 유지",
+    )
     return parser.parse_args()
 
 
@@ -44,6 +88,36 @@ def count_jsonl_rows(path: Path) -> int:
     return count
 
 
+# 매핑의 dup_group_id 목록 (없는 행은 자기 자신을 대표로 취급)
+def read_dup_groups(path: Path) -> List[int]:
+    groups: List[int] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            vidx = int(row.get("vector_idx", len(groups)))
+            dup = row.get("dup_group_id")
+            groups.append(vidx if dup is None else int(dup))
+    return groups
+
+
+# 매핑의 카테고리 목록 (vector_idx 순서, 값이 없으면 "other" 샤드)
+def read_categories(path: Path) -> List[str]:
+    categories: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            categories.append(str(row.get("category") or "").strip().lower() or "other")
+    return categories
+
+
+def shard_dir_for(index_path: Path) -> Path:
+    return index_path.with_name(index_path.stem + "_shards")
+
+
 def load_json_if_exists(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
@@ -58,6 +132,201 @@ def normalize_rows(mat: np.ndarray) -> np.ndarray:
     return mat / norms
 
 
+def auto_nlist(num_vectors: int) -> int:
+    # 일반 권장 기준 4*sqrt(N), 클러스터당 학습 벡터 39개 이상 유지
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+
+
+def faiss_metric(metric: str) -> int:
+    return faiss.METRIC_INNER_PRODUCT if metric == "cosine" else faiss.METRIC_L2
+
+
+def build_flat_index(dim: int, metric: str) -> Any:
+    return faiss.IndexFlatIP(dim) if metric == "cosine" else faiss.IndexFlatL2(dim)
+
+
+def build_index(matrix: np.ndarray, metric: str, index_type: str, build_params: Dict[str, int]) -> Any:
+
+    """
+    index_type별 빈 인덱스 생성 + 필요 시 학습
+    - flat: 전수 검색 (IndexFlatIP / IndexFlatL2)
+    - ivf_flat: k-means 클러스터(nlist) 단위 역색인, matrix로 자동 학습
+    - hnsw: 그래프 기반 근사 검색 (학습 불필요)
+    """
+
+    dim = int(matrix.shape[1])
+    if index_type == "flat":
+        return build_flat_index(dim, metric)
+    if index_type == "ivf_flat":
+        quantizer = build_flat_index(dim, metric)
+        index = faiss.IndexIVFFlat(quantizer, dim, int(build_params["nlist"]), faiss_metric(metric))
+        index.train(matrix)
+        return index
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, int(build_params["hnsw_m"]), faiss_metric(metric))
+        index.hnsw.efConstruction = int(build_params["ef_construction"])
+        return index
+    raise ValueError(f"지원하지 않는 index-type입니다: {index_type}")
+
+
+def auto_pq_m(dim: int) -> int:
+    # 부분공간당 약 16차원, dim의 약수여야 함
+    target = max(1, dim // 16)
+    for m in range(target, 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def compressed_factory_string(
+    index_type: str,
+    compression: str,
+    build_params: Dict[str, int],
+) -> str:
+
+    """
+    index_type + compression 조합 -> faiss.index_factory 문자열
+    - flat + pq/opq는 IVF1(클러스터 1개 = 전수 검색)로 감쌈 : IndexPQ는 IDSelector 필터를 지원하지 않음
+    - opq는 OPQ 회전 행렬을 앞에 둔 IndexPreTransform
+    """
+
+    if compression in ("sq8", "fp16"):
+        code = "SQ8" if compression == "sq8" else "SQfp16"
+    else:
+        code = f"PQ{build_params['pq_m']}x{build_params['pq_nbits']}"
+
+    if index_type == "flat":
+        body = code if compression in ("sq8", "fp16") else f"IVF1,{code}"
+    elif index_type == "ivf_flat":
+        body = f"IVF{build_params['nlist']},{code}"
+    elif index_type == "hnsw":
+        body = f"HNSW{build_params['hnsw_m']}_{code}"
+    else:
+        raise ValueError(f"지원하지 않는 index-type입니다: {index_type}")
+
+    if compression == "opq":
+        body = f"OPQ{build_params['pq_m']},{body}"
+    return body
+
+
+def build_compressed_index(
+    matrix: np.ndarray,
+    metric: str,
+    index_type: str,
+    compression: str,
+    build_params: Dict[str, int],
+) -> Any:
+
+    # factory 문자열로 생성 후 학습 (SQ 범위, PQ/OPQ codebook, IVF centroid 모두 matrix로 학습)
+    dim = int(matrix.shape[1])
+    index = faiss.index_factory(dim, compressed_factory_string(index_type, compression, build_params), faiss_metric(metric))
+    if index_type == "hnsw":
+        inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexPreTransform) else index
+        inner.hnsw.efConstruction = int(build_params["ef_construction"])
+    index.train(matrix)
+    return index
+
+
+# 압축 인덱스 후보를 원본 벡터 기준 정확한 점수로 재정렬 (vectors는 np.load(mmap_mode="r") 결과여도 됨)
+def refine_candidates(
+    vectors: np.ndarray,
+    query: np.ndarray,
+    candidate_ids: np.ndarray,
+    metric: str,
+    k: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    ids = np.asarray(candidate_ids, dtype=np.int64)
+    ids = ids[ids >= 0]
+    if len(ids) == 0 or k <= 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+    rows = np.asarray(vectors[ids], dtype=np.float32)
+    if metric == "cosine":
+        scores = normalize_rows(rows) @ query
+        order = np.lexsort((ids, -scores))
+    else:
+        scores = ((rows - query) ** 2).sum(axis=1)
+        order = np.lexsort((ids, scores))
+    order = order[:k]
+    return scores[order].astype(np.float32), ids[order]
+
+
+def apply_search_params(index: Any, search_params: Dict[str, int]) -> None:
+    # 검색 시점 파라미터(nprobe/efSearch)를 인덱스 기본값으로 적용 (IDMap 등 래퍼 포함)
+    ps = faiss.ParameterSpace()
+    for name, value in (search_params or {}).items():
+        ps.set_index_parameter(index, name, value)
+
+
+def _percentiles(values_ms: List[float]) -> Dict[str, float]:
+    arr = np.asarray(values_ms, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 4),
+        "p95": round(float(np.percentile(arr, 95)), 4),
+    }
+
+
+def evaluate_index(
+    index: Any,
+    exact_index: Any,
+    matrix: np.ndarray,
+    metric: str,
+    num_queries: int,
+    k: int,
+    seed: int = 42,
+    refine_vectors: Optional[np.ndarray] = None,
+    refine_factor: int = 1,
+) -> Dict[str, Any]:
+
+    """
+    인덱스 벡터 일부에 작은 노이즈를 더한 질의로 exact(flat) 대비 recall@k, 질의 1건 latency 측정
+    - refine_vectors가 있으면 k*refine_factor 후보를 원본 벡터로 재정렬한 recall/latency도 함께 측정
+    """
+
+    rng = np.random.default_rng(seed)
+    n = int(matrix.shape[0])
+    num_queries = min(num_queries, n)
+    k = min(k, n)
+    rows = rng.choice(n, size=num_queries, replace=False)
+    queries = matrix[rows] + rng.normal(0, 0.01, size=(num_queries, matrix.shape[1])).astype(np.float32)
+    if metric == "cosine":
+        queries = normalize_rows(queries)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+
+    def timed_search(idx: Any, factor: int = 1) -> tuple[List[np.ndarray], List[float]]:
+        out: List[np.ndarray] = []
+        times: List[float] = []
+        for i in range(num_queries):
+            t0 = time.perf_counter()
+            _, ids = idx.search(queries[i : i + 1], min(k * factor, n))
+            if factor > 1:
+                _, ids = refine_candidates(refine_vectors, queries[i], ids[0], metric, k)
+                ids = ids[None, :]
+            times.append((time.perf_counter() - t0) * 1000.0)
+            out.append(ids[0])
+        return out, times
+
+    def recall(found: List[np.ndarray], truth: List[np.ndarray]) -> float:
+        hits = sum(len(set(a.tolist()) & set(e.tolist())) for a, e in zip(found, truth))
+        return round(hits / float(num_queries * k), 4)
+
+    exact_ids, exact_times = timed_search(exact_index)
+    approx_ids, approx_times = timed_search(index)
+    result: Dict[str, Any] = {
+        "k": int(k),
+        "num_queries": int(num_queries),
+        "recall_at_k": recall(approx_ids, exact_ids),
+        "latency_ms": _percentiles(approx_times),
+        "exact_latency_ms": _percentiles(exact_times),
+    }
+
+    if refine_vectors is not None and refine_factor > 1:
+        refined_ids, refined_times = timed_search(index, refine_factor)
+        result["refine_factor"] = int(refine_factor)
+        result["refined_recall_at_k"] = recall(refined_ids, exact_ids)
+        result["refined_latency_ms"] = _percentiles(refined_times)
+    return result
+
+
 def main() -> None:
     args = parse_args()
 
@@ -85,35 +354,269 @@ def main() -> None:
     normalized = False
     if args.metric == "cosine":
         matrix = normalize_rows(matrix)
-        index = faiss.IndexFlatIP(dim)
         normalized = True
-    else:
-        index = faiss.IndexFlatL2(dim)
 
-    index.add(matrix)
-
-    args.out_index.parent.mkdir(parents=True, exist_ok=True)
-    args.out_info.parent.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(index, str(args.out_index))
+    ids = np.arange(num_vectors, dtype=np.int64)
+    if args.representatives_only:
+        # 대표 벡터만 넣되 vector_idx는 그대로 유지 (IndexIDMap2)
+        groups = np.asarray(read_dup_groups(args.mapping), dtype=np.int64)
+        ids = np.flatnonzero(groups == np.arange(num_vectors)).astype(np.int64)
 
     embed_log = load_json_if_exists(args.embed_log)
-    info = {
-        "index_type": type(index).__name__,
+    base_info = {
+        "index_kind": args.index_type,
+        "compression": args.compression,
         "metric": args.metric,
         "normalized_vectors": normalized,
         "num_vectors": int(num_vectors),
+        "representatives_only": bool(args.representatives_only),
         "dimension": int(dim),
-        "index_path": str(args.out_index),
         "vectors_path": str(args.vectors),
         "mapping_path": str(args.mapping),
         "embedding_model": embed_log.get("model"),
+        # 근사 중복 군집을 만든 최소 길이 (retriever가 --text-dedup-min-len과 비교)
+        "dup_min_len": embed_log.get("dup_min_len"),
+    }
+    if args.shard_by_category:
+        build_category_shards(args, matrix, ids, base_info)
+        return
+
+    built = build_and_evaluate(args, matrix, ids, wrap_ids=args.representatives_only)
+    index = built["index"]
+    evaluation = built["evaluation"]
+    num_indexed = built["num_indexed"]
+    refine_factor = built["refine_factor"]
+
+    args.out_info.parent.mkdir(parents=True, exist_ok=True)
+    built_at, index_version, index_bytes = write_index_versioned(index, args.out_index)
+    raw_bytes = int(num_indexed * dim * 4)
+
+    info = {
+        "built_at": built_at,
+        "index_version": index_version,
+        "index_type": type(index).__name__,
+        "index_kind": args.index_type,
+        "build_params": built["build_params"],
+        "search_params": built["search_params"],
+        "evaluation": evaluation,
+        "compression": args.compression,
+        "refine": {"factor": refine_factor, "vectors_path": str(args.vectors)} if refine_factor > 1 else {},
+        "memory": memory_stats(index_bytes, num_indexed, int(dim)),
+        **base_info,
+        "num_indexed_vectors": num_indexed,
+        "index_path": str(args.out_index),
     }
     with open(args.out_info, "w", encoding="utf-8") as f:
         json.dump(info, f, ensure_ascii=False, indent=2)
 
+    print_evaluation(evaluation)
+    print(f"[index] {info['index_type']} ({args.compression}), {index_bytes} bytes ({raw_bytes} bytes as float32)")
     print(f"[done] faiss_index: {args.out_index}")
     print(f"[done] index_info: {args.out_info}")
 
 
+def build_and_evaluate(args: argparse.Namespace, matrix: np.ndarray, ids: np.ndarray, wrap_ids: bool) -> Dict[str, Any]:
+
+    """
+    matrix[ids] 벡터로 인덱스 1개 생성 + (옵션) exact 대비 평가
+    - wrap_ids: IndexIDMap2로 감싸 vector_idx(ids)를 그대로 검색 결과 id로 사용 (대표 벡터/샤드)
+    - 벡터 수 기준 자동 값(nlist, pq nbits)은 이 인덱스에 들어가는 벡터 수로 계산
+    """
+
+    dim = int(matrix.shape[1])
+    indexed = np.ascontiguousarray(matrix[ids])
+    num_indexed = int(len(ids))
+
+    build_params: Dict[str, int] = {}
+    search_params: Dict[str, int] = {}
+    if args.index_type == "ivf_flat":
+        nlist = args.nlist if args.nlist > 0 else auto_nlist(num_indexed)
+        build_params = {"nlist": nlist}
+        search_params = {"nprobe": min(max(1, args.nprobe), nlist)}
+    elif args.index_type == "hnsw":
+        build_params = {"hnsw_m": args.hnsw_m, "ef_construction": args.ef_construction}
+        search_params = {"efSearch": args.ef_search}
+
+    if args.compression in ("pq", "opq"):
+        pq_m = args.pq_m if args.pq_m > 0 else auto_pq_m(int(dim))
+        if dim % pq_m != 0:
+            raise ValueError(f"pq-m({pq_m})은 벡터 차원({dim})의 약수여야 합니다.")
+        # codebook 학습에는 2^nbits개 이상의 벡터가 필요하므로 작은 말뭉치에서는 비트 수를 낮춤
+        pq_nbits = max(1, min(args.pq_nbits, int(math.log2(num_indexed))))
+        build_params.update({"pq_m": pq_m, "pq_nbits": pq_nbits})
+        if args.compression == "opq" and num_indexed < 256:
+            # OPQ 회전 학습은 내부적으로 8bit PQ(256 centroid)를 사용
+            raise ValueError(f"opq 학습에는 벡터가 256개 이상 필요합니다: {num_indexed}")
+        if args.index_type == "flat":
+            search_params = {"nprobe": 1}
+
+    refine_factor = max(1, args.refine_factor) if args.compression != "none" else 1
+    if args.compression == "none":
+        index = build_index(indexed, args.metric, args.index_type, build_params)
+    else:
+        index = build_compressed_index(indexed, args.metric, args.index_type, args.compression, build_params)
+    if wrap_ids:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(indexed, ids)
+    else:
+        index.add(indexed)
+    apply_search_params(index, search_params)
+
+    evaluation: Dict[str, Any] = {}
+    if args.eval_queries > 0:
+        exact = build_flat_index(dim, args.metric)
+        if wrap_ids:
+            exact = faiss.IndexIDMap2(exact)
+            exact.add_with_ids(indexed, ids)
+        else:
+            exact.add(indexed)
+        evaluation = evaluate_index(
+            index,
+            exact,
+            indexed,
+            args.metric,
+            args.eval_queries,
+            args.eval_k,
+            refine_vectors=matrix,
+            refine_factor=refine_factor,
+        )
+        # 압축/근사로 잃은 recall (exact = 1.0 기준)
+        evaluation["recall_delta"] = round(evaluation["recall_at_k"] - 1.0, 4)
+        if "refined_recall_at_k" in evaluation:
+            evaluation["refined_recall_delta"] = round(evaluation["refined_recall_at_k"] - 1.0, 4)
+
+    return {
+        "index": index,
+        "build_params": build_params,
+        "search_params": search_params,
+        "evaluation": evaluation,
+        "refine_factor": refine_factor,
+        "num_indexed": num_indexed,
+    }
+
+
+def write_index_versioned(index: Any, path: Path) -> tuple[str, str, int]:
+    # 빌드 버전 : 검색 결과 캐시 key에 들어가 인덱스를 다시 만들면 캐시가 자동 무효화됨
+    path.parent.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(index, str(path))
+    built_at = datetime.now(timezone.utc).isoformat()
+    with open(path, "rb") as f:
+        index_version = hashlib.sha1(built_at.encode("utf-8") + f.read()).hexdigest()[:16]
+    return built_at, index_version, int(path.stat().st_size)
+
+
+def memory_stats(index_bytes: int, num_indexed: int, dim: int) -> Dict[str, Any]:
+    raw_bytes = int(num_indexed * dim * 4)
+    return {
+        "index_bytes": index_bytes,
+        "float32_bytes": raw_bytes,
+        "bytes_per_vector": round(index_bytes / max(1, num_indexed), 2),
+        "compression_ratio": round(raw_bytes / max(1, index_bytes), 3),
+    }
+
+
+def print_evaluation(evaluation: Dict[str, Any], label: str = "eval") -> None:
+    if not evaluation:
+        return
+    print(
+        f"[{label}] recall@{evaluation['k']}= {evaluation['recall_at_k']}"
+        f", p50= {evaluation['latency_ms']['p50']}ms, p95= {evaluation['latency_ms']['p95']}ms"
+        f" (flat p50= {evaluation['exact_latency_ms']['p50']}ms)"
+    )
+    if "refined_recall_at_k" in evaluation:
+        print(
+            f"[{label}] refine x{evaluation['refine_factor']} recall@{evaluation['k']}= "
+            f"{evaluation['refined_recall_at_k']}, p50= {evaluation['refined_latency_ms']['p50']}ms"
+        )
+
+
+def build_category_shards(
+    args: argparse.Namespace,
+    matrix: np.ndarray,
+    ids: np.ndarray,
+    base_info: Dict[str, Any],
+) -> None:
+
+    """
+    카테고리별 샤드 인덱스 빌드
+    - 샤드마다 IndexIDMap2로 전역 vector_idx를 유지 (retriever가 샤드 결과를 그대로 병합)
+    - --shard-categories로 일부만 다시 빌드하면 나머지 샤드 파일/정보는 건드리지 않음
+      (vector_idx가 바뀌지 않았는지 벡터 수/metric/차원으로 확인)
+    - 재정렬(refine) 설정은 모든 샤드에 공통으로 적용되므로, 일부 재빌드의 --compression/--refine-factor로
+      정해지는 재정렬 설정이 기존 샤드와 다르면 중단 (전체 샤드를 다시 빌드해야 함)
+    - index-log의 index_version은 샤드 버전 조합이라 샤드 하나만 바뀌어도 결과 캐시가 무효화됨
+    """
+
+    categories = np.asarray(read_categories(args.mapping))
+    if len(categories) != base_info["num_vectors"]:
+        raise ValueError(f"매핑 카테고리 수({len(categories)})와 벡터 수({base_info['num_vectors']})가 다릅니다.")
+    available = sorted(set(categories[ids].tolist()))
+    requested = [c.strip().lower() for c in args.shard_categories.split(",") if c.strip()]
+
+    refine_factor = max(1, args.refine_factor) if args.compression != "none" else 1
+    refine = {"factor": refine_factor, "vectors_path": str(args.vectors)} if refine_factor > 1 else {}
+
+    shards: Dict[str, Any] = {}
+    if requested:
+        unknown = sorted(set(requested) - set(available))
+        if unknown:
+            raise ValueError(f"매핑에 없는 카테고리입니다: {unknown}")
+        previous = load_json_if_exists(args.out_info)
+        if not previous.get("shards"):
+            raise ValueError(f"기존 샤드 정보가 없습니다. --shard-categories 없이 전체 샤드를 먼저 빌드하세요: {args.out_info}")
+        for key in ("num_vectors", "metric", "dimension", "representatives_only"):
+            if previous.get(key) != base_info[key]:
+                raise ValueError(
+                    f"기존 샤드와 {key}가 다릅니다({previous.get(key)} != {base_info[key]}). 전체 샤드를 다시 빌드하세요."
+                )
+        if (previous.get("refine") or {}) != refine:
+            raise ValueError(
+                f"기존 샤드와 재정렬 설정이 다릅니다({previous.get('refine') or {}} != {refine}). "
+                "기존과 같은 --compression/--refine-factor를 쓰거나 전체 샤드를 다시 빌드하세요."
+            )
+        shards = dict(previous["shards"])
+
+    shard_dir = shard_dir_for(args.out_index)
+    for name in requested or available:
+        shard_ids = ids[categories[ids] == name]
+        built = build_and_evaluate(args, matrix, shard_ids, wrap_ids=True)
+        path = shard_dir / f"{name}.faiss"
+        built_at, version, index_bytes = write_index_versioned(built["index"], path)
+        shards[name] = {
+            "path": str(path),
+            "built_at": built_at,
+            "index_version": version,
+            "index_type": type(built["index"]).__name__,
+            "index_kind": args.index_type,
+            "compression": args.compression,
+            "refine_factor": refine_factor,
+            "num_indexed_vectors": built["num_indexed"],
+            "build_params": built["build_params"],
+            "search_params": built["search_params"],
+            "evaluation": built["evaluation"],
+            "memory": memory_stats(index_bytes, built["num_indexed"], base_info["dimension"]),
+        }
+        print_evaluation(built["evaluation"], label=f"eval:{name}")
+        print(f"[shard] {name}: {built['num_indexed']} vectors, {index_bytes} bytes -> {path}")
+
+    combined = "|".join(f"{name}:{shards[name]['index_version']}" for name in sorted(shards))
+    info = {
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "index_version": hashlib.sha1(combined.encode("utf-8")).hexdigest()[:16],
+        "index_type": "category_shards",
+        **base_info,
+        "refine": refine,
+        "num_indexed_vectors": int(sum(int(v["num_indexed_vectors"]) for v in shards.values())),
+        "index_path": str(shard_dir),
+        "shard_by": "category",
+        "shards": shards,
+    }
+    args.out_info.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out_info, "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    print(f"[done] shards: {shard_dir} ({len(shards)} shards)")
+    print(f"[done] index_info: {args.out_info}")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,160 @@
+# 주거 의견서 상주 데몬 코드
+
+"""
+housing_opinion_prompt를 요청마다 새 프로세스로 띄우지 않고 인덱스/청크/메타데이터를 메모리에 올린 채 Unix 소켓으로 처리
+
+- 시작 시 retriever 서비스를 미리 로드 (첫 요청도 import/로딩 비용 없음)
+- 연결마다 스레드로 처리, 동시에 실행되는 의견서 생성 수는 --max-concurrency로 제한
+- 메시지 형식은 daemon_protocol (4바이트 길이 + JSON)
+- 같은 소켓에 살아 있는 데몬이 있으면 시작하지 않고, 남아 있는 소켓 파일은 지우고 다시 만듦
+
+실행
+python -m src.housing_agent.pipeline.housing_daemon --socket-path /tmp/housing_agent-$USER.sock [housing_opinion_prompt 옵션]
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.housing_agent.pipeline import daemon_protocol
+from src.housing_agent.pipeline.housing_opinion_prompt import parse_args as parse_opinion_args
+from src.housing_agent.pipeline.housing_opinion_prompt import run_housing_opinion
+from src.housing_agent.pipeline.retriever import get_retriever_service
+
+
+def parse_args(argv: Optional[List[str]] = None) -> tuple[argparse.Namespace, argparse.Namespace]:
+
+    # 데몬 옵션 + 나머지는 housing_opinion_prompt 옵션(모든 요청에 공통 적용)
+    parser = argparse.ArgumentParser(description="주거 의견서 상주 데몬 (Unix 소켓)")
+    parser.add_argument("--socket-path", type=Path, default=daemon_protocol.DEFAULT_SOCKET_PATH, help="Unix 소켓 경로")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="동시에 처리할 의견서 요청 수")
+    args, rest = parser.parse_known_args(argv)
+    return args, parse_opinion_args(rest)
+
+
+class HousingRequestHandler(socketserver.BaseRequestHandler):
+
+    # 연결 1개 : 상대가 닫을 때까지 요청 -> 응답 반복
+    def handle(self) -> None:
+        while True:
+            try:
+                message = daemon_protocol.recv_message(self.request)
+            except (ValueError, OSError) as exc:
+                self._reply({"ok": False, "error": str(exc)})
+                return
+            if message is None:
+                return
+            if not self._reply(self.server.dispatch(message)):
+                return
+
+    def _reply(self, response: Dict[str, Any]) -> bool:
+        try:
+            daemon_protocol.send_message(self.request, response)
+            return True
+        except OSError:
+            return False
+
+
+class HousingDaemon(socketserver.ThreadingUnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, opinion_args: argparse.Namespace, max_concurrency: int = 8) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("--max-concurrency는 1 이상이어야 합니다.")
+        self.socket_path = socket_path
+        self.opinion_args = opinion_args
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.started_at = time.time()
+        self.served = 0
+        self._served_lock = threading.Lock()
+        _prepare_socket_path(socket_path)
+        super().__init__(str(socket_path), HousingRequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def dispatch(self, message: Dict[str, Any]) -> Dict[str, Any]:
+
+        """
+        요청 1건 처리 -> 응답 dict
+        - ping: 상태 확인
+        - housing: user_profile로 의견서 생성 (run_housing_opinion과 같은 결과)
+        - 처리 중 예외는 연결을 끊지 않고 오류 응답으로 반환
+        """
+
+        op = message.get("op")
+        try:
+            if op == "ping":
+                return {"ok": True, "result": {"pid": os.getpid(), "uptime_s": round(time.time() - self.started_at, 1), "served": self.served}}
+            if op != "housing":
+                raise ValueError(f"지원하지 않는 요청입니다: {op}")
+            profile = message.get("user_profile")
+            if not isinstance(profile, dict):
+                raise ValueError("user_profile 형식이 dict가 아닙니다.")
+            # 요청별 옵션 변경이 서로 섞이지 않도록 공통 옵션 복사본 사용
+            args = copy.copy(self.opinion_args)
+            args.debug_verbose = bool(message.get("debug_verbose", False))
+            with self._slots:
+                result = run_housing_opinion(args, user_profile=profile)
+            with self._served_lock:
+                self.served += 1
+            return {"ok": True, "result": result}
+        except Exception as exc:
+            return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+
+def _prepare_socket_path(socket_path: Path) -> None:
+    # 살아 있는 데몬이 있으면 중복 실행 방지, 비정상 종료로 남은 소켓 파일은 제거
+    if not socket_path.exists():
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        return
+    try:
+        daemon_protocol.request({"op": "ping"}, socket_path=socket_path, timeout=2.0)
+    except (daemon_protocol.DaemonUnavailableError, OSError):
+        socket_path.unlink()
+        return
+    raise RuntimeError(f"이미 실행 중인 데몬이 있습니다: {socket_path}")
+
+
+def main() -> None:
+    args, opinion_args = parse_args()
+    load_dotenv()
+
+    # 인덱스/매핑/청크 색인을 미리 로드
+    t0 = time.perf_counter()
+    get_retriever_service(opinion_args)
+    print(f"[warmup] retriever loaded in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    server = HousingDaemon(args.socket_path, opinion_args, max_concurrency=args.max_concurrency)
+    # SIGTERM도 Ctrl+C와 같이 정리 후 종료 (소켓 파일 제거)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"[listen] {args.socket_path} (pid= {os.getpid()}, max_concurrency= {args.max_concurrency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,33 +8,52 @@ retriever 결과를 바탕으로 주거 전문가 의견서 JSON 생성
 - 내부 질의(query)를 만들고 retriever 호출
 - 검색 근거를 GPT 프롬프트에 넣어 의견서 생성
 - 스키마 정규화/보정 후 UI에서 사용할 JSON 출력
+
+재사용
+- run_housing_opinion(args, user_profile): CLI 출력과 같은 dict 반환 (housing_daemon이 요청마다 호출)
+- run_from_profile(user_profile): 기본 옵션으로 프로세스 내 실행 (데몬이 없을 때 housing_adapter가 사용)
 """
 
 from __future__ import annotations
 
 import argparse
 from datetime import date
+import functools
 import json
 import os
 from pathlib import Path
-from types import SimpleNamespace
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
 from openai import OpenAI
 
 from src.housing_agent.pipeline.retriever import (
     DEFAULT_CHUNK_PATH,
+    DEFAULT_ELIGIBILITY_INDEX_PATH,
     DEFAULT_INDEX_LOG_PATH,
     DEFAULT_INDEX_PATH,
     DEFAULT_MAPPING_PATH,
     DEFAULT_METADATA_PATH,
+    DEFAULT_QUERY_CACHE_DIR,
     DEFAULT_SECTION_WEIGHTS,
-    run_retrieval,
+    GROUP_BY_MODES,
+    HYDRATE_FIELDS,
+    POLICY_AGGREGATIONS,
+    RetrievalFilters,
+    RetrievalOptions,
+    fuse_result_lists,
+    get_retriever_service,
 )
 
 
 ROOT = Path(__file__).resolve().parents[3]
+CONTEXT_TEXT_LIMIT = 900 # 프롬프트 근거 블록의 청크당 본문 길이
+
+# 주거 형태 선호별 하위 질의 (상관없음/기타는 하위 질의 없음)
+RENT_TYPE_QUERIES: Dict[str, str] = {
+    "월세": "청년 월세 지원 임대료 주거비 보조금",
+    "전세": "청년 전세자금 대출 보증금 지원 금리",
+}
 
 # gpt에게 요청하는 프롬프트
 SYSTEM_PROMPT = """너는 청년 주거 정책 상담 어시스턴트다.
@@ -43,7 +62,7 @@ SYSTEM_PROMPT = """너는 청년 주거 정책 상담 어시스턴트다.
 반드시 지정된 JSON 스키마로만 출력한다.
 """
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
 
     """
     - 폼 입력값(user_profile)을 직접 받을 수 있도록 함
@@ -78,13 +97,21 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--mapping", type=Path, default=DEFAULT_MAPPING_PATH, help="벡터 매핑 jsonl")
     parser.add_argument("--chunks", type=Path, default=DEFAULT_CHUNK_PATH, help="원본 청크 jsonl")
     parser.add_argument("--metadata", type=Path, default=DEFAULT_METADATA_PATH, help="정책 metadata json")
+    parser.add_argument("--eligibility-index", type=Path, default=DEFAULT_ELIGIBILITY_INDEX_PATH, help="나이/지역 필터 인덱스 json")
     parser.add_argument("--section-weights", type=str, default=DEFAULT_SECTION_WEIGHTS, help="섹션 기본 가중치")
     parser.add_argument("--disable-dynamic-section-weight", action="store_true", help="동적 섹션 가중치 비활성화")
     parser.add_argument("--disable-dynamic-category-weight", action="store_true", help="동적 카테고리 가중치 비활성화")
     parser.add_argument("--disable-text-dedup", action="store_true", help="텍스트 dedup 비활성화")
-    parser.add_argument("--text-dedup-min-len", type=int, default=80, help="텍스트 dedup 최소 길이")
+    parser.add_argument("--text-dedup-min-len", type=int, default=80, help="텍스트 dedup 최소 길이 (근사 중복 군집이 있는 매핑은 빌드 시점 값 사용)")
     parser.add_argument("--preview-chars", type=int, default=300, help="retriever 미리보기 길이")
     parser.add_argument("--query-model", type=str, default="", help="질의 임베딩 모델(기본: index log)")
+    parser.add_argument("--query-cache-dir", type=Path, default=DEFAULT_QUERY_CACHE_DIR, help="질의 임베딩 디스크 캐시")
+    parser.add_argument("--disable-query-cache", action="store_true", help="질의 임베딩 캐시 비활성화")
+    parser.add_argument("--disable-result-cache", action="store_true", help="검색 결과 캐시 비활성화")
+    parser.add_argument("--group-by", type=str, choices=GROUP_BY_MODES, default="chunk", help="검색 결과 단위(policy면 정책별 근거 묶음)")
+    parser.add_argument("--policy-agg", type=str, choices=POLICY_AGGREGATIONS, default="max", help="정책 점수 집계 방식")
+    parser.add_argument("--chunks-per-policy", type=int, default=2, help="정책별 근거 청크 수")
+    parser.add_argument("--disable-multi-query", action="store_true", help="프로필 하위 질의(자격/혜택/주거 형태) 확장 비활성화")
 
     # 생성 모델 옵션
     parser.add_argument("--chat-model", type=str, default="gpt-4o-mini", help="생성 모델")
@@ -92,7 +119,11 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--api-key-env", type=str, default="OPENAI_API_KEY", help="API 키 환경변수명")
     parser.add_argument("--debug-verbose", action="store_true", help="retriever 원문(text 포함)까지 출력")
     parser.add_argument("--json", action="store_true", help="JSON으로 출력")
-    return parser.parse_args()
+    return parser.parse_args(argv)
+
+
+# 메타데이터 경로/수정시각별 source_url 맵 (상주 프로세스에서 요청마다 메타데이터 json을 다시 읽지 않음)
+_SOURCE_MAPS: Dict[tuple, Dict[str, str]] = {}
 
 
 def load_source_map(path: Path) -> Dict[str, str]:
@@ -101,6 +132,10 @@ def load_source_map(path: Path) -> Dict[str, str]:
     
     if not path.exists():
         return {}
+    key = (str(path.resolve()), path.stat().st_mtime_ns)
+    cached = _SOURCE_MAPS.get(key)
+    if cached is not None:
+        return cached
     with open(path, "r", encoding="utf-8") as f:
         raw = json.load(f)
     out: Dict[str, str] = {}
@@ -108,6 +143,7 @@ def load_source_map(path: Path) -> Dict[str, str]:
         url = ((meta or {}).get("source_url") or "").strip()
         if url:
             out[str(policy_id)] = url
+    _SOURCE_MAPS[key] = out
     return out
 
 
@@ -127,7 +163,7 @@ def load_user_profile(path: Path) -> Dict[str, Any]:
     return profile
 
 
-def build_profile(args: argparse.Namespace) -> Dict[str, Any]:
+def build_profile(args: argparse.Namespace, user_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
 
     # CLI 입력값으로 기본 프로필 생성
     profile: Dict[str, Any] = {
@@ -148,11 +184,17 @@ def build_profile(args: argparse.Namespace) -> Dict[str, Any]:
         "banks": [x.strip() for x in args.banks.split(",") if x.strip()],
     }
 
-    # user_profile 파일이 주어지면 해당 값 우선 적용
-    if args.user_profile_path is not None:
+    # user_profile(dict 또는 파일)이 주어지면 해당 값 우선 적용
+    loaded: Optional[Dict[str, Any]] = None
+    if user_profile is not None:
+        if not isinstance(user_profile, dict):
+            raise ValueError("user_profile 형식이 dict가 아닙니다.")
+        loaded = user_profile
+    elif args.user_profile_path is not None:
         if not args.user_profile_path.exists():
             raise FileNotFoundError(f"user_profile 파일이 없습니다: {args.user_profile_path}")
         loaded = load_user_profile(args.user_profile_path)
+    if loaded is not None:
         profile.update({k: v for k, v in loaded.items() if k != "region"})
         if isinstance(loaded.get("region"), dict):
             profile["region"] = {
@@ -212,7 +254,46 @@ def build_auto_query(profile: Dict[str, Any]) -> str:
     return f"{prefix} 조건에 맞는 청년 주거 지원 정책 추천"
 
 
-def build_context_text(results: List[Dict[str, Any]], source_map: Dict[str, str], text_limit: int = 900) -> str:
+def build_sub_queries(profile: Dict[str, Any]) -> List[str]:
+
+    """
+    프로필 -> 의도별 하위 질의 목록 (첫 번째는 build_auto_query 전체 문장)
+    - 자격: 나이/가구 유형/지역/소득 + 자격 요건 키워드 (ELIGIBILITY 섹션 의도)
+    - 혜택/예산: 월 주거예산 + 지원 금액 키워드 (BENEFIT 섹션 의도)
+    - 주거 형태: 월세/전세 선호별 지원 유형 키워드 (카테고리 의도)
+    - 한 문장에 여러 의도가 섞여 META 청크만 검색되는 문제를 하위 질의별 순위 결합(RRF)으로 보완
+    """
+
+    auto_query = build_auto_query(profile)
+    age = profile.get("age")
+    region = profile.get("region") or {}
+    household_type = str(profile.get("household_type") or "").strip()
+    income = profile.get("monthly_income_m")
+    budget = profile.get("monthly_housing_budget_m")
+    rent_type = str(profile.get("rent_type") or "").strip()
+
+    eligibility: List[str] = []
+    if isinstance(age, int) and age > 0:
+        eligibility.append(f"{age}세")
+    if household_type and household_type != "기타":
+        eligibility.append(household_type)
+    eligibility.extend(str(region.get(k) or "").strip() for k in ("city", "gu") if str(region.get(k) or "").strip())
+    if isinstance(income, int) and income >= 0:
+        eligibility.append(f"월소득 {income}만원")
+    eligibility.append("무주택 청년 주거 지원 자격 요건 대상")
+
+    benefit: List[str] = []
+    if isinstance(budget, int) and budget >= 0:
+        benefit.append(f"월 주거예산 {budget}만원")
+    benefit.append("청년 주거 지원 혜택 지원금 금액 한도")
+
+    queries = [auto_query, " ".join(eligibility), " ".join(benefit)]
+    if rent_type in RENT_TYPE_QUERIES:
+        queries.append(RENT_TYPE_QUERIES[rent_type])
+    return list(dict.fromkeys(queries))
+
+
+def build_context_text(results: List[Dict[str, Any]], source_map: Dict[str, str], text_limit: int = CONTEXT_TEXT_LIMIT) -> str:
 
     """
     GPT에 전달할 검색 근거 텍스트 블록 생성
@@ -239,6 +320,39 @@ def build_context_text(results: List[Dict[str, Any]], source_map: Dict[str, str]
     return "\n".join(lines).strip()
 
 
+def build_policy_context_text(policies: List[Dict[str, Any]], source_map: Dict[str, str], text_limit: int = CONTEXT_TEXT_LIMIT) -> str:
+
+    """
+    group_by=policy 검색 결과용 근거 텍스트 블록
+    - 정책 헤더(policy_id/정책명/source_url)는 정책당 1번만 쓰고 아래에 근거 청크를 나열
+    - 같은 정책의 청크가 여러 번 나와도 메타 정보가 반복되지 않아 프롬프트 토큰이 줄어듦
+    """
+
+    lines: List[str] = []
+    for i, policy in enumerate(policies, start=1):
+        policy_id = str(policy.get("policy_id") or "")
+        source_url = source_map.get(policy_id, "")
+        lines.append(
+            f"[{i}] policy_id={policy_id} title={policy.get('title')} "
+            f"policy_score={policy.get('policy_score')} hits={policy.get('hit_count')}"
+        )
+        if source_url:
+            lines.append(f"source_url={source_url}")
+        for row in policy.get("chunks") or []:
+            text = str(row.get("text", "")).strip()
+            if len(text) > text_limit:
+                text = text[:text_limit].rstrip() + " ..."
+            lines.append(f"- chunk_id={row.get('chunk_id')} section={row.get('section')} score={row.get('score')}")
+            lines.append(text)
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+# 정책 단위 결과 -> 청크 행 목록 (정책 순위 순, 정책 내 근거 순)
+def flatten_policy_results(policies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [row for policy in policies for row in policy.get("chunks") or []]
+
+
 def build_user_prompt(query: str, profile: Dict[str, Any], context_text: str) -> str:
 
     """
@@ -520,66 +634,93 @@ def build_retrieval_summary(results: List[Dict[str, Any]], retrieval_debug: Dict
     }
 
 
-def main() -> None:
+@functools.lru_cache(maxsize=4)
+def get_chat_client(api_key: str) -> OpenAI:
+    # 생성 모델 클라이언트 재사용 (상주 프로세스에서 요청마다 HTTP 연결 풀을 새로 만들지 않음)
+    return OpenAI(api_key=api_key)
+
+
+def run_housing_opinion(args: argparse.Namespace, user_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
 
     """
-    1) 입력/프로필 준비
-    2) retriever 호출
-    3) GPT 생성 + 스키마 정규화
-    4) JSON 출력
+    프로필 1건 -> 의견서 결과 dict (--json 출력과 같은 형태)
+    - user_profile을 넘기면 --user-profile-path 파일 대신 사용
+    - retriever 서비스/메타데이터는 프로세스 내에서 재사용되므로 같은 프로세스에서 반복 호출하면 로딩 비용 없음
+    - debug_verbose면 retrieval_debug/retrieved 포함
     """
 
-    args = parse_args()
-    load_dotenv()
-
     api_key = os.getenv(args.api_key_env, "").strip()
     if not api_key:
         raise EnvironmentError(f"{args.api_key_env} 환경변수가 비어 있습니다.")
 
-    profile = build_profile(args)
+    profile = build_profile(args, user_profile)
     query = args.query.strip() if isinstance(args.query, str) else ""
-    if not query:
+    auto_query = not query
+    if auto_query:
         query = build_auto_query(profile)
 
-    region = profile.get("region") or {}
-    region_city = str(region.get("city") or "")
-    region_gu = str(region.get("gu") or "")
-    age = profile.get("age")
-    age_num = int(age) if isinstance(age, int) else -1
-
-    # Namespace 재구성
-    retriever_args = SimpleNamespace(
-        query=query,
-        top_k=args.top_k,
-        search_k=args.search_k,
-        query_model=args.query_model,
-        api_key_env=args.api_key_env,
-        index=args.index,
-        index_log=args.index_log,
-        mapping=args.mapping,
-        chunks=args.chunks,
-        metadata=args.metadata,
-        age=age_num,
-        region_sido=region_city,
-        region_sigungu=region_gu,
-        disable_section_weight=False,
-        section_weights=args.section_weights,
-        disable_dynamic_section_weight=args.disable_dynamic_section_weight,
-        disable_dynamic_category_weight=args.disable_dynamic_category_weight,
-        disable_text_dedup=args.disable_text_dedup,
-        text_dedup_min_len=args.text_dedup_min_len,
+    # 프로세스 내에서 로드된 retriever 서비스 재사용 (인덱스/청크는 최초 1회만 로드)
+    # 나이/지역 + 소득/자산/가구 유형/주거 형태 조건으로 자격이 안 되는 정책은 검색 전에 제외
+    # 검색은 참조(vector_idx/점수)만 받고, 본문은 프롬프트에 들어갈 길이까지만 청크 저장소에서 읽음
+    # (+1자는 build_context_text가 잘림 여부를 판단하기 위함)
+    service = get_retriever_service(args)
+    options = RetrievalOptions.from_args(args)
+    options.return_text = False
+    filters = RetrievalFilters.from_profile(profile)
+
+    # 자동 질의면 의도별 하위 질의로 확장 : 임베딩 요청 1회 + 배치 검색 1회 후 RRF 결합
+    # (하위 질의마다 top_k의 2배까지 받아 결합 후보를 넉넉히 둠)
+    sub_queries = [query]
+    if auto_query and not args.disable_multi_query:
+        sub_queries = build_sub_queries(profile)
+    if len(sub_queries) > 1:
+        payloads = service.search_batch(
+            sub_queries,
+            [filters] * len(sub_queries),
+            top_k=args.top_k * 2,
+            options=options,
+        )
+        fused = fuse_result_lists([p["results"] for p in payloads], top_k=args.top_k, rrf_k=options.rrf_k)
+        retrieval_payload = {
+            "query": query,
+            "results": fused,
+            "debug": {
+                **payloads[0]["debug"],
+                "dedup_skipped": sum(int(p["debug"].get("dedup_skipped") or 0) for p in payloads),
+                "result_count": len(fused),
+                "multi_query": {
+                    "queries": sub_queries,
+                    "result_counts": [len(p["results"]) for p in payloads],
+                    "rrf_k": options.rrf_k,
+                },
+            },
+        }
+    else:
+        retrieval_payload = service.search(
+            query,
+            filters=filters,
+            top_k=args.top_k,
+            options=options,
+        )
+    # 프롬프트 근거 블록은 CONTEXT_TEXT_LIMIT까지만 쓰므로 본문은 그만큼만(+1: 잘림 표시 판단용) 읽음
+    # debug_verbose면 retrieved에 원문 전체를 남기도록 본문 전체를 읽음 (근거 블록은 build_*_context_text에서 잘림)
+    results: List[Dict[str, Any]] = service.hydrate(
+        retrieval_payload["results"],
+        fields=HYDRATE_FIELDS,
+        max_chars=0 if args.debug_verbose else CONTEXT_TEXT_LIMIT + 1,
         preview_chars=args.preview_chars,
-        json=False,
     )
-    retrieval_payload = run_retrieval(retriever_args)
-    results: List[Dict[str, Any]] = retrieval_payload["results"]
-
     source_map = load_source_map(args.metadata)
-    context_text = build_context_text(results, source_map=source_map)
+    if args.group_by == "policy":
+        # 정책별로 묶인 근거를 그대로 프롬프트에 넣고, fallback/요약은 청크 행 기준으로 사용
+        context_text = build_policy_context_text(results, source_map=source_map)
+        results = flatten_policy_results(results)
+    else:
+        context_text = build_context_text(results, source_map=source_map)
     user_prompt = build_user_prompt(query, profile, context_text)
 
     # 생성 : retriever 근거를 user_prompt에 넣고 gpt-4o-mini 호출
-    client = OpenAI(api_key=api_key)
+    client = get_chat_client(api_key)
     resp = client.chat.completions.create(
         model=args.chat_model,
         temperature=args.temperature,
@@ -599,25 +740,48 @@ def main() -> None:
         housing_memo = fallback_memo
     housing_memo = attach_source_url_to_evidence(housing_memo, source_map=source_map)
 
+    retrieval_debug = retrieval_payload.get("debug", {})
+    out = {
+        "query": query,
+        "user_profile": profile,
+        "retrieval_summary": build_retrieval_summary(
+            results=results,
+            retrieval_debug=retrieval_debug,
+            source_map=source_map,
+        ),
+        "housing_memo": housing_memo,
+    }
+    if args.debug_verbose:
+        out["retrieval_debug"] = retrieval_debug
+        out["retrieved"] = results
+    return out
+
+
+def run_from_profile(user_profile: Dict[str, Any], argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    # 기본 옵션(+argv)으로 프로세스 내 실행 (CLI를 새 프로세스로 띄우지 않는 호출자용)
+    args = parse_args(argv or [])
+    load_dotenv()
+    return run_housing_opinion(args, user_profile=user_profile)
+
+
+def main() -> None:
+
+    """
+    1) 입력/프로필 준비
+    2) retriever 호출
+    3) GPT 생성 + 스키마 정규화
+    4) JSON 출력
+    """
+
+    args = parse_args()
+    load_dotenv()
+
+    out = run_housing_opinion(args)
     if args.json:
-        retrieval_debug = retrieval_payload.get("debug", {})
-        out = {
-            "query": query,
-            "user_profile": profile,
-            "retrieval_summary": build_retrieval_summary(
-                results=results,
-                retrieval_debug=retrieval_debug,
-                source_map=source_map,
-            ),
-            "housing_memo": housing_memo,
-        }
-        if args.debug_verbose:
-            out["retrieval_debug"] = retrieval_debug
-            out["retrieved"] = results
         print(json.dumps(out, ensure_ascii=False, indent=2))
         return
 
-    print(json.dumps(housing_memo, ensure_ascii=False, indent=2))
+    print(json.dumps(out["housing_memo"], ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+# 임베딩 매핑(manifest) 열 저장 코드
+
+"""
+vector_idx -> 청크 메타 매핑을 vector_idx 정렬 열 배열로 저장
+
+열 (길이 = 최대 vector_idx + 1, 값 -1 = 없음/None)
+- valid: bool, 매핑 행이 있는 vector_idx
+- policy_codes: int32 -> policy_table
+- chunk_codes: int32 -> chunk_table (chunk_id)
+- section_codes / category_codes: int8 -> section_table / category_table (원본 표기 그대로)
+- title_codes: int32 -> title_table
+- dup_group_ids: int64 (근사 중복 군집, 없으면 -1)
+- has_dup_group: 모든 행에 dup_group_id가 있었는지 (0/1)
+
+저장 (JSONL 매핑 옆 {stem}.manifest/ 디렉터리)
+- {열 이름}.npy : 열 1개당 파일 1개, 문자열 테이블은 고정폭 유니코드 배열
+- meta.json     : 열 목록 + 원본 JSONL 크기/수정시각 (원본이 바뀌면 JSONL에서 다시 만듦)
+- 로딩은 np.load(mmap_mode="r")라 시작 시 배열을 읽지 않고, 접근한 페이지만 올라옴
+- 행별 Python 객체(dict/list)를 만들지 않음 (문자열은 결과 행에서만 decode)
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+STRING_COLUMNS = ("policy", "chunk", "section", "category", "title")
+CODE_DTYPES = {
+    "policy": np.int32,
+    "chunk": np.int32,
+    "section": np.int8,
+    "category": np.int8,
+    "title": np.int32,
+}
+ROW_FIELDS = {
+    "policy": "policy_id",
+    "chunk": "chunk_id",
+    "section": "section",
+    "category": "category",
+    "title": "title",
+}
+
+
+def build_manifest_columns(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+
+    # 매핑 dict 행 목록 -> 열 배열 (문자열은 등장 순서대로 코드 부여)
+    vidx_rows = [(int(r["vector_idx"]), r) for r in rows if r.get("vector_idx") is not None]
+    size = max((v for v, _ in vidx_rows), default=-1) + 1
+
+    out: Dict[str, np.ndarray] = {"valid": np.zeros(size, dtype=bool)}
+    tables: Dict[str, Dict[str, int]] = {name: {} for name in STRING_COLUMNS}
+    for name in STRING_COLUMNS:
+        out[f"{name}_codes"] = np.full(size, -1, dtype=CODE_DTYPES[name])
+    out["dup_group_ids"] = np.full(size, -1, dtype=np.int64)
+
+    has_dup_group = bool(vidx_rows)
+    for vidx, row in vidx_rows:
+        out["valid"][vidx] = True
+        for name in STRING_COLUMNS:
+            value = row.get(ROW_FIELDS[name])
+            if value is None:
+                continue
+            table = tables[name]
+            out[f"{name}_codes"][vidx] = table.setdefault(str(value), len(table))
+        dup = row.get("dup_group_id")
+        if dup is None:
+            has_dup_group = False
+        else:
+            out["dup_group_ids"][vidx] = int(dup)
+
+    for name in STRING_COLUMNS:
+        limit = np.iinfo(CODE_DTYPES[name]).max
+        if len(tables[name]) > limit:
+            raise ValueError(f"{name} 종류가 {limit}개를 넘어 manifest 코드로 저장할 수 없습니다.")
+        out[f"{name}_table"] = np.asarray(list(tables[name].keys()), dtype=str)
+    out["has_dup_group"] = np.asarray(int(has_dup_group), dtype=np.int8)
+    return out
+
+
+def _source_stamp(mapping_path: Path) -> Dict[str, int]:
+    st = mapping_path.stat()
+    return {"source_size": int(st.st_size), "source_mtime_ns": int(st.st_mtime_ns)}
+
+
+def save_manifest_columns(path: Path, columns: Dict[str, np.ndarray], mapping_path: Path) -> None:
+
+    # 열마다 .npy 1개, meta.json은 마지막에 써서 열 파일이 모두 있을 때만 최신으로 인식
+    path.mkdir(parents=True, exist_ok=True)
+    for name, arr in columns.items():
+        np.save(path / f"{name}.npy", arr)
+    meta = {**_source_stamp(mapping_path), "columns": sorted(columns.keys())}
+    with open(path / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def manifest_is_fresh(path: Path, mapping_path: Path) -> bool:
+    # 열 manifest가 있고 원본 JSONL 매핑과 크기/수정시각이 같은지
+    meta_path = path / "meta.json"
+    if not meta_path.exists() or not mapping_path.exists():
+        return False
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return all(meta.get(k) == v for k, v in _source_stamp(mapping_path).items())
+
+
+def load_manifest_columns(path: Path) -> Dict[str, np.ndarray]:
+    meta_path = path / "meta.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"manifest 파일이 없습니다: {meta_path}")
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in meta["columns"]}
+
+
+# JSONL 매핑 옆 열 manifest 디렉터리 (policies_v2_embedding_mapping.jsonl -> .manifest/)
+def manifest_path_for(mapping_path: Path) -> Path:
+    return mapping_path.with_suffix(".manifest")
+
+
+def decode(columns: Dict[str, np.ndarray], name: str, vidx: int) -> Optional[str]:
+    # vector_idx 1개 행의 문자열 값 복원 (반환 결과 행에만 사용)
+    code = int(columns[f"{name}_codes"][vidx])
+    return None if code < 0 else str(columns[f"{name}_table"][code])
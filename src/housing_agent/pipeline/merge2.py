@@ -18,9 +18,10 @@ from src.housing_agent.normalize.common import (
     dedup_texts,
     detect_no_house,
     extract_age_range,
-    extract_income_max,
+    extract_income_limit,
     extract_regions,
 )
+from src.housing_agent.normalize.keyword_matcher import KeywordMatcher
 
 IN_PATH = ROOT / "data" / "processed" / "policies_v1.json"
 OUT_PATH = ROOT / "data" / "processed" / "policies_v2.json"
@@ -72,17 +73,16 @@ BENEFIT_KW = [
 ]
 PHONE_RE = r"\d{2,4}-\d{3,4}(?:-\d{4})?"
 
-
-def score_by_keywords(text: str, keywords: List[str]) -> int:
-    t = text or ""
-    return sum(1 for k in keywords if k in t)
+# 세 키워드 사전을 한 번의 스캔으로 집계
+LINE_MATCHER = KeywordMatcher({"apply": APPLY_KW, "eligibility": ELIGIBILITY_KW, "benefit": BENEFIT_KW})
 
 
 def line_scores(text: str) -> Tuple[int, int, int]:
     t = text or ""
-    apply_score = score_by_keywords(t, APPLY_KW)
-    eligibility_score = score_by_keywords(t, ELIGIBILITY_KW)
-    benefit_score = score_by_keywords(t, BENEFIT_KW)
+    counts = LINE_MATCHER.counts(t)
+    apply_score = counts["apply"]
+    eligibility_score = counts["eligibility"]
+    benefit_score = counts["benefit"]
 
     if re.search(r"(1순위|2순위|3순위|4순위|5순위|우선|기준\s*중위소득|소득기준|무주택|세대주)", t):
         eligibility_score += 2
@@ -261,7 +261,7 @@ def recompute_eligibility_struct(policy: Dict[str, Any]) -> Dict[str, Any]:
     region_field = policy.get("region") or ""
 
     age_min, age_max = extract_age_range(all_text)
-    income_max_m = extract_income_max(all_text)
+    income_max_m, income_period = extract_income_limit(all_text)
     requires_no_house = detect_no_house(all_text)
 
     primary_regions = extract_regions(region_field)
@@ -277,6 +277,7 @@ def recompute_eligibility_struct(policy: Dict[str, Any]) -> Dict[str, Any]:
         "age_min": age_min,
         "age_max": age_max,
         "income_max_m": income_max_m,
+        "income_period": income_period,
         "asset_max_m": old_struct.get("asset_max_m"),
         "household_types": old_struct.get("household_types") or [],
         "requires_no_house": requires_no_house,
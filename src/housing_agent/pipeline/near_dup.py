@@ -0,0 +1,104 @@
+# 청크 근사 중복(near-duplicate) 군집 코드
+
+"""
+MinHash + LSH banding으로 말뭉치 전체의 근사 중복 청크를 빌드 시점에 묶음
+
+흐름
+- 텍스트 정규화(소문자, 특수문자/공백 제거) 후 문자 shingle 집합 생성
+- shingle 해시에 대해 NUM_PERM개 해시 함수의 최솟값 = MinHash 서명
+- 서명을 BANDS개 band로 나눠 같은 band 값을 가진 청크끼리 후보쌍
+- 후보쌍의 실제 Jaccard 유사도가 threshold 이상이면 같은 군집 (union-find)
+
+출력
+- 청크별 dup_group_id (군집 내 가장 앞 ordinal, 군집이 없으면 자기 자신)
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Dict, List, Set
+
+import numpy as np
+
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+JACCARD_THRESHOLD = 0.8
+MIN_TEXT_LEN = 80
+SEED = 20240601
+
+
+# retriever.build_text_key와 같은 기준으로 정규화
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w가-힣]+", "", (text or "").strip().lower())
+
+
+def _shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i : i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+
+def _find(parent: List[int], x: int) -> int:
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def near_duplicate_groups(
+    texts: List[str],
+    threshold: float = JACCARD_THRESHOLD,
+    min_len: int = MIN_TEXT_LEN,
+) -> List[int]:
+
+    """
+    texts 순서(ordinal) 기준 dup_group_id 리스트 반환
+    - min_len 미만(정규화 전 기준) 짧은 청크는 군집에 넣지 않음
+    """
+
+    n = len(texts)
+    parent = list(range(n))
+    if NUM_PERM % BANDS != 0:
+        raise ValueError("NUM_PERM은 BANDS로 나누어 떨어져야 합니다.")
+    rows_per_band = NUM_PERM // BANDS
+
+    # multiply-shift 해시 계열 (uint64 overflow를 mod 2^64로 사용)
+    rng = np.random.default_rng(SEED)
+    a = rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+
+    shingle_sets: Dict[int, Set[int]] = {}
+    buckets: Dict[tuple, List[int]] = {}
+    with np.errstate(over="ignore"):
+        for i, text in enumerate(texts):
+            if len((text or "").strip()) < min_len:
+                continue
+            norm = _normalize(text)
+            if not norm:
+                continue
+            sh = _shingles(norm)
+            shingle_sets[i] = sh
+            x = np.fromiter(sh, dtype=np.uint64, count=len(sh))
+            signature = ((np.outer(x, a) + b) >> np.uint64(32)).min(axis=0)
+            for band in range(BANDS):
+                part = signature[band * rows_per_band : (band + 1) * rows_per_band]
+                buckets.setdefault((band, part.tobytes()), []).append(i)
+
+    # 같은 bucket 후보쌍 검증 (이미 같은 군집이면 건너뜀)
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for pos, i in enumerate(members):
+            for j in members[pos + 1 :]:
+                r1, r2 = _find(parent, i), _find(parent, j)
+                if r1 == r2:
+                    continue
+                s1, s2 = shingle_sets[i], shingle_sets[j]
+                jaccard = len(s1 & s2) / max(1, len(s1 | s2))
+                if jaccard >= threshold:
+                    parent[max(r1, r2)] = min(r1, r2)
+
+    return [_find(parent, i) for i in range(n)]
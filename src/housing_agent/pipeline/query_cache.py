@@ -0,0 +1,256 @@
+# 질의 임베딩 캐시 코드
+
+"""
+(임베딩 모델, 정규화된 질의) -> 질의 임베딩 벡터 캐시
+
+구성
+- 1차: 프로세스 메모리 LRU (크기 제한)
+- 2차: 디스크 저장소 (모델별 float32 행렬 파일 + key 인덱스 jsonl)
+  - 행렬은 np.memmap으로 열어 필요한 행만 읽음
+  - 새 벡터는 행렬 파일 끝에 append 후 key 라인을 기록 (중간 종료 시 key 없는 행은 무시)
+  - append는 모델별 lock 파일(fcntl.flock)로 직렬화 : 데몬/CLI/query_precompute가 같은 저장소에 동시에 써도
+    행 번호와 key가 어긋나지 않음
+  - 메모리에서 못 찾으면 key 파일이 늘었는지 확인해 다른 프로세스가 추가한 key를 이어 읽음
+
+같은 질의가 반복되면 OpenAI 임베딩 호출 없이 바로 벡터 반환
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# 캐시 key용 질의 정규화 : 유니코드 NFC + 앞뒤 공백 제거 + 연속 공백 1칸
+def normalize_query_text(query: str) -> str:
+    q = unicodedata.normalize("NFC", query or "")
+    return re.sub(r"\s+", " ", q).strip()
+
+
+def _model_slug(model: str) -> str:
+    return re.sub(r"[^0-9A-Za-z._-]+", "_", model or "default")
+
+
+class _DiskStore:
+
+    # 모델 1개에 대한 디스크 저장소 (행렬 파일 + key 인덱스)
+
+    def __init__(self, store_dir: Path, model: str) -> None:
+        slug = _model_slug(model)
+        self.matrix_path = store_dir / f"{slug}.f32"
+        self.keys_path = store_dir / f"{slug}.keys.jsonl"
+        self.lock_path = store_dir / f"{slug}.lock"
+        self.dim: Optional[int] = None
+        self.rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._mmap: Optional[np.memmap] = None
+        self._mmap_rows = 0
+        self._refresh()
+
+    def _refresh(self) -> None:
+        # key 파일에서 마지막으로 읽은 위치 이후의 완성된 줄만 읽음 (기록 중인 마지막 줄은 다음에 다시 읽음)
+        if not self.keys_path.exists():
+            return
+        if self.keys_path.stat().st_size <= self._keys_offset:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        self._keys_offset += end
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # 기록 도중 끊긴 줄은 무시
+                continue
+            self.dim = int(row["dim"])
+            self.rows[str(row["key"])] = int(row["row"])
+
+    def _matrix_rows(self) -> int:
+        if not self.dim or not self.matrix_path.exists():
+            return 0
+        return self.matrix_path.stat().st_size // (int(self.dim) * 4)
+
+    def _matrix(self, need_rows: int) -> Optional[np.memmap]:
+        if self._mmap is None or self._mmap_rows < need_rows:
+            n_rows = self._matrix_rows()
+            if n_rows < need_rows:
+                # key는 있는데 행렬 행이 없는 경우(부분 기록)
+                return None
+            self._mmap = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(n_rows, int(self.dim)))
+            self._mmap_rows = n_rows
+        return self._mmap
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self.rows.get(key)
+        if row is None:
+            # 다른 프로세스가 추가한 key가 있으면 이어 읽고 다시 조회
+            self._refresh()
+            row = self.rows.get(key)
+        if row is None or not self.dim:
+            return None
+        matrix = self._matrix(row + 1)
+        return None if matrix is None else np.array(matrix[row], dtype=np.float32)
+
+    def contains(self, key: str) -> bool:
+        if key not in self.rows:
+            self._refresh()
+        return key in self.rows
+
+    def put_many(self, keys: List[str], mat: np.ndarray) -> int:
+
+        """
+        여러 벡터를 행렬 파일에 한 번에 append 후 key 라인 기록, 새로 적재한 개수 반환
+        - 프로세스 간 배타 lock 안에서 key를 다시 읽고, 이미 있는 key는 건너뛰며,
+          시작 행 번호는 lock 안에서 잰 행렬 파일 크기로 정함
+        """
+
+        mat = np.ascontiguousarray(mat, dtype=np.float32).reshape(len(keys), -1)
+        if not keys:
+            return 0
+        self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                if self.dim is None:
+                    self.dim = int(mat.shape[1])
+                if mat.shape[1] != self.dim:
+                    raise ValueError(f"질의 캐시 차원 불일치: {mat.shape[1]} != {self.dim}")
+                fresh = [i for i, key in enumerate(keys) if key not in self.rows]
+                if not fresh:
+                    return 0
+                start = self._matrix_rows()
+                with open(self.matrix_path, "ab") as f:
+                    # 이전 기록이 행 중간에서 끊겼으면 행 경계까지 채워 행 번호를 맞춤
+                    partial = f.tell() - start * self.dim * 4
+                    if partial:
+                        f.write(b"\0" * (self.dim * 4 - partial))
+                        start += 1
+                    f.write(mat[fresh].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                lines = "".join(
+                    json.dumps({"key": keys[i], "row": start + n, "dim": self.dim}, ensure_ascii=False) + "\n"
+                    for n, i in enumerate(fresh)
+                )
+                with open(self.keys_path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+                # 방금 쓴 줄까지 읽어 self.rows와 읽은 위치를 함께 갱신
+                self._refresh()
+                return len(fresh)
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+class QueryEmbeddingCache:
+
+    """
+    질의 임베딩 2단 캐시
+    - store_dir가 None이면 메모리 LRU만 사용
+    - stats()로 hit/miss 카운터 확인
+    """
+
+    def __init__(self, store_dir: Optional[Path] = None, max_items: int = 1024) -> None:
+        self.store_dir = Path(store_dir) if store_dir is not None else None
+        self.max_items = max(1, int(max_items))
+        self._lru: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._stores: Dict[str, _DiskStore] = {}
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _store(self, model: str) -> Optional[_DiskStore]:
+        if self.store_dir is None:
+            return None
+        store = self._stores.get(model)
+        if store is None:
+            store = _DiskStore(self.store_dir, model)
+            self._stores[model] = store
+        return store
+
+    def _remember(self, key: Tuple[str, str], vec: np.ndarray) -> None:
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def get(self, model: str, query: str) -> Optional[np.ndarray]:
+        key = (model, normalize_query_text(query))
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return vec
+
+            store = self._store(model)
+            vec = store.get(key[1]) if store is not None else None
+            if vec is not None:
+                self._remember(key, vec)
+                self.disk_hits += 1
+                return vec
+
+            self.misses += 1
+            return None
+
+    def put(self, model: str, query: str, vec: np.ndarray) -> None:
+        key = (model, normalize_query_text(query))
+        vec = np.asarray(vec, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._remember(key, vec)
+            store = self._store(model)
+            if store is not None and key[1] not in store.rows:
+                store.put_many([key[1]], vec.reshape(1, -1))
+
+    def put_many(self, model: str, queries: List[str], vectors: List[np.ndarray]) -> int:
+
+        # 디스크 저장소에 없는 질의만 한 번에 적재 (메모리 LRU는 건드리지 않음), 새로 적재한 개수 반환
+        with self._lock:
+            store = self._store(model)
+            if store is None:
+                return 0
+            fresh: Dict[str, np.ndarray] = {}
+            for query, vec in zip(queries, vectors):
+                key = normalize_query_text(query)
+                if key not in store.rows and key not in fresh:
+                    fresh[key] = np.asarray(vec, dtype=np.float32).reshape(-1)
+            if not fresh:
+                return 0
+            return store.put_many(list(fresh.keys()), np.vstack(list(fresh.values())))
+
+    def contains(self, model: str, query: str) -> bool:
+        key = normalize_query_text(query)
+        with self._lock:
+            if (model, key) in self._lru:
+                return True
+            store = self._store(model)
+            return store is not None and store.contains(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "memory_items": len(self._lru),
+                "disk_items": sum(len(s.rows) for s in self._stores.values()),
+            }
@@ -0,0 +1,186 @@
+# 자동 질의(build_auto_query) 임베딩 사전 계산 코드
+
+"""
+폼 입력 프로필 -> build_auto_query 문장 공간을 미리 임베딩해 질의 임베딩 디스크 캐시에 적재
+- housing_opinion_prompt 다중 질의 확장과 같이 프로필별 하위 질의(build_sub_queries)도 함께 적재
+
+질의 후보
+- enumerate: 나이 x 지역 x 가구 유형 x 주거 형태 x 입주 시점 x 월소득 x 월 주거예산 격자 조합
+  - 값 목록은 폼 선택지(streamlitUI)와 같은 기본값, 숫자 입력은 격자 값만 포함
+- log: 운영 로그(jsonl)에 나온 프로필/질의를 빈도순으로 상위 N개
+  - 한 줄 = user_profile dict, {"user_profile": {...}} 또는 {"query": "..."}
+
+출력
+- retriever의 QueryEmbeddingCache 디스크 저장소 (모델별 행렬 + key jsonl)
+- key는 retriever와 같은 normalize_query_text 기준이라 같은 프로필이면 검색 시 임베딩 API 호출 없음
+- 이미 저장된 질의는 건너뜀 (여러 번 실행해도 중복 적재 없음)
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.housing_agent.pipeline.housing_opinion_prompt import build_sub_queries
+from src.housing_agent.pipeline.query_cache import QueryEmbeddingCache
+from src.housing_agent.pipeline.retriever import (
+    DEFAULT_INDEX_LOG_PATH,
+    DEFAULT_QUERY_CACHE_DIR,
+    embed_queries,
+    read_json,
+)
+
+# 폼 선택지 (streamlitUI/ui_sections.py)
+HOUSEHOLD_TYPES = ("청년(1인가구)", "신혼부부", "기타")
+RENT_TYPES = ("월세", "전세", "상관없음")
+MOVE_TIMELINES = ("즉시", "1~3개월", "3~6개월", "6~12개월")
+
+
+def parse_args() -> argparse.Namespace:
+
+    parser = argparse.ArgumentParser(description="자동 질의 임베딩 사전 계산")
+    parser.add_argument("--source", type=str, choices=["enumerate", "log"], default="enumerate", help="질의 후보 출처")
+    parser.add_argument("--profile-log", type=Path, default=None, help="운영 프로필/질의 로그 jsonl (source=log)")
+    parser.add_argument("--top-n", type=int, default=5000, help="로그에서 사용할 상위 질의 수")
+    parser.add_argument("--age-min", type=int, default=18, help="나이 최소값")
+    parser.add_argument("--age-max", type=int, default=45, help="나이 최대값")
+    parser.add_argument(
+        "--regions",
+        type=str,
+        default="서울특별시:관악구",
+        help="지역 목록 (쉼표 구분, '시/도:시/군/구' 또는 '시/도')",
+    )
+    parser.add_argument("--household-types", type=str, default=",".join(HOUSEHOLD_TYPES), help="가구 유형 목록")
+    parser.add_argument("--rent-types", type=str, default=",".join(RENT_TYPES), help="주거 형태 목록")
+    parser.add_argument("--move-timelines", type=str, default=",".join(MOVE_TIMELINES), help="입주 시점 목록")
+    parser.add_argument("--incomes", type=str, default="150,200,250,300,350", help="월소득(만원) 격자")
+    parser.add_argument("--budgets", type=str, default="40,50,60,70,80", help="월 주거예산(만원) 격자")
+    parser.add_argument("--max-queries", type=int, default=50000, help="임베딩할 최대 질의 수")
+    parser.add_argument("--batch-size", type=int, default=256, help="임베딩 요청 1회당 질의 수")
+    parser.add_argument("--query-model", type=str, default="", help="질의 임베딩 모델(기본: index log)")
+    parser.add_argument("--index-log", type=Path, default=DEFAULT_INDEX_LOG_PATH, help="인덱스 로그 json 경로")
+    parser.add_argument("--query-cache-dir", type=Path, default=DEFAULT_QUERY_CACHE_DIR, help="질의 임베딩 디스크 캐시 경로")
+    parser.add_argument("--api-key-env", type=str, default="OPENAI_API_KEY", help="OpenAI API Key")
+    parser.add_argument("--dry-run", action="store_true", help="질의 수/예시만 출력 (임베딩 호출 없음)")
+    return parser.parse_args()
+
+
+def _split(raw: str) -> List[str]:
+    return [x.strip() for x in (raw or "").split(",") if x.strip()]
+
+
+def _split_ints(raw: str) -> List[int]:
+    return [int(x) for x in _split(raw)]
+
+
+def enumerate_profiles(args: argparse.Namespace) -> Iterable[Dict[str, Any]]:
+
+    # 폼 입력 격자 조합 -> 프로필 dict (build_auto_query가 쓰는 필드만)
+    regions = []
+    for raw in _split(args.regions):
+        city, _, gu = raw.partition(":")
+        regions.append({"city": city.strip() or None, "gu": gu.strip() or None})
+    grid = itertools.product(
+        range(args.age_min, args.age_max + 1),
+        regions or [{"city": None, "gu": None}],
+        _split(args.household_types),
+        _split(args.rent_types),
+        _split(args.move_timelines),
+        _split_ints(args.incomes),
+        _split_ints(args.budgets),
+    )
+    for age, region, household_type, rent_type, move_timeline, income, budget in grid:
+        yield {
+            "age": age,
+            "region": region,
+            "household_type": household_type,
+            "rent_type": rent_type,
+            "move_timeline": move_timeline,
+            "monthly_income_m": income,
+            "monthly_housing_budget_m": budget,
+        }
+
+
+def queries_from_log(path: Path, top_n: int) -> List[str]:
+
+    # 로그 줄 -> 질의 문장 빈도 집계 (프로필이면 build_sub_queries로 전체/하위 질의 변환)
+    if not path.exists():
+        raise FileNotFoundError(f"프로필 로그 파일이 없습니다: {path}")
+    counts: Counter = Counter()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"JSONL 파싱 오류: {path}:{line_no}") from exc
+            if not isinstance(row, dict):
+                continue
+            if isinstance(row.get("query"), str) and row["query"].strip():
+                counts[row["query"].strip()] += 1
+                continue
+            profile = row.get("user_profile") if isinstance(row.get("user_profile"), dict) else row
+            counts.update(build_sub_queries(profile))
+    return [q for q, _ in counts.most_common(max(0, top_n))]
+
+
+def main() -> None:
+    args = parse_args()
+    load_dotenv()
+
+    if args.batch_size <= 0:
+        raise ValueError("--batch-size는 1 이상이어야 합니다.")
+    if args.source == "log":
+        if args.profile_log is None:
+            raise ValueError("--source log에는 --profile-log가 필요합니다.")
+        queries = queries_from_log(args.profile_log, args.top_n)
+    else:
+        # 순서를 유지한 채 중복 문장 제거 (값이 문장에 드러나지 않는 조합은 같은 질의가 됨)
+        queries = list(dict.fromkeys(q for p in enumerate_profiles(args) for q in build_sub_queries(p)))
+    if len(queries) > args.max_queries:
+        print(f"[warn] 질의 {len(queries)}개 중 앞 {args.max_queries}개만 사용합니다.")
+        queries = queries[: args.max_queries]
+
+    # retriever와 같은 기준으로 모델 결정 (index log의 임베딩 모델)
+    index_log = read_json(args.index_log) if args.index_log.exists() else {}
+    model = args.query_model or index_log.get("embedding_model") or "text-embedding-3-small"
+
+    cache = QueryEmbeddingCache(store_dir=args.query_cache_dir)
+    missing = [q for q in queries if not cache.contains(model, q)]
+    print(f"[queries] total= {len(queries)}, cached= {len(queries) - len(missing)}, to_embed= {len(missing)}")
+    for q in queries[:3]:
+        print(f"  - {q}")
+    if args.dry_run or not missing:
+        return
+
+    api_key = os.getenv(args.api_key_env, "").strip()
+    if not api_key:
+        raise EnvironmentError(f"{args.api_key_env} 환경변수가 비어 있습니다.")
+    client = OpenAI(api_key=api_key)
+
+    stored = 0
+    for start in range(0, len(missing), args.batch_size):
+        batch = missing[start : start + args.batch_size]
+        stored += cache.put_many(model, batch, embed_queries(client, model, batch))
+        print(f"[embed] {min(start + len(batch), len(missing))}/{len(missing)}")
+
+    print(f"[done] model= {model}, stored= {stored}, cache_dir= {args.query_cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
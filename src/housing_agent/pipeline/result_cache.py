@@ -0,0 +1,74 @@
+# 검색 결과 캐시 코드
+
+"""
+(인덱스 버전, 질의, 필터, 옵션) -> 검색 payload(results + debug) 캐시
+
+- 프로세스 메모리 LRU (크기 제한) + 항목별 TTL
+- key에 인덱스 빌드 버전이 들어가므로 인덱스를 다시 만들면 이전 결과는 자동으로 무효
+- 반환 값은 복사본 (호출부에서 결과 dict를 수정해도 캐시에 영향 없음)
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class ResultCache:
+
+    def __init__(
+        self,
+        max_items: int = 256,
+        ttl_seconds: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_items = max(1, int(max_items))
+        self.ttl_seconds = float(ttl_seconds)
+        self._clock = clock
+        self._items: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, payload = item
+            if self.ttl_seconds > 0 and self._clock() >= expires_at:
+                del self._items[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(payload)
+
+    def put(self, key: Hashable, payload: Dict[str, Any]) -> None:
+        stored = copy.deepcopy(payload)
+        with self._lock:
+            self._items[key] = (self._clock() + self.ttl_seconds, stored)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "items": len(self._items),
+            }
@@ -14,17 +14,45 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import functools
+import heapq
+import itertools
 import json
+import math
 import os
 import re
+import sys
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set
 
 import numpy as np
 from dotenv import load_dotenv
 
 import faiss
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from src.housing_agent.normalize.keyword_matcher import KeywordMatcher
+from src.housing_agent.pipeline.chunk_store import ChunkStore
+from src.housing_agent.pipeline.chunking import build_eligibility_index, monthly_income_limit
+from src.housing_agent.pipeline.faiss_building import refine_candidates
+from src.housing_agent.pipeline.manifest import (
+    build_manifest_columns,
+    decode,
+    load_manifest_columns,
+    manifest_is_fresh,
+    manifest_path_for,
+)
+from src.housing_agent.pipeline.near_dup import MIN_TEXT_LEN
+from src.housing_agent.pipeline.query_cache import QueryEmbeddingCache, normalize_query_text
+from src.housing_agent.pipeline.result_cache import ResultCache
+from src.housing_agent.pipeline.sparse_index import SparseIndex
 
 ROOT = Path(__file__).resolve().parents[3]
 DEFAULT_INDEX_PATH = ROOT / "data" / "vectorstore" / "policies_v2_index.faiss"
@@ -32,9 +60,30 @@ DEFAULT_INDEX_LOG_PATH = ROOT / "data" / "vectorstore" / "policies_v2_index_log.
 DEFAULT_MAPPING_PATH = ROOT / "data" / "vectorstore" / "policies_v2_embedding_mapping.jsonl"
 DEFAULT_CHUNK_PATH = ROOT / "data" / "processed" / "policies_v2_chunked.jsonl"
 DEFAULT_METADATA_PATH = ROOT / "data" / "processed" / "policies_v2_metadata.json" # 정책 단위 metadata 결합
+DEFAULT_ELIGIBILITY_INDEX_PATH = ROOT / "data" / "processed" / "policies_v2_eligibility_index.json" # 나이/지역 필터 인덱스
+DEFAULT_SPARSE_INDEX_PATH = ROOT / "data" / "processed" / "policies_v2_sparse_index.npz" # 문자 n-gram BM25 인덱스
+DEFAULT_QUERY_CACHE_DIR = ROOT / "data" / "vectorstore" / "query_cache" # 질의 임베딩 디스크 캐시
 DEFAULT_SECTION_WEIGHTS = "META=0.92,ELIGIBILITY=1.10,BENEFIT=1.03,PROCESS=1.00" # 섹션별 defalut 가중치
 ALL_CATEGORIES = ("finance", "housing_supply", "housing_cost", "dormitory")
 ALL_SECTIONS = ("META", "ELIGIBILITY", "BENEFIT", "PROCESS")
+RETRIEVAL_MODES = ("dense", "sparse", "hybrid")
+GROUP_BY_MODES = ("chunk", "policy")
+SHARD_SEARCH_MODES = ("all", "intent") # 카테고리 샤드 인덱스 검색 범위 (전체 / 질의 의도 카테고리만)
+POLICY_AGGREGATIONS = ("max", "sum_top_n", "softmax") # 정책 단위 묶음 시 청크 점수 집계 방식
+HYDRATE_FIELDS = ("policy_id", "chunk_id", "section", "title", "category", "text_preview", "text") # 참조 결과에 채울 수 있는 필드
+
+# 프로필 가구 유형/주거 형태 선호 -> 정책 household_types/housing_types 매칭 키워드 (부분 문자열)
+# 표에 없는 값과 "기타"/"상관없음"은 필터 미적용
+# 정책 유형 중 표의 키워드에 걸리는 것이 하나도 없으면(예: "분양"만 있음) 판단할 수 없으므로 통과
+HOUSEHOLD_TYPE_KEYWORDS: Dict[str, tuple] = {
+    "청년(1인가구)": ("청년", "1인"),
+    "신혼부부": ("신혼",),
+}
+RENT_TYPE_KEYWORDS: Dict[str, tuple] = {
+    "월세": ("월세", "임대", "기숙사"),
+    "전세": ("전세", "임대"),
+}
+NO_PREFERENCE_VALUES = ("", "기타", "상관없음")
 
 # 질의 의도 추정을 위한 카테고리별 키워드 사전
 CATEGORY_KEYWORDS: Dict[str, List[str]] = {
@@ -74,7 +123,8 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="FAISS 기반 정책 Retriever")
     parser.add_argument("--query", type=str, required=True, help="사용자 질의")
     parser.add_argument("--top-k", type=int, default=5, help="최종 반환 개수")
-    parser.add_argument("--search-k", type=int, default=0, help="1차 검색 개수")
+    parser.add_argument("--search-k", type=int, default=0, help="1차 검색 개수(0: 필터 선택도로 자동)")
+    parser.add_argument("--max-search-rounds", type=int, default=6, help="결과 부족 시 search-k 2배 확장 최대 횟수(1: 확장 안 함)")
     parser.add_argument("--query-model", type=str, default="", help="질의 임베딩 모델")
     parser.add_argument("--api-key-env", type=str, default="OPENAI_API_KEY", help="OpenAI API Key")
     parser.add_argument("--index", type=Path, default=DEFAULT_INDEX_PATH, help="FAISS 인덱스 경로")
@@ -82,16 +132,38 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--mapping", type=Path, default=DEFAULT_MAPPING_PATH, help="vector mapping jsonl 경로")
     parser.add_argument("--chunks", type=Path, default=DEFAULT_CHUNK_PATH, help="원본 chunk jsonl 경로")
     parser.add_argument("--metadata", type=Path, default=DEFAULT_METADATA_PATH, help="정책 메타데이터 json 경로")
+    parser.add_argument("--eligibility-index", type=Path, default=DEFAULT_ELIGIBILITY_INDEX_PATH, help="나이/지역 필터 인덱스 json 경로")
     parser.add_argument("--age", type=int, default=-1, help="나이 필터(미사용: -1)")
     parser.add_argument("--region-sido", type=str, default="", help="시/도 필터")
     parser.add_argument("--region-sigungu", type=str, default="", help="시/군/구 필터")
+    parser.add_argument("--monthly-income-m", type=int, default=-1, help="월 소득(만원) 필터(미사용: -1)")
+    parser.add_argument("--assets-m", type=int, default=-1, help="보유 자산(만원) 필터(미사용: -1)")
+    parser.add_argument("--household-type", type=str, default="", help="가구 유형 필터")
+    parser.add_argument("--rent-type", type=str, default="", help="주거 형태 선호 필터")
+    parser.add_argument("--owns-house", action="store_true", help="주택 보유(무주택 요건 정책 제외)")
     parser.add_argument("--disable-section-weight", action="store_true", help="섹션 가중치 랭킹 비활성화")
     parser.add_argument("--section-weights", type=str, default=DEFAULT_SECTION_WEIGHTS, help="섹션별 가중치")
     parser.add_argument("--disable-dynamic-section-weight", action="store_true", help="질의 의도 기반 섹션 가중치 비활성화")
     parser.add_argument("--disable-dynamic-category-weight", action="store_true", help="질의 의도 기반 카테고리 가중치 비활성화")
     parser.add_argument("--disable-text-dedup", action="store_true", help="텍스트 중복 제거 비활성화")
-    parser.add_argument("--text-dedup-min-len", type=int, default=80, help="텍스트 dedup 최소 길이")
+    parser.add_argument("--text-dedup-min-len", type=int, default=80, help="텍스트 dedup 최소 길이 (근사 중복 군집이 있는 매핑은 빌드 시점 값 사용)")
     parser.add_argument("--preview-chars", type=int, default=300, help="본문 미리보기 글자 수")
+    parser.add_argument("--refs-only", dest="return_text", action="store_false", help="결과를 참조(vector_idx/청크 ordinal/점수)로만 반환")
+    parser.add_argument("--mode", type=str, choices=RETRIEVAL_MODES, default="dense", help="검색 방식(dense/sparse/hybrid)")
+    parser.add_argument("--rrf-k", type=int, default=60, help="hybrid 모드 RRF 상수")
+    parser.add_argument("--shard-search", type=str, choices=SHARD_SEARCH_MODES, default="all", help="샤드 인덱스 검색 범위")
+    parser.add_argument("--group-by", type=str, choices=GROUP_BY_MODES, default="chunk", help="결과 단위(chunk/policy)")
+    parser.add_argument("--policy-agg", type=str, choices=POLICY_AGGREGATIONS, default="max", help="정책 점수 집계 방식")
+    parser.add_argument("--chunks-per-policy", type=int, default=2, help="정책별 근거 청크 수(sum_top_n의 n)")
+    parser.add_argument("--policy-softmax-temp", type=float, default=0.05, help="softmax 집계 temperature")
+    parser.add_argument("--sparse-index", type=Path, default=DEFAULT_SPARSE_INDEX_PATH, help="BM25 sparse 인덱스 npz 경로")
+    parser.add_argument("--query-cache-dir", type=Path, default=DEFAULT_QUERY_CACHE_DIR, help="질의 임베딩 디스크 캐시 경로")
+    parser.add_argument("--query-cache-size", type=int, default=1024, help="질의 임베딩 메모리 LRU 크기")
+    parser.add_argument("--disable-query-cache", action="store_true", help="질의 임베딩 캐시 비활성화")
+    parser.add_argument("--result-cache-size", type=int, default=256, help="검색 결과 캐시 크기")
+    parser.add_argument("--result-cache-ttl", type=float, default=600.0, help="검색 결과 캐시 TTL(초, 0이면 만료 없음)")
+    parser.add_argument("--disable-result-cache", action="store_true", help="검색 결과 캐시 비활성화")
+    parser.add_argument("--disable-index-mmap", action="store_true", help="FAISS 인덱스를 mmap 대신 메모리로 전부 읽기")
     parser.add_argument("--json", action="store_true", help="JSON으로 출력")
     return parser.parse_args()
 
@@ -127,6 +199,54 @@ def embed_query(client: Any, model: str, query: str) -> np.ndarray:
     return np.asarray(resp.data[0].embedding, dtype=np.float32)
 
 
+# 질의 여러 개를 임베딩 요청 1회로 처리
+def embed_queries(client: Any, model: str, queries: List[str]) -> List[np.ndarray]:
+    resp = client.embeddings.create(model=model, input=list(queries))
+    if len(resp.data) != len(queries):
+        raise RuntimeError("임베딩 결과 개수가 질의 개수와 다릅니다.")
+    return [np.asarray(row.embedding, dtype=np.float32) for row in resp.data]
+
+
+# embed_queries의 비동기 버전 (AsyncOpenAI 클라이언트, 응답 대기 중 이벤트 루프를 막지 않음)
+async def aembed_queries(client: Any, model: str, queries: List[str]) -> List[np.ndarray]:
+    resp = await client.embeddings.create(model=model, input=list(queries))
+    if len(resp.data) != len(queries):
+        raise RuntimeError("임베딩 결과 개수가 질의 개수와 다릅니다.")
+    return [np.asarray(row.embedding, dtype=np.float32) for row in resp.data]
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000.0, 4)
+
+
+def _top_k_order(scores: np.ndarray, tiebreak: np.ndarray, k: int) -> np.ndarray:
+    # 점수 내림차순 상위 k개 위치 (동점은 tiebreak 오름차순)
+    # argpartition은 k번째 점수와 같은 동점 중 임의로 고르므로 경계 동점을 모두 남긴 뒤 정렬해서 자름
+    picked = np.arange(len(scores))
+    if len(scores) > k:
+        if k <= 0:
+            return picked[:0]
+        kth = np.partition(-scores, k - 1)[k - 1]
+        picked = np.flatnonzero(-scores <= kth)
+    return picked[np.lexsort((tiebreak[picked], -scores[picked]))][:k]
+
+
+# 인덱스를 mmap으로 열고, 지원하지 않는 인덱스/빌드면 일반 read로 대체
+# - IO_FLAG_MMAP_IFC: flat/SQ/HNSW 코드 배열을 파일에서 그대로 매핑
+# - IO_FLAG_MMAP: IVF 역리스트 매핑
+def read_faiss_index(path: Path, use_mmap: bool = True) -> tuple[Any, bool]:
+    if use_mmap:
+        for name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+            flag = getattr(faiss, name, None)
+            if flag is None:
+                continue
+            try:
+                return faiss.read_index(str(path), flag), True
+            except RuntimeError:
+                continue
+    return faiss.read_index(str(path)), False
+
+
 def build_chunk_map(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
     return {str(r.get("chunk_id")): r for r in rows if r.get("chunk_id")}
 
@@ -150,20 +270,32 @@ def parse_section_weights(raw: str) -> Dict[str, float]:
         out[key] = val
     return out
 
+# 섹션/카테고리 키워드를 하나의 오토마톤으로 묶어 질의를 1회만 스캔
+# 공백을 무시하고 비교 (기존 q / q_nospace 이중 비교 대체)
+INTENT_MATCHER = KeywordMatcher(
+    {
+        **{f"section:{sec}": kws for sec, kws in SECTION_KEYWORDS.items()},
+        **{f"category:{cat}": kws for cat, kws in CATEGORY_KEYWORDS.items()},
+    },
+    lowercase=True,
+    ignore_spaces=True,
+)
+
+
+# 질의 의도 점수 (섹션별, 카테고리별 키워드 hit 수)
+def infer_intent_scores(query: str) -> tuple[Dict[str, int], Dict[str, int]]:
+    counts = INTENT_MATCHER.counts((query or "").strip())
+    section_scores = {sec: counts.get(f"section:{sec}", 0) for sec in ALL_SECTIONS}
+    category_scores = {cat: counts.get(f"category:{cat}", 0) for cat in ALL_CATEGORIES}
+    return section_scores, category_scores
+
+
 # 섹션별 동적 가중치 추론
 def infer_dynamic_section_weights(query: str) -> tuple[Dict[str, float], Dict[str, int]]:
-    q = (query or "").strip().lower()
-    q_nospace = re.sub(r"\s+", "", q)
-
-    scores: Dict[str, int] = {sec: 0 for sec in ALL_SECTIONS}
-    for sec, keywords in SECTION_KEYWORDS.items():
-        hit = 0
-        for kw in keywords:
-            k = kw.lower()
-            if k in q or k in q_nospace:
-                hit += 1
-        scores[sec] = hit
+    return section_weights_from_scores(infer_intent_scores(query)[0])
 
+
+def section_weights_from_scores(scores: Dict[str, int]) -> tuple[Dict[str, float], Dict[str, int]]:
     max_score = max(scores.values()) if scores else 0
     if max_score <= 0:
         return ({sec: 1.0 for sec in ALL_SECTIONS}, scores)
@@ -188,18 +320,10 @@ def infer_dynamic_section_weights(query: str) -> tuple[Dict[str, float], Dict[st
 
 # 카테고리별 동적 가중치 추론
 def infer_dynamic_category_weights(query: str) -> tuple[Dict[str, float], Dict[str, int]]:
-    q = (query or "").strip().lower()
-    q_nospace = re.sub(r"\s+", "", q)
-
-    scores: Dict[str, int] = {cat: 0 for cat in ALL_CATEGORIES}
-    for cat, keywords in CATEGORY_KEYWORDS.items():
-        hit = 0
-        for kw in keywords:
-            k = kw.lower()
-            if k in q or k in q_nospace:
-                hit += 1
-        scores[cat] = hit
+    return category_weights_from_scores(infer_intent_scores(query)[1])
+
 
+def category_weights_from_scores(scores: Dict[str, int]) -> tuple[Dict[str, float], Dict[str, int]]:
     max_score = max(scores.values()) if scores else 0
     if max_score <= 0:
         return ({cat: 1.0 for cat in ALL_CATEGORIES}, scores)
@@ -225,6 +349,62 @@ def infer_dynamic_category_weights(query: str) -> tuple[Dict[str, float], Dict[s
     return weights, scores
 
 
+# 여러 순위 리스트를 reciprocal rank fusion으로 결합 -> (융합 점수 내림차순, vector_idx)
+def reciprocal_rank_fusion(ranked_lists: List[np.ndarray], rrf_k: int = 60) -> tuple[np.ndarray, np.ndarray]:
+    ids_parts: List[np.ndarray] = []
+    score_parts: List[np.ndarray] = []
+    for ranked in ranked_lists:
+        ranked = np.asarray(ranked, dtype=np.int64)
+        ranked = ranked[ranked >= 0]
+        ids_parts.append(ranked)
+        score_parts.append(1.0 / (rrf_k + np.arange(1, len(ranked) + 1, dtype=np.float64)))
+    if not ids_parts or not sum(len(x) for x in ids_parts):
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+
+    all_ids = np.concatenate(ids_parts)
+    uniq, inverse = np.unique(all_ids, return_inverse=True)
+    fused = np.zeros(len(uniq), dtype=np.float64)
+    np.add.at(fused, inverse, np.concatenate(score_parts))
+    order = np.lexsort((uniq, -fused))
+    return fused[order], uniq[order]
+
+
+def fuse_result_lists(
+    result_lists: List[List[Dict[str, Any]]],
+    top_k: int,
+    rrf_k: int = 60,
+) -> List[Dict[str, Any]]:
+
+    """
+    질의별 검색 결과 리스트 -> RRF로 결합한 상위 top_k
+    - 청크 결과는 vector_idx, group_by=policy 결과는 policy_id가 같으면 같은 항목으로 합침
+    - 항목 dict는 처음 나온 리스트의 것을 쓰고 rrf_score, matched_queries(나온 리스트 번호)를 추가
+    - 동점은 먼저 나온 항목 순서 유지
+    """
+
+    codes: Dict[Any, int] = {}
+    rows: List[Dict[str, Any]] = []
+    matched: List[List[int]] = []
+    ranked_lists: List[np.ndarray] = []
+    for list_no, results in enumerate(result_lists):
+        ranked: List[int] = []
+        for row in results:
+            key = row["policy_id"] if "chunks" in row else int(row["vector_idx"])
+            code = codes.setdefault(key, len(rows))
+            if code == len(rows):
+                rows.append(row)
+                matched.append([])
+            matched[code].append(list_no)
+            ranked.append(code)
+        ranked_lists.append(np.asarray(ranked, dtype=np.int64))
+
+    scores, order = reciprocal_rank_fusion(ranked_lists, rrf_k=rrf_k)
+    return [
+        {**rows[code], "rrf_score": float(score), "matched_queries": matched[code]}
+        for score, code in zip(scores[:top_k].tolist(), order[:top_k].tolist())
+    ]
+
+
 def compute_rank_score(
     raw_score: float,
     metric: str,
@@ -269,16 +449,59 @@ def _region_match(query_region: str, policy_regions: List[str]) -> bool:
     return False
 
 
+def _type_keywords(value: str, table: Dict[str, tuple]) -> tuple:
+    value = (value or "").strip()
+    if value in NO_PREFERENCE_VALUES:
+        return ()
+    return table.get(value) or ()
+
+
+def _known_type_terms(table: Dict[str, tuple]) -> tuple:
+    # 표 전체 키워드 (정책 유형이 이 중 하나라도 포함해야 비교 가능한 유형으로 봄)
+    return tuple(sorted({k for keywords in table.values() for k in keywords}))
+
+
+# 정책 유형 목록이 비어 있거나 알려진 키워드에 걸리는 유형이 없으면 통과
+# 그 외에는 프로필 키워드가 하나라도 포함된 유형이 있어야 통과
+def _type_match(keywords: tuple, policy_types: List[str], table: Dict[str, tuple]) -> bool:
+    if not keywords or not policy_types:
+        return True
+    known = _known_type_terms(table)
+    if not any(k in str(t) for t in policy_types for k in known):
+        return True
+    return any(k in str(t) for t in policy_types for k in keywords)
+
+
 def _policy_passes_filters(
     policy_meta: Dict[str, Any],
     age: Optional[int],
     region_sido: str,
     region_sigungu: str,
+    monthly_income_m: Optional[int] = None,
+    assets_m: Optional[int] = None,
+    household_type: str = "",
+    rent_type: str = "",
+    owns_house: Optional[bool] = None,
 ) -> bool:
     
-    # 정책 단위 나이/지역 필터 적용
+    # 정책 단위 나이/지역/소득/자산/무주택/유형 필터 적용 (EligibilityIndex와 같은 기준의 정책별 평가)
     es = (policy_meta or {}).get("eligibility_struct") or {}
 
+    income_max = monthly_income_limit(es)
+    if monthly_income_m is not None and income_max is not None and monthly_income_m > int(income_max):
+        return False
+    asset_max = es.get("asset_max_m")
+    if assets_m is not None and asset_max is not None and assets_m > int(asset_max):
+        return False
+    if owns_house and es.get("requires_no_house") is True:
+        return False
+    if not _type_match(
+        _type_keywords(household_type, HOUSEHOLD_TYPE_KEYWORDS), es.get("household_types") or [], HOUSEHOLD_TYPE_KEYWORDS
+    ):
+        return False
+    if not _type_match(_type_keywords(rent_type, RENT_TYPE_KEYWORDS), es.get("housing_types") or [], RENT_TYPE_KEYWORDS):
+        return False
+
     if age is not None:
         age_min = es.get("age_min")
         age_max = es.get("age_max")
@@ -304,10 +527,11 @@ def build_allowed_policy_ids(
     age: Optional[int],
     region_sido: str,
     region_sigungu: str,
+    **struct_filters: Any,
 ) -> Optional[Set[str]]:
     
-    # 나이/지역 필터가 모두 없는 경우 None 반환 (모든 정책 허용)
-    if age is None and not region_sido and not region_sigungu:
+    # 필터가 모두 없는 경우 None 반환 (모든 정책 허용)
+    if RetrievalFilters(age=age, region_sido=region_sido, region_sigungu=region_sigungu, **struct_filters).is_empty():
         return None
 
     allowed: Set[str] = set()
@@ -317,179 +541,1691 @@ def build_allowed_policy_ids(
             age=age,
             region_sido=region_sido,
             region_sigungu=region_sigungu,
+            **struct_filters,
         ):
             allowed.add(str(policy_id))
     return allowed
 
 
-def run_retrieval(args: argparse.Namespace) -> Dict[str, Any]:
+class EligibilityIndex:
 
     """
-    - query: 질의 문자열
-    - results: 검색 결과 리스트
-    - debug: 가중치/필터 관련 진단 정보
+    chunking 단계에서 만든 나이/지역 필터 인덱스로 허용 정책 집합 계산
+    - 나이: 정렬 배열 이분 탐색 후 ordinal 집합 교집합
+    - 지역: 정규화 지역명 posting list 합집합 (지역 제한 없는 정책 포함)
+    - 질의마다 전체 정책을 순회하지 않음
     """
 
-    load_dotenv()
-    api_key = os.getenv(args.api_key_env, "").strip()
-    if not api_key:
-        raise EnvironmentError(f"{args.api_key_env} 환경변수가 비어 있습니다.")
-
-    if not args.index.exists():
-        raise FileNotFoundError(f"인덱스 파일이 없습니다: {args.index}")
-    if not args.mapping.exists():
-        raise FileNotFoundError(f"매핑 파일이 없습니다: {args.mapping}")
-    if not args.chunks.exists():
-        raise FileNotFoundError(f"청크 파일이 없습니다: {args.chunks}")
-    if (args.age >= 0 or args.region_sido.strip() or args.region_sigungu.strip()) and not args.metadata.exists():
-        raise FileNotFoundError(f"메타데이터 파일이 없습니다: {args.metadata}")
-
-    # index-log에서 metric/model 설정을 읽고
-    # query-model을 CLI에서 직접 주면 그 값을 우선시 함
-    index_log = read_json(args.index_log) if args.index_log.exists() else {}
-    query_model = args.query_model or index_log.get("embedding_model") or "text-embedding-3-small"
-    metric = index_log.get("metric", "cosine")
-    base_section_weights = (
-        {sec: 1.0 for sec in ALL_SECTIONS}
-        if args.disable_section_weight
-        else parse_section_weights(args.section_weights)
-    )
-    dynamic_section_weights = {sec: 1.0 for sec in ALL_SECTIONS}
-    section_intent_scores = {sec: 0 for sec in ALL_SECTIONS}
-    if not (args.disable_section_weight or args.disable_dynamic_section_weight):
-        dynamic_section_weights, section_intent_scores = infer_dynamic_section_weights(args.query)
-    effective_section_weights: Dict[str, float] = {}
-    for sec in ALL_SECTIONS:
-        effective_section_weights[sec] = round(
-            float(base_section_weights.get(sec, 1.0)) * float(dynamic_section_weights.get(sec, 1.0)),
-            4,
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        self.policy_ids: List[str] = [str(x) for x in raw.get("policy_ids") or []]
+        self.age: Dict[str, List[int]] = raw.get("age") or {}
+        self.regions: Dict[str, Dict[str, Any]] = raw.get("regions") or {}
+        self._region_cache: Dict[tuple, Set[int]] = {}
+
+        # 소득/자산/무주택/유형 조건 : 정책 ordinal 정렬 NumPy 열 + 값 없음(null) 마스크
+        # (struct가 없는 구버전 인덱스는 모든 정책이 조건 없음으로 취급되어 필터를 통과)
+        # 소득 상한은 월 소득 기준으로 환산된 열 (기간 단위를 모르는 상한은 null)
+        struct = raw.get("struct") or {}
+        n = len(self.policy_ids)
+        self.income_max, self.income_null = self._numeric_column(struct.get("monthly_income_max_m"), n)
+        self.asset_max, self.asset_null = self._numeric_column(struct.get("asset_max_m"), n)
+        no_house = struct.get("requires_no_house") or [None] * n
+        self.requires_no_house = np.asarray([v is True for v in no_house], dtype=bool)
+        self.household_vocab, self.household_matrix = self._type_column(struct.get("household_types"), n)
+        self.housing_vocab, self.housing_matrix = self._type_column(struct.get("housing_types"), n)
+        self._type_cache: Dict[tuple, np.ndarray] = {}
+
+    @classmethod
+    def load(cls, path: Path, metadata: Dict[str, Any]) -> "EligibilityIndex":
+        # 인덱스 파일이 없거나 월 소득 기준 struct 열이 없으면(구버전 산출물) 메타데이터로부터 메모리에서 생성
+        if path.exists():
+            raw = read_json(path)
+            if "monthly_income_max_m" in (raw.get("struct") or {}) or not metadata:
+                return cls(raw)
+        return cls(build_eligibility_index(metadata))
+
+    @staticmethod
+    def _numeric_column(values: Optional[List[Any]], n: int) -> tuple[np.ndarray, np.ndarray]:
+        values = values or [None] * n
+        null = np.asarray([v is None for v in values], dtype=bool)
+        column = np.asarray([0 if v is None else int(v) for v in values], dtype=np.int64)
+        return column, null
+
+    @staticmethod
+    def _type_column(values: Optional[List[List[str]]], n: int) -> tuple[List[str], np.ndarray]:
+        # 정책 x 유형 multi-hot 행렬 (행 전체가 False = 유형 조건 없음)
+        values = values or [[] for _ in range(n)]
+        vocab = sorted({str(t) for types in values for t in types})
+        position = {t: i for i, t in enumerate(vocab)}
+        matrix = np.zeros((n, len(vocab)), dtype=bool)
+        for ordinal, types in enumerate(values):
+            matrix[ordinal, [position[str(t)] for t in types]] = True
+        return vocab, matrix
+
+    def _type_mask(self, field: str, keywords: tuple) -> np.ndarray:
+        # 키워드가 포함된 유형 열을 먼저 고르고(유형 종류 수만큼 비교) 행 단위 any로 정책 통과 여부 계산
+        # 알려진 키워드에 걸리는 유형이 없는 정책(유형 조건 없음 포함)은 통과 (_type_match와 같은 기준)
+        key = (field, keywords)
+        cached = self._type_cache.get(key)
+        if cached is not None:
+            return cached
+        vocab, matrix, table = (
+            (self.household_vocab, self.household_matrix, HOUSEHOLD_TYPE_KEYWORDS)
+            if field == "household"
+            else (self.housing_vocab, self.housing_matrix, RENT_TYPE_KEYWORDS)
+        )
+        known = _known_type_terms(table)
+        known_terms = np.asarray([any(k in t for k in known) for t in vocab], dtype=bool)
+        terms = np.asarray([any(k in t for k in keywords) for t in vocab], dtype=bool)
+        mask = ~matrix[:, known_terms].any(axis=1) | matrix[:, terms].any(axis=1)
+        self._type_cache[key] = mask
+        return mask
+
+    def _struct_ordinals(
+        self,
+        monthly_income_m: Optional[int],
+        assets_m: Optional[int],
+        household_keywords: tuple,
+        rent_keywords: tuple,
+        owns_house: Optional[bool],
+    ) -> Set[int]:
+        # 조건별 통과 마스크(값 없음은 통과)를 AND로 결합
+        mask = np.ones(len(self.policy_ids), dtype=bool)
+        if monthly_income_m is not None:
+            mask &= self.income_null | (self.income_max >= int(monthly_income_m))
+        if assets_m is not None:
+            mask &= self.asset_null | (self.asset_max >= int(assets_m))
+        if owns_house:
+            mask &= ~self.requires_no_house
+        if household_keywords:
+            mask &= self._type_mask("household", household_keywords)
+        if rent_keywords:
+            mask &= self._type_mask("housing", rent_keywords)
+        return set(np.flatnonzero(mask).tolist())
+
+    def _age_ordinals(self, age: int) -> Set[int]:
+        lo = bisect_left(self.age["min_values"], age + 1)
+        hi = bisect_left(self.age["max_values"], age)
+        return set(self.age["min_order"][:lo]) & set(self.age["max_order"][hi:])
+
+    def _region_ordinals(self, field: str, query_region: str) -> Set[int]:
+        key = (field, query_region)
+        cached = self._region_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # 비교 기준은 _region_match와 동일 (완전 일치 또는 상호 포함)
+        # posting key 수(지역명 수)만큼만 비교
+        q = _region_normalize(query_region)
+        index = self.regions.get(field) or {}
+        out: Set[int] = set(index.get("unrestricted") or [])
+        for r, ordinals in (index.get("postings") or {}).items():
+            if q == r or q in r or r in q:
+                out.update(ordinals)
+        self._region_cache[key] = out
+        return out
+
+    def allowed_policy_ids(
+        self,
+        age: Optional[int],
+        region_sido: str,
+        region_sigungu: str,
+        monthly_income_m: Optional[int] = None,
+        assets_m: Optional[int] = None,
+        household_type: str = "",
+        rent_type: str = "",
+        owns_house: Optional[bool] = None,
+    ) -> Optional[Set[str]]:
+
+        household_keywords = _type_keywords(household_type, HOUSEHOLD_TYPE_KEYWORDS)
+        rent_keywords = _type_keywords(rent_type, RENT_TYPE_KEYWORDS)
+        use_struct = (
+            monthly_income_m is not None
+            or assets_m is not None
+            or bool(owns_house)
+            or bool(household_keywords)
+            or bool(rent_keywords)
         )
 
-    dynamic_category_weights = {cat: 1.0 for cat in ALL_CATEGORIES}
-    category_intent_scores = {cat: 0 for cat in ALL_CATEGORIES}
-    if not args.disable_dynamic_category_weight:
-        dynamic_category_weights, category_intent_scores = infer_dynamic_category_weights(args.query)
-
-    index = faiss.read_index(str(args.index))
-    mapping_rows = read_jsonl(args.mapping)
-    chunk_map = build_chunk_map(read_jsonl(args.chunks))
-    metadata = read_json(args.metadata) if args.metadata.exists() else {}
-
-    age = None if args.age < 0 else int(args.age)
-    region_sido = args.region_sido.strip()
-    region_sigungu = args.region_sigungu.strip()
-    allowed_policy_ids = build_allowed_policy_ids(
-        metadata=metadata,
-        age=age,
-        region_sido=region_sido,
-        region_sigungu=region_sigungu,
-    )
+        # 필터가 모두 없는 경우 None 반환 (모든 정책 허용)
+        if age is None and not region_sido and not region_sigungu and not use_struct:
+            return None
+
+        candidates: List[Set[int]] = []
+        if age is not None:
+            candidates.append(self._age_ordinals(int(age)))
+        if _region_normalize(region_sido):
+            candidates.append(self._region_ordinals("sido", region_sido))
+        if _region_normalize(region_sigungu):
+            candidates.append(self._region_ordinals("sigungu", region_sigungu))
+        if use_struct:
+            candidates.append(
+                self._struct_ordinals(monthly_income_m, assets_m, household_keywords, rent_keywords, owns_house)
+            )
+        if not candidates:
+            return set(self.policy_ids)
+
+        candidates.sort(key=len)
+        ordinals = set(candidates[0]).intersection(*candidates[1:])
+        return {self.policy_ids[o] for o in ordinals}
+
+
+def _none_if_negative(value: Any) -> Optional[int]:
+    return None if value is None or int(value) < 0 else int(value)
+
+
+@dataclass
+class RetrievalFilters:
+    # 정책 단위 나이/지역/자격 조건 필터 (미사용: None 또는 빈 문자열)
+    age: Optional[int] = None
+    region_sido: str = ""
+    region_sigungu: str = ""
+    monthly_income_m: Optional[int] = None
+    assets_m: Optional[int] = None
+    household_type: str = ""
+    rent_type: str = ""
+    owns_house: Optional[bool] = None
+
+    def is_empty(self) -> bool:
+        return (
+            self.age is None
+            and not self.region_sido
+            and not self.region_sigungu
+            and self.monthly_income_m is None
+            and self.assets_m is None
+            and self.household_type in NO_PREFERENCE_VALUES
+            and self.rent_type in NO_PREFERENCE_VALUES
+            and not self.owns_house
+        )
 
-    mapping_by_idx: Dict[int, Dict[str, Any]] = {}
-    for row in mapping_rows:
-        v = row.get("vector_idx")
-        if v is None:
-            continue
-        mapping_by_idx[int(v)] = row
-
-    # search-k는 1차 후보 크기
-    # top-k보다 크게 잡아서 좋은 후보가 누락되지 않도록 함
-    search_k = args.search_k if args.search_k > 0 else max(args.top_k * 8, args.top_k)
-    if allowed_policy_ids is not None:
-        # 필터 적용 시 후보가 줄어드므로 기본 후보폭을 넓힘
-        search_k = max(search_k, args.top_k * 20)
-    search_k = min(search_k, len(mapping_by_idx))
-
-    # 질의 임베딩 생성
-    client = OpenAI(api_key=api_key)
-    q = embed_query(client, query_model, args.query)
-
-    # 인덱스가 코사인 기준이면 query도 동일하게 정규화
-    if metric == "cosine":
-        q = normalize(q)
-    q = q.reshape(1, -1).astype(np.float32)
-
-    # FAISS 검색 : distances(점수), indices(vector_idx) 반환
-    distances, indices = index.search(q, search_k)
-
-    # vector_idx를 읽을 수 있는 결과로 복원
-    results: List[Dict[str, Any]] = []
-    seen_chunk_ids: Set[str] = set()
-    seen_text_keys: Set[str] = set()
-    dedup_skipped = 0
-
-    for score, vidx in zip(distances[0].tolist(), indices[0].tolist()):
-        if vidx < 0:
-            continue
-        row = mapping_by_idx.get(int(vidx))
-        if not row:
-            continue
-        if allowed_policy_ids is not None and str(row.get("policy_id")) not in allowed_policy_ids:
-            continue
-        chunk_id = str(row.get("chunk_id"))
-        if chunk_id in seen_chunk_ids:
-            dedup_skipped += 1
-            continue
+    def key(self) -> tuple:
+        # 같은 필터 조합 식별용 (배치 검색 그룹핑)
+        return (
+            self.age,
+            self.region_sido,
+            self.region_sigungu,
+            self.monthly_income_m,
+            self.assets_m,
+            self.household_type,
+            self.rent_type,
+            self.owns_house,
+        )
 
-        chunk = chunk_map.get(chunk_id, {})
-        text = str(chunk.get("text", ""))
-        text_key = ""
-        if not args.disable_text_dedup:
-            text_key = build_text_key(text, min_len=max(1, args.text_dedup_min_len))
-            if text_key and text_key in seen_text_keys:
-                dedup_skipped += 1
-                continue
+    def eligibility_kwargs(self) -> Dict[str, Any]:
+        return {
+            "age": self.age,
+            "region_sido": self.region_sido,
+            "region_sigungu": self.region_sigungu,
+            "monthly_income_m": self.monthly_income_m,
+            "assets_m": self.assets_m,
+            "household_type": self.household_type,
+            "rent_type": self.rent_type,
+            "owns_house": self.owns_house,
+        }
+
+    @classmethod
+    def from_args(cls, args: Any) -> "RetrievalFilters":
+        return cls(
+            age=_none_if_negative(getattr(args, "age", -1)),
+            region_sido=str(getattr(args, "region_sido", "") or "").strip(),
+            region_sigungu=str(getattr(args, "region_sigungu", "") or "").strip(),
+            monthly_income_m=_none_if_negative(getattr(args, "monthly_income_m", -1)),
+            assets_m=_none_if_negative(getattr(args, "assets_m", -1)),
+            household_type=str(getattr(args, "household_type", "") or "").strip(),
+            rent_type=str(getattr(args, "rent_type", "") or "").strip(),
+            owns_house=True if getattr(args, "owns_house", False) else None,
+        )
+
+    @classmethod
+    def from_profile(cls, profile: Dict[str, Any]) -> "RetrievalFilters":
+
+        # 폼 입력 user_profile -> 필터 (값이 없거나 형식이 맞지 않는 항목은 미사용)
+        region = profile.get("region") or {}
+
+        def _int_or_none(value: Any) -> Optional[int]:
+            return int(value) if isinstance(value, int) and not isinstance(value, bool) and value >= 0 else None
+
+        owns_house = profile.get("owns_house")
+        return cls(
+            age=_int_or_none(profile.get("age")),
+            region_sido=str(region.get("city") or "").strip(),
+            region_sigungu=str(region.get("gu") or "").strip(),
+            monthly_income_m=_int_or_none(profile.get("monthly_income_m")),
+            assets_m=_int_or_none(profile.get("assets_m")),
+            household_type=str(profile.get("household_type") or "").strip(),
+            rent_type=str(profile.get("rent_type") or "").strip(),
+            owns_house=owns_house if isinstance(owns_house, bool) else None,
+        )
+
+
+@dataclass
+class RetrievalOptions:
+    # 랭킹/중복 제거/출력 관련 옵션 (CLI 인자와 1:1 대응)
+    search_k: int = 0
+    max_search_rounds: int = 6
+    section_weights: str = DEFAULT_SECTION_WEIGHTS
+    disable_section_weight: bool = False
+    disable_dynamic_section_weight: bool = False
+    disable_dynamic_category_weight: bool = False
+    disable_text_dedup: bool = False
+    text_dedup_min_len: int = 80
+    preview_chars: int = 300
+    return_text: bool = True
+    mode: str = "dense"
+    rrf_k: int = 60
+    group_by: str = "chunk"
+    policy_agg: str = "max"
+    chunks_per_policy: int = 2
+    policy_softmax_temp: float = 0.05
+    shard_search: str = "all"
+
+    @classmethod
+    def from_args(cls, args: Any) -> "RetrievalOptions":
+        defaults = cls()
+        return cls(**{name: getattr(args, name, getattr(defaults, name)) for name in defaults.__dataclass_fields__})
+
+
+class RetrieverService:
 
-        seen_chunk_ids.add(chunk_id)
-        if text_key:
-            seen_text_keys.add(text_key)
+    """
+    FAISS 인덱스, vector 매핑, 청크 원문, 정책 메타데이터를 한 번만 로드해 메모리에 유지
+    - 프로세스가 살아 있는 동안 search()는 질의 임베딩 + 검색 + 랭킹만 수행
+    - housing_opinion_prompt, retriever CLI 모두 이 클래스를 통해 검색
+    """
+
+    def __init__(
+        self,
+        index_path: Path = DEFAULT_INDEX_PATH,
+        index_log_path: Path = DEFAULT_INDEX_LOG_PATH,
+        mapping_path: Path = DEFAULT_MAPPING_PATH,
+        chunk_path: Path = DEFAULT_CHUNK_PATH,
+        metadata_path: Path = DEFAULT_METADATA_PATH,
+        eligibility_index_path: Path = DEFAULT_ELIGIBILITY_INDEX_PATH,
+        sparse_index_path: Path = DEFAULT_SPARSE_INDEX_PATH,
+        query_model: str = "",
+        api_key_env: str = "OPENAI_API_KEY",
+        embedding_cache: Optional[QueryEmbeddingCache] = None,
+        index_mmap: bool = True,
+        result_cache: Optional[ResultCache] = None,
+        metrics_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+        embedder: Optional[Callable[[List[str]], List[np.ndarray]]] = None,
+    ) -> None:
+
+        if not mapping_path.exists():
+            raise FileNotFoundError(f"매핑 파일이 없습니다: {mapping_path}")
+        if not chunk_path.exists():
+            raise FileNotFoundError(f"청크 파일이 없습니다: {chunk_path}")
+
+        # 산출물 로딩 단계별 시간 (서비스 생성 시 1회, debug["load_timings_ms"]로 노출)
+        load_start = time.perf_counter()
+        self.load_timings_ms: Dict[str, float] = {}
+
+        self.api_key_env = api_key_env
+        self.metadata_path = metadata_path
+        self.sparse_index_path = sparse_index_path
+        self._sparse: Optional[SparseIndex] = None
+        self._sparse_vector_ids = np.empty(0, dtype=np.int64)
+        # 지연 로딩(클라이언트/BM25/재정렬 벡터)은 여러 스레드에서 동시에 호출될 수 있어 잠금으로 1회만 수행
+        self._lazy_lock = threading.Lock()
+
+        # index-log에서 metric/model 설정을 읽고
+        # query-model을 직접 주면 그 값을 우선시 함
+        self.index_log = read_json(index_log_path) if index_log_path.exists() else {}
+        self.query_model = query_model or self.index_log.get("embedding_model") or "text-embedding-3-small"
+        self.metric = self.index_log.get("metric", "cosine")
+
+        t0 = time.perf_counter()
+        # IVF(nprobe)/HNSW(efSearch) 검색 파라미터는 빌드 시 기록값을 그대로 적용
+        self.index_kind = self.index_log.get("index_kind", "flat")
+        self.index: Any = None
+        self.shards: Dict[str, Any] = {}
+        self.shard_search_params: Dict[str, Dict[str, int]] = {}
+        self._shard_pool: Optional[ThreadPoolExecutor] = None
+        if self.index_log.get("shards"):
+            # 카테고리 샤드 인덱스 (faiss_building --shard-by-category), 샤드마다 전역 vector_idx를 id로 가짐
+            mmapped = []
+            for name, shard in sorted(self.index_log["shards"].items()):
+                shard_path = Path(shard["path"])
+                if not shard_path.exists():
+                    raise FileNotFoundError(f"샤드 인덱스 파일이 없습니다: {shard_path}")
+                self.shards[name], used_mmap = read_faiss_index(shard_path, index_mmap)
+                mmapped.append(used_mmap)
+                self.shard_search_params[name] = self._load_search_params(self.shards[name], shard.get("search_params"))
+            self.index_mmap = all(mmapped)
+            self.search_params: Dict[str, int] = {}
+            # 샤드 검색은 faiss 내부에서 GIL을 놓으므로 스레드로 동시에 수행
+            if len(self.shards) > 1:
+                self._shard_pool = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="faiss-shard")
+            self.index_version = str(self.index_log.get("index_version") or "")
+        else:
+            if not index_path.exists():
+                raise FileNotFoundError(f"인덱스 파일이 없습니다: {index_path}")
+            self.index, self.index_mmap = read_faiss_index(index_path, index_mmap)
+            # 구버전 index-log에는 index_version이 없으므로 인덱스 파일 크기/수정시각으로 대신함
+            index_stat = index_path.stat()
+            self.index_version = str(
+                self.index_log.get("index_version") or f"{index_stat.st_size}:{index_stat.st_mtime_ns}"
+            )
+            self.search_params = self._load_search_params(self.index, self.index_log.get("search_params"))
+        # 샤드 이름(카테고리) -> ALL_CATEGORIES 코드 (카테고리 없는 벡터의 "other" 샤드는 -1)
+        self.shard_codes: Dict[str, int] = {
+            name: (ALL_CATEGORIES.index(name) if name in ALL_CATEGORIES else -1) for name in self.shards
+        }
+
+        # 압축 인덱스(sq8/fp16/pq/opq)는 후보를 넓게 뽑은 뒤 원본 벡터(npy, mmap)로 재정렬
+        refine = self.index_log.get("refine") or {}
+        self.refine_factor = max(1, int(refine.get("factor", 1)))
+        self.refine_vectors_path = Path(refine["vectors_path"]) if refine.get("vectors_path") else None
+        self._refine_vectors: Optional[np.ndarray] = None
+        self.load_timings_ms["index"] = _elapsed_ms(t0)
+
+        # 청크 본문은 offset 색인으로 결과에 필요한 줄만 읽음
+        t0 = time.perf_counter()
+        self.chunks = ChunkStore.open(chunk_path)
+        self._chunk_store_positions: Optional[np.ndarray] = None
+        self.load_timings_ms["chunks"] = _elapsed_ms(t0)
+        t0 = time.perf_counter()
+        self.metadata = read_json(metadata_path) if metadata_path.exists() else {}
+        self.eligibility = EligibilityIndex.load(eligibility_index_path, self.metadata)
+        self.load_timings_ms["eligibility"] = _elapsed_ms(t0)
+
+        # 열 manifest가 JSONL 매핑과 맞으면 mmap으로 열고, 없거나 오래됐으면 JSONL에서 같은 열을 만듦
+        t0 = time.perf_counter()
+        columnar_path = manifest_path_for(mapping_path)
+        if manifest_is_fresh(columnar_path, mapping_path):
+            self.manifest = load_manifest_columns(columnar_path)
+        else:
+            self.manifest = build_manifest_columns(read_jsonl(mapping_path))
+
+        self._build_columns()
+        # 대표 벡터만 넣은 인덱스(--representatives-only)면 인덱스에 든 vector_idx 표시 (확장 검색 종료 판단용)
+        self._indexed_vectors: Optional[np.ndarray] = None
+        if self.index_log.get("representatives_only"):
+            self._indexed_vectors = np.zeros(len(self.valid_vectors), dtype=bool)
+            for index in [self.index] if self.index is not None else list(self.shards.values()):
+                self._indexed_vectors[faiss.vector_to_array(index.id_map)] = True
+        self.load_timings_ms["manifest"] = _elapsed_ms(t0)
+
+        self.embedding_cache = embedding_cache
+        self.result_cache = result_cache
+        self.metrics_sink = metrics_sink
+        # 질의 임베딩 함수 주입 (벤치마크/오프라인 실행용, None이면 OpenAI 임베딩 API 사용)
+        self.embedder = embedder
+        # 결과 캐시 key 앞부분 : 인덱스 버전 + 결과에 영향을 주는 산출물 경로
+        self.cache_namespace = (
+            self.index_version,
+            str(index_path),
+            str(mapping_path),
+            str(chunk_path),
+            str(metadata_path),
+            str(eligibility_index_path),
+            str(sparse_index_path),
+        )
+        self._client: Any = None
+        # AsyncOpenAI는 내부 HTTP 연결이 이벤트 루프에 묶이므로 루프별로 따로 생성
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self.load_timings_ms["total"] = _elapsed_ms(load_start)
+
+    @staticmethod
+    def _load_search_params(index: Any, raw: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        params = {str(k): int(v) for k, v in (raw or {}).items()}
+        ps = faiss.ParameterSpace()
+        for name, value in params.items():
+            ps.set_index_parameter(index, name, value)
+        return params
+
+    def _build_columns(self) -> None:
+
+        # manifest 열 -> 랭킹/필터/dedup용 vector_idx 정렬 정수 배열
+        m = self.manifest
+        self.valid_vectors = m["valid"]
+        self.num_vectors = int(self.valid_vectors.sum())
+        self.policy_codes = m["policy_codes"]
+        self.chunk_codes = m["chunk_codes"]
+        # 정책/청크 id는 코드 -> 문자열 테이블 배열 그대로 사용 (행별 Python 문자열을 만들지 않음)
+        self.policy_table: np.ndarray = m["policy_table"]
+        self.chunk_ids: np.ndarray = m["chunk_table"]
+        # policy_id 조회용 정렬 순서 + 정렬된 테이블 (정책 수만큼만 정렬)
+        self._policy_sort = np.argsort(self.policy_table, kind="stable")
+        self._policy_sorted = self.policy_table[self._policy_sort]
+
+        # 원본 section/category 표기 -> ALL_SECTIONS/ALL_CATEGORIES 코드 (마지막 -1은 값 없음)
+        section_index = {sec: i for i, sec in enumerate(ALL_SECTIONS)}
+        category_index = {cat: i for i, cat in enumerate(ALL_CATEGORIES)}
+        section_lookup = np.asarray(
+            [section_index.get(str(x).upper(), -1) for x in m["section_table"].tolist()] + [-1], dtype=np.int8
+        )
+        category_lookup = np.asarray(
+            [category_index.get(str(x).lower(), -1) for x in m["category_table"].tolist()] + [-1], dtype=np.int8
+        )
+        self.section_codes = section_lookup[m["section_codes"]]
+        self.category_codes = category_lookup[m["category_codes"]]
+
+        # 정책 코드 순으로 정렬한 vector_idx + 코드별 구간 경계 (필터 결과를 FAISS IDSelector로 변환할 때 사용)
+        vids = np.flatnonzero(self.valid_vectors & (self.policy_codes >= 0)).astype(np.int64)
+        codes = self.policy_codes[vids]
+        order = np.argsort(codes, kind="stable")
+        self.policy_vector_ids = vids[order]
+        self.policy_vector_bounds = np.searchsorted(codes[order], np.arange(len(self.policy_table) + 1))
+
+        # 빌드 시점 근사 중복 군집이 매핑에 있으면 정수 군집 id로 dedup
+        # (구버전 매핑은 검색 후보 청크의 텍스트 dedup key를 그때그때 계산해서 사용)
+        self.dup_group_codes: Optional[np.ndarray] = None
+        if self.num_vectors and int(m["has_dup_group"]):
+            self.dup_group_codes = m["dup_group_ids"]
+        # 군집을 만든 최소 길이 (기록이 없는 구버전 인덱스 로그는 near_dup 기본값으로 빌드됨)
+        self.dup_min_len = int(self.index_log.get("dup_min_len") or MIN_TEXT_LEN)
+        self._dup_min_len_warned: Set[int] = set()
+
+        # min_len -> (청크 ordinal별 key 코드(-2: 아직 계산 안 함), key -> 코드)
+        self._text_key_cache: Dict[int, tuple[np.ndarray, Dict[str, int]]] = {}
+
+    @classmethod
+    def from_args(cls, args: Any) -> "RetrieverService":
+        embedding_cache = None
+        if not getattr(args, "disable_query_cache", False):
+            embedding_cache = QueryEmbeddingCache(
+                store_dir=getattr(args, "query_cache_dir", DEFAULT_QUERY_CACHE_DIR),
+                max_items=getattr(args, "query_cache_size", 1024),
+            )
+        result_cache = None
+        if not getattr(args, "disable_result_cache", False):
+            result_cache = get_result_cache(
+                max_items=getattr(args, "result_cache_size", 256),
+                ttl_seconds=getattr(args, "result_cache_ttl", 600.0),
+            )
+        return cls(
+            index_path=args.index,
+            index_log_path=args.index_log,
+            mapping_path=args.mapping,
+            chunk_path=args.chunks,
+            metadata_path=args.metadata,
+            eligibility_index_path=getattr(args, "eligibility_index", DEFAULT_ELIGIBILITY_INDEX_PATH),
+            sparse_index_path=getattr(args, "sparse_index", DEFAULT_SPARSE_INDEX_PATH),
+            query_model=getattr(args, "query_model", ""),
+            api_key_env=getattr(args, "api_key_env", "OPENAI_API_KEY"),
+            embedding_cache=embedding_cache,
+            index_mmap=not getattr(args, "disable_index_mmap", False),
+            result_cache=result_cache,
+        )
+
+    def _api_key(self) -> str:
+        load_dotenv()
+        api_key = os.getenv(self.api_key_env, "").strip()
+        if not api_key:
+            raise EnvironmentError(f"{self.api_key_env} 환경변수가 비어 있습니다.")
+        return api_key
+
+    def _get_client(self) -> Any:
+        with self._lazy_lock:
+            if self._client is None:
+                self._client = OpenAI(api_key=self._api_key())
+            return self._client
+
+    def _get_async_client(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lazy_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = AsyncOpenAI(api_key=self._api_key())
+                self._async_clients[loop] = client
+            return client
+
+    def embed(self, query: str) -> np.ndarray:
+        return self.embed_many([query])[0]
+
+    def embed_many(self, queries: List[str]) -> np.ndarray:
+
+        """
+        질의 여러 개를 (n, dim) 행렬로 임베딩
+        - 캐시 hit은 그대로 사용하고, miss만 모아서 임베딩 요청 1회로 처리
+        """
+
+        texts, vectors, missing = self._cached_embeddings(queries)
+        fresh: List[np.ndarray] = []
+        if missing:
+            if self.embedder is not None:
+                fresh = list(self.embedder(missing))
+            else:
+                fresh = embed_queries(self._get_client(), self.query_model, missing)
+        return self._merge_embeddings(texts, vectors, missing, fresh)
+
+    async def aembed_many(self, queries: List[str]) -> np.ndarray:
+
+        # embed_many의 비동기 버전 : 임베딩 API는 AsyncOpenAI로 await, 주입된 embedder는 스레드에서 실행
+        texts, vectors, missing = self._cached_embeddings(queries)
+        fresh: List[np.ndarray] = []
+        if missing:
+            if self.embedder is not None:
+                loop = asyncio.get_running_loop()
+                fresh = list(await loop.run_in_executor(None, self.embedder, missing))
+            else:
+                fresh = await aembed_queries(self._get_async_client(), self.query_model, missing)
+        return self._merge_embeddings(texts, vectors, missing, fresh)
+
+    def _cached_embeddings(self, queries: List[str]) -> tuple[List[str], List[Optional[np.ndarray]], List[str]]:
+        # 정규화 질의, 캐시 조회 결과(miss는 None), 임베딩이 필요한 고유 질의 목록
+        texts = [normalize_query_text(q) for q in queries]
+        vectors: List[Optional[np.ndarray]] = [
+            self.embedding_cache.get(self.query_model, t) if self.embedding_cache is not None else None
+            for t in texts
+        ]
+        missing = sorted({t for t, v in zip(texts, vectors) if v is None})
+        return texts, vectors, missing
+
+    def _merge_embeddings(
+        self,
+        texts: List[str],
+        vectors: List[Optional[np.ndarray]],
+        missing: List[str],
+        fresh: List[np.ndarray],
+    ) -> np.ndarray:
+        if missing:
+            embedded = dict(zip(missing, fresh))
+            for t, vec in embedded.items():
+                if self.embedding_cache is not None:
+                    self.embedding_cache.put(self.query_model, t, vec)
+            vectors = [v if v is not None else embedded[t] for t, v in zip(texts, vectors)]
+
+        mat = np.vstack([np.asarray(v, dtype=np.float32).reshape(1, -1) for v in vectors])
+        # 인덱스가 코사인 기준이면 query도 동일하게 정규화
+        if self.metric == "cosine":
+            norms = np.linalg.norm(mat, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            mat = mat / norms
+        return np.ascontiguousarray(mat, dtype=np.float32)
+
+    def _resolve_weights(self, query: str, options: RetrievalOptions) -> Dict[str, Any]:
+
+        # 기본 섹션 가중치 x 질의 의도 기반 동적 가중치
+        base_section_weights = (
+            {sec: 1.0 for sec in ALL_SECTIONS}
+            if options.disable_section_weight
+            else parse_section_weights(options.section_weights)
+        )
+        use_section_intent = not (options.disable_section_weight or options.disable_dynamic_section_weight)
+        use_category_intent = not options.disable_dynamic_category_weight
+        section_scores, category_scores = (
+            infer_intent_scores(query) if use_section_intent or use_category_intent else ({}, {})
+        )
 
-        results.append(
-            {
+        dynamic_section_weights = {sec: 1.0 for sec in ALL_SECTIONS}
+        section_intent_scores = {sec: 0 for sec in ALL_SECTIONS}
+        if use_section_intent:
+            dynamic_section_weights, section_intent_scores = section_weights_from_scores(section_scores)
+        effective_section_weights: Dict[str, float] = {}
+        for sec in ALL_SECTIONS:
+            effective_section_weights[sec] = round(
+                float(base_section_weights.get(sec, 1.0)) * float(dynamic_section_weights.get(sec, 1.0)),
+                4,
+            )
+
+        dynamic_category_weights = {cat: 1.0 for cat in ALL_CATEGORIES}
+        category_intent_scores = {cat: 0 for cat in ALL_CATEGORIES}
+        if use_category_intent:
+            dynamic_category_weights, category_intent_scores = category_weights_from_scores(category_scores)
+
+        return {
+            "base_section_weights": base_section_weights,
+            "section_intent_scores": section_intent_scores,
+            "dynamic_section_weights": dynamic_section_weights,
+            "effective_section_weights": effective_section_weights,
+            "category_intent_scores": category_intent_scores,
+            "dynamic_category_weights": dynamic_category_weights,
+        }
+
+    def _policy_codes_of(self, policy_ids: Set[str]) -> np.ndarray:
+        # policy_id 문자열 -> 정책 코드 (manifest에 없는 id는 제외)
+        if not policy_ids or not len(self.policy_table):
+            return np.empty(0, dtype=np.int64)
+        query = np.asarray(sorted(policy_ids), dtype=str)
+        table = self._policy_sorted
+        pos = np.minimum(np.searchsorted(table, query), len(table) - 1)
+        return self._policy_sort[pos[table[pos] == query]]
+
+    def _allowed_vector_ids(self, allowed_policy_ids: Set[str]) -> np.ndarray:
+        bounds = self.policy_vector_bounds
+        parts = [self.policy_vector_ids[bounds[c] : bounds[c + 1]] for c in self._policy_codes_of(allowed_policy_ids).tolist()]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def _search_k(self, top_k: int, options: RetrievalOptions, num_candidates: int) -> int:
+        # search-k는 1차 후보 크기 (중복 제거 후 top_k개가 안 남을 때만 _search_uncached에서 확장)
+        # top-k보다 크게 잡아서 중복 제거 후에도 좋은 후보가 누락되지 않도록 함
+        # 필터는 IDSelector로 FAISS 안에서 적용되므로 허용 벡터 수(num_candidates)가 곧 필터 선택도
+        # - 허용 벡터가 시작 폭의 2배 이내(선택도 높은 필터)면 확장 왕복 없이 허용 후보 전부를 한 번에
+        # 정책 단위 묶음은 정책마다 근거 청크를 여러 개 쓰므로 그만큼 후보폭을 넓힘
+        if options.group_by == "policy":
+            top_k = top_k * max(1, options.chunks_per_policy)
+        if options.search_k > 0:
+            search_k = options.search_k
+        else:
+            search_k = top_k * 8
+            if num_candidates <= search_k * 2:
+                search_k = num_candidates
+        return min(max(search_k, top_k), num_candidates)
+
+    def _text_key_codes(self, min_len: int, chunk_codes: np.ndarray) -> np.ndarray:
+
+        """
+        후보 청크의 텍스트 dedup key 정수 코드 (-1은 dedup 대상 아님)
+        - 처음 나온 청크만 청크 저장소에서 본문을 읽어 key를 계산하고 min_len별로 캐시
+        - 시작 시 전체 본문을 읽지 않으므로 로딩 비용이 청크 본문 크기에 비례하지 않음
+        """
+
+        with self._lazy_lock:
+            state = self._text_key_cache.get(min_len)
+            if state is None:
+                state = (np.full(len(self.chunk_ids), -2, dtype=np.int32), {})
+                self._text_key_cache[min_len] = state
+            codes, key_to_code = state
+            for code in np.unique(chunk_codes[codes[chunk_codes] == -2]).tolist():
+                key = build_text_key(self.chunks.text(str(self.chunk_ids[code])), min_len=min_len)
+                codes[code] = key_to_code.setdefault(key, len(key_to_code)) if key else -1
+            return codes[chunk_codes]
+
+    def _rank_candidates(
+        self,
+        distances: np.ndarray,
+        indices: np.ndarray,
+        metric: str,
+        weights: Dict[str, Any],
+        top_k: int,
+        options: RetrievalOptions,
+        timings: Optional[Dict[str, float]] = None,
+        stage_counts: Optional[Dict[str, Any]] = None,
+    ) -> tuple[List[Dict[str, Any]], int]:
+
+        """
+        FAISS 후보 -> 가중치 반영 상위 top_k 결과
+        - 섹션/카테고리/청크/dedup key를 vector_idx 정렬 정수 배열로 보고 한 번에 계산
+        - 결과 dict는 최종 top_k에 대해서만 생성
+        - group_by=policy면 청크 점수를 정책별로 집계해 상위 top_k 정책(+근거 청크) 반환
+        """
+
+        t0 = time.perf_counter()
+        keep = indices >= 0
+        keep[keep] = self.valid_vectors[indices[keep]]
+        vids = indices[keep]
+        scores = distances[keep].astype(np.float64)
+
+        # 후보를 검색 점수순(l2는 오름차순), 동점은 vector_idx 순으로 정렬
+        # (인덱스/샤드 병합마다 동점 후보의 도착 순서가 달라도 중복 군집 대표와 동점 순위가 같게 정해짐)
+        arrival = np.lexsort((vids, scores if metric == "l2" else -scores))
+        vids = vids[arrival]
+        scores = scores[arrival]
+
+        # 중복 제거 : 정렬 순서에서 먼저 나온 청크/텍스트만 유지
+        chunk_codes = self.chunk_codes[vids]
+        _, first = np.unique(chunk_codes, return_index=True)
+        uniq = np.zeros(len(vids), dtype=bool)
+        uniq[first] = True
+        if not options.disable_text_dedup:
+            if self.dup_group_codes is not None:
+                text_codes = self.dup_group_codes[vids]
+            else:
+                text_codes = self._text_key_codes(max(1, options.text_dedup_min_len), chunk_codes)
+            keyed = np.flatnonzero(uniq & (text_codes >= 0))
+            _, first = np.unique(text_codes[keyed], return_index=True)
+            uniq[keyed] = False
+            uniq[keyed[first]] = True
+        dedup_skipped = int(len(vids) - uniq.sum())
+        vids = vids[uniq]
+        scores = scores[uniq]
+        if timings is not None:
+            timings["dedup"] = _elapsed_ms(t0)
+            t0 = time.perf_counter()
+        if stage_counts is not None:
+            stage_counts["after_dedup"] = int(len(vids))
+
+        # 섹션 가중치 반영 점수 (코드 -1은 마지막 원소 1.0을 가리킴)
+        section_weights = weights["effective_section_weights"]
+        category_weights = weights["dynamic_category_weights"]
+        sec_w = np.array([section_weights.get(sec, 1.0) for sec in ALL_SECTIONS] + [1.0], dtype=np.float64)
+        cat_w = np.array([category_weights.get(cat, 1.0) for cat in ALL_CATEGORIES] + [1.0], dtype=np.float64)
+        row_sec_w = sec_w[self.section_codes[vids]]
+        row_cat_w = cat_w[self.category_codes[vids]]
+        base = scores if metric != "l2" else -scores
+        rank_scores = base * row_sec_w * row_cat_w
+
+        if options.group_by == "policy":
+            policy_rows = self._group_by_policy(rank_scores, vids, top_k, options)
+            if stage_counts is not None:
+                stage_counts["policy_groups"] = int(len(np.unique(self.policy_codes[vids])))
+            if timings is not None:
+                timings["rank"] = _elapsed_ms(t0)
+                t0 = time.perf_counter()
+            results = []
+            for code, policy_score, hit_count, members in policy_rows:
+                chunks = [
+                    self._result_row(int(vids[i]), scores[i], rank_scores[i], row_sec_w[i], row_cat_w[i], options)
+                    for i in members
+                ]
+                head: Dict[str, Any] = {"policy_id": str(self.policy_table[code])}
+                if options.return_text:
+                    head.update(title=chunks[0]["title"], category=chunks[0]["category"])
+                results.append(
+                    {
+                        **head,
+                        "policy_score": policy_score,
+                        "aggregation": options.policy_agg,
+                        "hit_count": hit_count,
+                        "chunks": chunks,
+                    }
+                )
+            if timings is not None:
+                timings["hydrate"] = _elapsed_ms(t0)
+            return results, dedup_skipped
+
+        # 상위 top_k 선택 후 정렬 (동점은 검색 점수 순서 유지)
+        order = _top_k_order(rank_scores, np.arange(len(vids)), top_k)
+        if timings is not None:
+            timings["rank"] = _elapsed_ms(t0)
+            t0 = time.perf_counter()
+
+        # vector_idx를 읽을 수 있는 결과로 복원
+        results: List[Dict[str, Any]] = [
+            self._result_row(int(vids[i]), scores[i], rank_scores[i], row_sec_w[i], row_cat_w[i], options)
+            for i in order.tolist()
+        ]
+        if timings is not None:
+            timings["hydrate"] = _elapsed_ms(t0)
+        return results, dedup_skipped
+
+    def _result_row(
+        self,
+        vidx: int,
+        score: float,
+        rank_score: float,
+        section_weight: float,
+        category_weight: float,
+        options: RetrievalOptions,
+    ) -> Dict[str, Any]:
+        if not options.return_text:
+            # 참조만 반환 (본문/메타 문자열은 hydrate()에서 필요한 만큼만 읽음)
+            return {
+                "vector_idx": vidx,
+                "chunk_ord": int(self.chunk_codes[vidx]),
                 "score": float(score),
-                "vector_idx": int(vidx),
-                "policy_id": row.get("policy_id"),
-                "chunk_id": row.get("chunk_id"),
-                "section": row.get("section"),
-                "title": row.get("title"),
-                "category": row.get("category"),
-                "text_preview": text[: args.preview_chars].strip(),
-                "text": text,
+                "rank_score": float(rank_score),
+                "section_weight": float(section_weight),
+                "category_weight": float(category_weight),
             }
+        chunk_id = decode(self.manifest, "chunk", vidx)
+        text = self.chunks.text(str(chunk_id))
+        return {
+            "score": float(score),
+            "vector_idx": vidx,
+            "policy_id": decode(self.manifest, "policy", vidx),
+            "chunk_id": chunk_id,
+            "section": decode(self.manifest, "section", vidx),
+            "title": decode(self.manifest, "title", vidx),
+            "category": decode(self.manifest, "category", vidx),
+            "text_preview": text[: options.preview_chars].strip(),
+            "text": text,
+            "rank_score": float(rank_score),
+            "section_weight": float(section_weight),
+            "category_weight": float(category_weight),
+        }
+
+    def hydrate(
+        self,
+        refs: List[Dict[str, Any]],
+        fields: tuple = HYDRATE_FIELDS,
+        max_chars: int = 0,
+        preview_chars: int = 300,
+    ) -> List[Dict[str, Any]]:
+
+        """
+        return_text=False 검색 결과(참조) -> 요청한 필드를 채운 결과
+        - fields: HYDRATE_FIELDS 중 필요한 것만 (본문이 필요 없으면 청크 저장소를 읽지 않음)
+        - text는 max_chars(0이면 전체), text_preview는 preview_chars까지만 잘라 담음
+        - 본문은 청크 ordinal별로 1번만 저장소 offset 위치에서 읽음 (정책 묶음 결과의 chunks도 채움)
+        - 원본 참조 dict는 수정하지 않음
+        """
+
+        unknown = [f for f in fields if f not in HYDRATE_FIELDS]
+        if unknown:
+            raise ValueError(f"지원하지 않는 hydrate 필드입니다: {unknown}")
+        meta_fields = {"policy_id": "policy", "chunk_id": "chunk", "section": "section", "title": "title", "category": "category"}
+        texts: Dict[int, str] = {}
+
+        def fill(ref: Dict[str, Any]) -> Dict[str, Any]:
+            row = dict(ref)
+            if "chunks" in ref:
+                row["chunks"] = [fill(chunk) for chunk in ref["chunks"]]
+                for f in ("title", "category"):
+                    if f in fields and row["chunks"]:
+                        row.setdefault(f, row["chunks"][0].get(f))
+                return row
+            vidx = int(ref["vector_idx"])
+            for f in fields:
+                if f in meta_fields:
+                    row[f] = decode(self.manifest, meta_fields[f], vidx)
+            if "text" in fields or "text_preview" in fields:
+                ordinal = int(self.chunk_codes[vidx])
+                if ordinal not in texts:
+                    # 본문 전체가 필요할 때만 전체를, 아니면 필요한 앞부분까지만 보관
+                    limit = max_chars if "text" in fields else preview_chars
+                    if limit > 0:
+                        limit = max(limit, preview_chars)
+                    texts[ordinal] = self.chunks.text_at(int(self._chunk_positions()[ordinal]), limit)
+                text = texts[ordinal]
+                if "text_preview" in fields:
+                    row["text_preview"] = text[:preview_chars].strip()
+                if "text" in fields:
+                    row["text"] = text[:max_chars] if max_chars > 0 else text
+            return row
+
+        return [fill(ref) for ref in refs]
+
+    def _chunk_positions(self) -> np.ndarray:
+        # 청크 ordinal(chunk_table 순서) -> 청크 저장소 위치 (최초 hydrate 때 1번 계산)
+        with self._lazy_lock:
+            if self._chunk_store_positions is None:
+                self._chunk_store_positions = self.chunks.positions(self.chunk_ids)
+            return self._chunk_store_positions
+
+    def _group_by_policy(
+        self,
+        rank_scores: np.ndarray,
+        vids: np.ndarray,
+        top_k: int,
+        options: RetrievalOptions,
+    ) -> List[tuple[int, float, int, List[int]]]:
+
+        """
+        청크 후보 -> 정책별 집계 점수 상위 top_k
+        - 정책 코드를 0..g-1로 다시 매기고 bincount/np.maximum.at 구간 집계로 한 번에 계산 (Python 루프 없음)
+        - max: 정책 내 최고 청크 점수
+        - sum_top_n: 정책 내 상위 chunks_per_policy개 청크 점수 합 (여러 근거가 맞는 정책 우대)
+        - softmax: 정책 내 softmax(score / temp) 가중 평균 (max와 평균 사이를 temp로 조절)
+        - 반환: (정책 코드, 집계 점수, 후보 청크 수, 정책 내 순위순 청크 위치 상위 chunks_per_policy개)
+        """
+
+        if options.policy_agg not in POLICY_AGGREGATIONS:
+            raise ValueError(f"지원하지 않는 정책 집계 방식입니다: {options.policy_agg}")
+        policy_codes = self.policy_codes[vids]
+        rows = np.flatnonzero(policy_codes >= 0)
+        if not len(rows) or top_k <= 0:
+            return []
+        groups, group_of = np.unique(policy_codes[rows], return_inverse=True)
+        num_groups = len(groups)
+        row_scores = rank_scores[rows]
+
+        # 정책 -> 점수 내림차순 정렬 (동점은 검색 순서), 정책 내 순위 = 위치 - 정책 시작 위치
+        order = np.lexsort((rows, -row_scores, group_of))
+        sorted_groups = group_of[order]
+        starts = np.searchsorted(sorted_groups, np.arange(num_groups))
+        rank_in_group = np.arange(len(order)) - starts[sorted_groups]
+        hit_counts = np.bincount(group_of, minlength=num_groups)
+
+        best = np.full(num_groups, -np.inf)
+        np.maximum.at(best, group_of, row_scores)
+        if options.policy_agg == "max":
+            agg = best
+        elif options.policy_agg == "sum_top_n":
+            top_n = rank_in_group < max(1, options.chunks_per_policy)
+            agg = np.bincount(sorted_groups[top_n], weights=row_scores[order][top_n], minlength=num_groups)
+        else:
+            temp = max(float(options.policy_softmax_temp), 1e-6)
+            w = np.exp((row_scores - best[group_of]) / temp)
+            agg = np.bincount(group_of, weights=w * row_scores, minlength=num_groups) / np.bincount(
+                group_of, weights=w, minlength=num_groups
+            )
+
+        # 상위 top_k 정책 (동점은 정책 최고 청크의 검색 순서)
+        first_row = rows[order[starts]]
+        picked = _top_k_order(agg, first_row, top_k)
+
+        per_policy = max(1, options.chunks_per_policy)
+        out: List[tuple[int, float, int, List[int]]] = []
+        for g in picked.tolist():
+            end = starts[g] + min(per_policy, int(hit_counts[g]))
+            members = rows[order[starts[g] : end]].tolist()
+            out.append((int(groups[g]), float(agg[g]), int(hit_counts[g]), members))
+        return out
+
+    def search(
+        self,
+        query: str,
+        filters: Optional[RetrievalFilters] = None,
+        top_k: int = 5,
+        options: Optional[RetrievalOptions] = None,
+    ) -> Dict[str, Any]:
+
+        """
+        - query: 질의 문자열
+        - results: 검색 결과 리스트
+        - debug: 가중치/필터 관련 진단 정보
+        """
+
+        return self.search_batch([query], [filters], top_k=top_k, options=options)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        filters_per_query: Optional[List[Optional[RetrievalFilters]]] = None,
+        top_k: int = 5,
+        options: Optional[RetrievalOptions] = None,
+    ) -> List[Dict[str, Any]]:
+
+        """
+        여러 질의를 한 번에 검색 (질의 순서대로 search()와 같은 payload 리스트 반환)
+        - 임베딩 요청 1회 + 필터 조합별 index.search 1회 (행렬 검색)
+        - 나이/지역 필터는 허용 vector_idx로 IDSelector를 만들어 FAISS 검색 단계에서 적용
+        - mode=sparse는 BM25만 사용(임베딩 호출 없음), hybrid는 dense/BM25 순위를 RRF로 결합
+        - 랭킹/중복 제거는 질의별로 메모리 내 산출물에서 수행
+        """
+
+        if not queries:
+            return []
+        options, filters_list = self._prepare_batch(queries, filters_per_query, options)
+        keys, payloads, missing = self._lookup_results(queries, filters_list, top_k, options)
+        if missing:
+            fresh = self._search_uncached(
+                [queries[i] for i in missing],
+                [filters_list[i] for i in missing],
+                top_k,
+                options,
+            )
+            self._store_results(keys, payloads, missing, fresh)
+        return self._emit_metrics([p for p in payloads if p is not None])
+
+    async def asearch(
+        self,
+        query: str,
+        filters: Optional[RetrievalFilters] = None,
+        top_k: int = 5,
+        options: Optional[RetrievalOptions] = None,
+    ) -> Dict[str, Any]:
+        return (await self.asearch_batch([query], [filters], top_k=top_k, options=options))[0]
+
+    async def asearch_batch(
+        self,
+        queries: List[str],
+        filters_per_query: Optional[List[Optional[RetrievalFilters]]] = None,
+        top_k: int = 5,
+        options: Optional[RetrievalOptions] = None,
+    ) -> List[Dict[str, Any]]:
+
+        """
+        search_batch의 비동기 버전 (반환 payload 동일)
+        - 질의 임베딩은 AsyncOpenAI로 await (HTTP 대기 중 다른 코루틴 진행)
+        - 필터/index.search/랭킹은 CPU 작업이라 기본 스레드 executor에서 실행
+        - 로드된 인덱스/매핑은 읽기 전용이라 여러 코루틴이 같은 서비스를 동시에 써도 됨
+        """
+
+        if not queries:
+            return []
+        options, filters_list = self._prepare_batch(queries, filters_per_query, options)
+        keys, payloads, missing = self._lookup_results(queries, filters_list, top_k, options)
+        if missing:
+            miss_queries = [queries[i] for i in missing]
+            q: Optional[np.ndarray] = None
+            embed_ms = 0.0
+            if options.mode != "sparse":
+                t0 = time.perf_counter()
+                q = await self.aembed_many(miss_queries)
+                embed_ms = _elapsed_ms(t0)
+            loop = asyncio.get_running_loop()
+            fresh = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    self._search_uncached,
+                    miss_queries,
+                    [filters_list[i] for i in missing],
+                    top_k,
+                    options,
+                    q=q,
+                    embed_ms=embed_ms,
+                ),
+            )
+            self._store_results(keys, payloads, missing, fresh)
+        return self._emit_metrics([p for p in payloads if p is not None])
+
+    def _prepare_batch(
+        self,
+        queries: List[str],
+        filters_per_query: Optional[List[Optional[RetrievalFilters]]],
+        options: Optional[RetrievalOptions],
+    ) -> tuple[RetrievalOptions, List[RetrievalFilters]]:
+        options = options or RetrievalOptions()
+        if options.mode not in RETRIEVAL_MODES:
+            raise ValueError(f"지원하지 않는 검색 모드입니다: {options.mode}")
+        if options.group_by not in GROUP_BY_MODES:
+            raise ValueError(f"지원하지 않는 결과 단위입니다: {options.group_by}")
+        if filters_per_query is None:
+            filters_per_query = [None] * len(queries)
+        if len(filters_per_query) != len(queries):
+            raise ValueError(f"filters_per_query 개수({len(filters_per_query)})가 질의 개수({len(queries)})와 다릅니다.")
+        filters_list = [f or RetrievalFilters() for f in filters_per_query]
+        if any(not f.is_empty() for f in filters_list) and not self.metadata_path.exists():
+            raise FileNotFoundError(f"메타데이터 파일이 없습니다: {self.metadata_path}")
+        self._warn_dup_min_len(options)
+        return options, filters_list
+
+    def _warn_dup_min_len(self, options: RetrievalOptions) -> None:
+        # 빌드 시점 군집이 있으면 --text-dedup-min-len은 dedup에 쓰이지 않음 (값마다 1번만 경고)
+        if options.disable_text_dedup or self.dup_group_codes is None:
+            return
+        min_len = options.text_dedup_min_len
+        if min_len == self.dup_min_len or min_len in self._dup_min_len_warned:
+            return
+        self._dup_min_len_warned.add(min_len)
+        print(
+            f"[warn] --text-dedup-min-len={min_len}은 무시됩니다: "
+            f"근사 중복 군집이 min_len={self.dup_min_len}으로 빌드되어 있습니다 (다른 값은 embedding 단계에서 다시 빌드).",
+            file=sys.stderr,
         )
 
-    # 섹션 가중치 반영 재정렬
-    for r in results:
-        r["rank_score"] = compute_rank_score(
-            raw_score=float(r["score"]),
-            metric=metric,
-            section=str(r.get("section") or ""),
-            section_weights=effective_section_weights,
-            category=str(r.get("category") or ""),
-            category_weights=dynamic_category_weights,
+    def _lookup_results(
+        self,
+        queries: List[str],
+        filters_list: List[RetrievalFilters],
+        top_k: int,
+        options: RetrievalOptions,
+    ) -> tuple[List[Any], List[Optional[Dict[str, Any]]], List[int]]:
+
+        # 결과 캐시 hit은 임베딩/FAISS 없이 그대로 반환, miss 위치만 돌려줘서 검색
+        if self.result_cache is None:
+            return [None] * len(queries), [None] * len(queries), list(range(len(queries)))
+        t0 = time.perf_counter()
+        keys = [self._result_cache_key(q, f, top_k, options) for q, f in zip(queries, filters_list)]
+        payloads: List[Optional[Dict[str, Any]]] = [self.result_cache.get(key) for key in keys]
+        lookup_ms = _elapsed_ms(t0)
+        for query, payload in zip(queries, payloads):
+            if payload is not None:
+                payload["query"] = query
+                payload["debug"]["result_cache"] = "hit"
+                payload["debug"]["timings_ms"] = {"result_cache": lookup_ms, "total": lookup_ms}
+        missing = [i for i, payload in enumerate(payloads) if payload is None]
+        return keys, payloads, missing
+
+    def _store_results(
+        self,
+        keys: List[Any],
+        payloads: List[Optional[Dict[str, Any]]],
+        missing: List[int],
+        fresh: List[Dict[str, Any]],
+    ) -> None:
+        for i, payload in zip(missing, fresh):
+            if self.result_cache is not None:
+                payload["debug"]["result_cache"] = "miss"
+                self.result_cache.put(keys[i], payload)
+            payloads[i] = payload
+
+    def _emit_metrics(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+
+        # 외부 지표 수집기(metrics_sink)에 질의별 단계 시간/후보 수 전달 (수집기 오류는 검색에 영향 주지 않음)
+        if self.metrics_sink is None:
+            return payloads
+        for payload in payloads:
+            debug = payload["debug"]
+            try:
+                self.metrics_sink(
+                    {
+                        "mode": debug.get("mode"),
+                        "result_cache": debug.get("result_cache"),
+                        "timings_ms": debug.get("timings_ms"),
+                        "stage_counts": debug.get("stage_counts"),
+                    }
+                )
+            except Exception as exc:
+                print(f"[warn] metrics_sink 호출 실패: {type(exc).__name__}: {exc}", file=sys.stderr)
+        return payloads
+
+    def _result_cache_key(
+        self,
+        query: str,
+        filters: RetrievalFilters,
+        top_k: int,
+        options: RetrievalOptions,
+    ) -> tuple:
+        return (
+            self.cache_namespace,
+            self.query_model,
+            normalize_query_text(query),
+            filters.key(),
+            int(top_k),
+            astuple(options),
         )
-        r["section_weight"] = effective_section_weights.get(str(r.get("section") or "").upper(), 1.0)
-        r["category_weight"] = dynamic_category_weights.get(str(r.get("category") or "").lower(), 1.0)
-    results.sort(key=lambda x: float(x["rank_score"]), reverse=True)
-    results = results[: args.top_k]
-
-    debug: Dict[str, Any] = {
-        "query_model": query_model,
-        "metric": metric,
-        "base_section_weights": base_section_weights,
-        "section_intent_scores": section_intent_scores,
-        "dynamic_section_weights": dynamic_section_weights,
-        "effective_section_weights": effective_section_weights,
-        "category_intent_scores": category_intent_scores,
-        "dynamic_category_weights": dynamic_category_weights,
-        "age": age,
-        "region_sido": region_sido,
-        "region_sigungu": region_sigungu,
-        "allowed_policy_ids_count": None if allowed_policy_ids is None else len(allowed_policy_ids),
-        "dedup_skipped": dedup_skipped,
-        "result_count": len(results),
-    }
-    return {"query": args.query, "results": results, "debug": debug}
+
+    def _search_uncached(
+        self,
+        queries: List[str],
+        filters_list: List[RetrievalFilters],
+        top_k: int,
+        options: RetrievalOptions,
+        q: Optional[np.ndarray] = None,
+        embed_ms: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+
+        # 단계별 시간(ms) : filter/embed/dense_search는 배치 전체에 대해 1번 재고 각 질의에 같은 값으로 기록
+        # q를 넘기면(비동기 경로에서 미리 임베딩) 임베딩 호출 없이 그 행렬과 embed_ms를 사용
+        batch_start = time.perf_counter()
+        batch_timings: Dict[str, float] = {}
+        t0 = batch_start
+        allowed_list = [
+            self.eligibility.allowed_policy_ids(**f.eligibility_kwargs())
+            for f in filters_list
+        ]
+        allowed_vector_ids = [
+            None if allowed is None else self._allowed_vector_ids(allowed) for allowed in allowed_list
+        ]
+        search_ks = [
+            self._search_k(top_k, options, self.num_vectors if ids is None else len(ids))
+            for ids in allowed_vector_ids
+        ]
+        # 샤드 인덱스면 질의별 검색 대상 샤드 (필터로 허용 벡터가 없는 샤드는 제외)
+        shard_lists = [
+            self._select_shards(query, options, ids) for query, ids in zip(queries, allowed_vector_ids)
+        ]
+        batch_timings["filter"] = _elapsed_ms(t0)
+
+        # 질의 임베딩 생성 (keyword 전용 sparse 모드는 임베딩 호출 없음)
+        use_dense = options.mode != "sparse"
+        use_sparse = options.mode in ("sparse", "hybrid")
+        empty = (np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64))
+        dense_hits: List[tuple[np.ndarray, np.ndarray]] = [empty] * len(queries)
+        if use_dense:
+            if q is None:
+                t0 = time.perf_counter()
+                q = self.embed_many(queries)
+                batch_timings["embed"] = _elapsed_ms(t0)
+            else:
+                batch_timings["embed"] = embed_ms
+            t0 = time.perf_counter()
+            dense_hits = self._dense_search(q, filters_list, allowed_vector_ids, search_ks, shard_lists)
+            batch_timings["dense_search"] = _elapsed_ms(t0)
+        batch_ms = round(_elapsed_ms(batch_start) + embed_ms, 4)
+
+        payloads: List[Dict[str, Any]] = []
+        for i, query in enumerate(queries):
+            query_start = time.perf_counter()
+            timings = dict(batch_timings)
+            filters = filters_list[i]
+            allowed_policy_ids = allowed_list[i]
+            allowed_count = self.num_vectors if allowed_vector_ids[i] is None else len(allowed_vector_ids[i])
+            dense_ids = self._dense_candidate_ids(allowed_vector_ids[i], shard_lists[i]) if use_dense else None
+            dense_count = allowed_count if dense_ids is None else len(dense_ids)
+            t0 = time.perf_counter()
+            weights = self._resolve_weights(query, options)
+            timings["weights"] = _elapsed_ms(t0)
+
+            # 반복 확장 : 중복 제거 후 top_k개가 안 남고 허용 후보가 남아 있으면 search_k를 2배로 늘림
+            # - dense : 이미 가져온 후보는 IDSelector로 제외하고 늘어난 만큼만 추가 검색해 기존 후보 뒤에 병합
+            # - sparse : 확장이 필요해지면 허용 후보 전체 BM25 순위를 1번만 구해 두고 search_k만큼 잘라 씀
+            search_k = search_ks[i]
+            dense_hit = dense_hits[i]
+            sparse_ranking: Optional[tuple[np.ndarray, np.ndarray]] = None
+            dense_stalled = False
+            search_rounds: List[Dict[str, Any]] = []
+            while True:
+                distances, indices = dense_hit
+                metric = self.metric
+                sparse_count = None
+                fetched = int((dense_hit[1] >= 0).sum())
+                if use_sparse:
+                    t0 = time.perf_counter()
+                    if sparse_ranking is None:
+                        sparse_scores, sparse_ids = self._sparse_search(query, allowed_vector_ids[i], search_k)
+                    else:
+                        sparse_scores, sparse_ids = (part[:search_k] for part in sparse_ranking)
+                    timings["sparse_search"] = timings.get("sparse_search", 0.0) + _elapsed_ms(t0)
+                    sparse_count = len(sparse_ids)
+                    metric = "bm25"
+                    distances, indices = sparse_scores, sparse_ids
+                    fetched = sparse_count if not use_dense else max(fetched, sparse_count)
+                    if use_dense:
+                        # dense/sparse 순위를 RRF로 결합 (점수 척도가 달라 순위만 사용)
+                        metric = "rrf"
+                        distances, indices = reciprocal_rank_fusion(
+                            [dense_hit[1], sparse_ids],
+                            rrf_k=options.rrf_k,
+                        )
+
+                stage_counts: Dict[str, Any] = {
+                    "batch_size": len(queries),
+                    "allowed_vectors": None if allowed_vector_ids[i] is None else len(allowed_vector_ids[i]),
+                    "dense_candidates": int((dense_hit[1] >= 0).sum()),
+                    "sparse_candidates": sparse_count,
+                    "fused_candidates": int((indices >= 0).sum()),
+                }
+                if self.shards:
+                    stage_counts["shards"] = list(shard_lists[i])
+                results, dedup_skipped = self._rank_candidates(
+                    distances=distances,
+                    indices=indices,
+                    metric=metric,
+                    weights=weights,
+                    top_k=top_k,
+                    options=options,
+                    timings=timings,
+                    stage_counts=stage_counts,
+                )
+
+                # 종료 판단 : satisfied(top_k개 남음), exhausted(허용 후보를 다 봄), max_rounds
+                # - dense : 지금까지 가져온 서로 다른 id 수가 허용 벡터 수에 닿아야 끝
+                #   (HNSW/IVF + IDSelector는 허용 벡터가 남아 있어도 요청보다 적게 반환하므로 반환 수로 판단하지 않음)
+                # - sparse 단독 : BM25는 점수가 있는 허용 청크를 모두 보므로 요청보다 적게 오면 끝
+                stop = ""
+                if use_dense:
+                    exhausted = dense_stalled or int((dense_hit[1] >= 0).sum()) >= dense_count
+                else:
+                    exhausted = search_k >= allowed_count or fetched < search_k
+                if len(results) >= top_k:
+                    stop = "satisfied"
+                elif exhausted:
+                    stop = "exhausted"
+                if not stop and len(search_rounds) + 1 >= max(1, options.max_search_rounds):
+                    stop = "max_rounds"
+                search_rounds.append(
+                    {
+                        "search_k": int(search_k),
+                        "fetched": fetched,
+                        "after_dedup": stage_counts.get("after_dedup"),
+                        "results": len(results),
+                        "stop": stop or "deepen",
+                    }
+                )
+                if stop:
+                    break
+
+                search_k = min(search_k * 2, allowed_count)
+                t0 = time.perf_counter()
+                if use_dense:
+                    seen = dense_hit[1][dense_hit[1] >= 0]
+                    more = self._dense_search(
+                        q[i : i + 1],
+                        [filters],
+                        [allowed_vector_ids[i]],
+                        [search_k - len(seen)],
+                        [shard_lists[i]],
+                        excluded_ids=[seen],
+                    )[0]
+                    if not (more[1] >= 0).any():
+                        # 필터된 HNSW 그래프에서 닿지 않는 허용 벡터가 남으면 남은 id만 정확 검색
+                        remaining = np.setdiff1d(
+                            np.flatnonzero(self.valid_vectors) if dense_ids is None else dense_ids, seen
+                        )
+                        more = self._exact_search(q[i], remaining, search_k - len(seen))
+                        dense_stalled = more is None
+                    if more is not None:
+                        dense_hit = self._merge_hits(dense_hit, more)
+                if use_sparse and sparse_ranking is None:
+                    sparse_ranking = self._sparse_search(query, allowed_vector_ids[i], allowed_count)
+                timings["deepen_search"] = timings.get("deepen_search", 0.0) + _elapsed_ms(t0)
+            stage_counts["results"] = len(results)
+            stage_counts["search_rounds"] = len(search_rounds)
+            timings["total"] = round(batch_ms + _elapsed_ms(query_start), 4)
+
+            debug: Dict[str, Any] = {
+                "query_model": self.query_model,
+                "metric": self.metric,
+                "index_kind": self.index_kind,
+                "mode": options.mode,
+                "group_by": options.group_by,
+                **weights,
+                "age": filters.age,
+                "region_sido": filters.region_sido,
+                "region_sigungu": filters.region_sigungu,
+                "eligibility_filters": {
+                    "monthly_income_m": filters.monthly_income_m,
+                    "assets_m": filters.assets_m,
+                    "household_type": filters.household_type,
+                    "rent_type": filters.rent_type,
+                    "owns_house": filters.owns_house,
+                },
+                "allowed_policy_ids_count": None if allowed_policy_ids is None else len(allowed_policy_ids),
+                "allowed_vector_count": None if allowed_vector_ids[i] is None else len(allowed_vector_ids[i]),
+                "sparse_candidates": sparse_count,
+                "dedup_skipped": dedup_skipped,
+                "search_rounds": search_rounds,
+                "result_count": len(results),
+                "embedding_cache": None if self.embedding_cache is None else self.embedding_cache.stats(),
+                "timings_ms": timings,
+                "stage_counts": stage_counts,
+                "load_timings_ms": self.load_timings_ms,
+            }
+            payloads.append({"query": query, "results": results, "debug": debug})
+        return payloads
+
+    def _dense_search(
+        self,
+        q: np.ndarray,
+        filters_list: List[RetrievalFilters],
+        allowed_vector_ids: List[Optional[np.ndarray]],
+        search_ks: List[int],
+        shard_lists: Optional[List[tuple]] = None,
+        excluded_ids: Optional[List[Optional[np.ndarray]]] = None,
+    ) -> List[tuple[np.ndarray, np.ndarray]]:
+
+        # 필터 조합(+검색 샤드)이 같은 질의끼리 묶어 FAISS 검색 : distances(점수), indices(vector_idx) 반환
+        # excluded_ids : 질의별로 이미 가져온 vector_idx (확장 검색에서 다시 가져오지 않음, 질의별로 따로 검색)
+        if shard_lists is None:
+            shard_lists = [()] * len(filters_list)
+        if excluded_ids is None:
+            excluded_ids = [None] * len(filters_list)
+        groups: Dict[tuple, List[int]] = {}
+        for i, f in enumerate(filters_list):
+            key = (f.key(), shard_lists[i]) if excluded_ids[i] is None else (i,)
+            groups.setdefault(key, []).append(i)
+
+        empty = (np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64))
+        hits: List[tuple[np.ndarray, np.ndarray]] = [empty] * len(filters_list)
+        for members in groups.values():
+            group_k = max(search_ks[i] for i in members)
+            if group_k <= 0:
+                continue
+            ids = allowed_vector_ids[members[0]]
+            excluded = excluded_ids[members[0]]
+            fetch_k = group_k * self.refine_factor
+            if self.shards:
+                distances, indices = self._sharded_search(q[members], fetch_k, ids, shard_lists[members[0]], excluded)
+            else:
+                params = None
+                selector = self._id_selector(ids, excluded)
+                if selector is not None:
+                    num_allowed = (int(self.index.ntotal) if ids is None else len(ids)) - (0 if excluded is None else len(excluded))
+                    params = self._search_parameters(self.index, selector, self.search_params, fetch_k, num_allowed)
+                distances, indices = self.index.search(q[members], fetch_k, params=params)
+            if self.refine_factor > 1:
+                vectors = self._get_refine_vectors()
+                for row, i in enumerate(members):
+                    hits[i] = refine_candidates(vectors, q[i], indices[row], self.metric, search_ks[i])
+                continue
+            for row, i in enumerate(members):
+                hits[i] = (distances[row][: search_ks[i]], indices[row][: search_ks[i]])
+        return hits
+
+    def _select_shards(self, query: str, options: RetrievalOptions, allowed_ids: Optional[np.ndarray]) -> tuple:
+
+        """
+        질의별 검색 대상 샤드 이름 (단일 인덱스면 빈 tuple)
+        - all: 모든 샤드 (결과는 단일 인덱스와 같음)
+        - intent: 질의 키워드로 드러난 카테고리 샤드만 (의도가 없으면 전체)
+        - 필터 허용 벡터가 하나도 없는 샤드는 검색하지 않음
+        """
+
+        if not self.shards:
+            return ()
+        if options.shard_search not in SHARD_SEARCH_MODES:
+            raise ValueError(f"지원하지 않는 샤드 검색 범위입니다: {options.shard_search}")
+        names = list(self.shards)
+        if options.shard_search == "intent":
+            category_scores = infer_intent_scores(query)[1]
+            intended = [name for name in names if category_scores.get(name, 0) > 0]
+            names = intended or names
+        if allowed_ids is not None:
+            present = set(np.unique(self.category_codes[allowed_ids]).tolist())
+            names = [name for name in names if self.shard_codes[name] in present]
+        return tuple(names)
+
+    def _sharded_search(
+        self,
+        qm: np.ndarray,
+        k: int,
+        allowed_ids: Optional[np.ndarray],
+        names: tuple,
+        excluded_ids: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+
+        # 샤드별 상위 k (스레드 풀에서 동시 실행) -> 질의별로 정렬된 샤드 결과를 heap 병합해 상위 k
+        def search_shard(name: str) -> tuple[np.ndarray, np.ndarray]:
+            index = self.shards[name]
+            params = None
+            # 해당 샤드 카테고리의 허용 id만 selector로 (샤드마다 새 params: 동시 검색 시 공유하지 않음)
+            shard_ids = None
+            if allowed_ids is not None:
+                shard_ids = allowed_ids[self.category_codes[allowed_ids] == self.shard_codes[name]]
+            shard_k = max(1, min(k, int(index.ntotal)))
+            selector = self._id_selector(shard_ids, excluded_ids)
+            if selector is not None:
+                # 제외 id는 다른 샤드 것도 섞여 있으므로 허용 수는 샤드 허용 id 기준
+                num_allowed = int(index.ntotal) if shard_ids is None else len(shard_ids)
+                params = self._search_parameters(index, selector, self.shard_search_params[name], shard_k, num_allowed)
+            return index.search(qm, shard_k, params=params)
+
+        if self._shard_pool is not None and len(names) > 1:
+            shard_hits = list(self._shard_pool.map(search_shard, names))
+        else:
+            shard_hits = [search_shard(name) for name in names]
+
+        higher_is_better = self.metric != "l2"
+        distances = np.full((len(qm), k), -np.inf if higher_is_better else np.inf, dtype=np.float32)
+        indices = np.full((len(qm), k), -1, dtype=np.int64)
+        sign = -1.0 if higher_is_better else 1.0
+        for row in range(len(qm)):
+            streams = [zip(d[row].tolist(), i[row].tolist()) for d, i in shard_hits]
+            merged = heapq.merge(*streams, key=lambda hit: sign * hit[0])
+            top = list(itertools.islice((hit for hit in merged if hit[1] >= 0), k))
+            if top:
+                distances[row, : len(top)] = [hit[0] for hit in top]
+                indices[row, : len(top)] = [hit[1] for hit in top]
+        return distances, indices
+
+    def _dense_candidate_ids(self, allowed_ids: Optional[np.ndarray], names: tuple) -> Optional[np.ndarray]:
+
+        # dense 검색이 돌려줄 수 있는 vector_idx = 필터 허용 ∩ 인덱스에 든 벡터 ∩ 검색 샤드 (필터 없이 전체면 None)
+        partial_shards = bool(self.shards) and len(names) < len(self.shards)
+        if allowed_ids is None and self._indexed_vectors is None and not partial_shards:
+            return None
+        ids = np.flatnonzero(self.valid_vectors) if allowed_ids is None else allowed_ids
+        if self._indexed_vectors is not None:
+            ids = ids[self._indexed_vectors[ids]]
+        if partial_shards:
+            ids = ids[np.isin(self.category_codes[ids], [self.shard_codes[name] for name in names])]
+        return ids
+
+    def _exact_search(self, qv: np.ndarray, ids: np.ndarray, k: int) -> Optional[tuple[np.ndarray, np.ndarray]]:
+
+        """
+        지정한 vector_idx만 정확한 점수로 상위 k (근사 인덱스 확장 검색이 더 가져오지 못할 때 대체)
+        - 압축 인덱스는 재정렬용 원본 벡터, 그 외는 인덱스에서 복원한 벡터 사용
+        - 복원을 지원하지 않는 인덱스(direct map 없는 IVF)면 None
+        """
+
+        if not len(ids) or k <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        if self.refine_factor > 1:
+            return refine_candidates(self._get_refine_vectors(), qv, ids, self.metric, k)
+        try:
+            if self.index is not None:
+                rows = self.index.reconstruct_batch(ids)
+            else:
+                rows = np.empty((len(ids), len(qv)), dtype=np.float32)
+                codes = self.category_codes[ids]
+                for name, index in self.shards.items():
+                    mask = codes == self.shard_codes[name]
+                    if mask.any():
+                        rows[mask] = index.reconstruct_batch(ids[mask])
+        except RuntimeError:
+            return None
+        scores, pos = refine_candidates(rows, qv, np.arange(len(ids)), self.metric, k)
+        return scores, ids[pos]
+
+    @staticmethod
+    def _id_selector(allowed_ids: Optional[np.ndarray], excluded_ids: Optional[np.ndarray]) -> Any:
+        # 허용 id 집합 AND 이미 가져온 id 제외 (둘 다 없으면 None = selector 없이 검색)
+        selector = None if allowed_ids is None else faiss.IDSelectorBatch(allowed_ids)
+        if excluded_ids is not None and len(excluded_ids):
+            unseen = faiss.IDSelectorNot(faiss.IDSelectorBatch(excluded_ids))
+            selector = unseen if selector is None else faiss.IDSelectorAnd(selector, unseen)
+        return selector
+
+    def _merge_hits(
+        self,
+        first: tuple[np.ndarray, np.ndarray],
+        more: tuple[np.ndarray, np.ndarray],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # 기존 후보 + 추가 검색 후보를 검색 점수순으로 병합 (동점은 기존 후보 먼저, 한 번에 넓게 검색한 결과와 같은 순서)
+        distances = np.concatenate([first[0][first[1] >= 0], more[0][more[1] >= 0]])
+        indices = np.concatenate([first[1][first[1] >= 0], more[1][more[1] >= 0]])
+        order = np.argsort(distances if self.metric == "l2" else -distances, kind="stable")
+        return distances[order], indices[order]
+
+    @staticmethod
+    def _search_parameters(index: Any, selector: Any, search_params: Dict[str, int], k: int, num_allowed: int) -> Any:
+
+        """
+        IDSelector 검색 파라미터
+        - params를 넘기면 인덱스 기본 nprobe/efSearch 대신 params 값이 쓰이므로 종류별로 함께 지정
+          (flat + pq/opq도 IVF1 구조라 nprobe가 기록됨)
+        - 근사 인덱스는 selector를 통과하는 벡터만 결과에 넣으므로 기록값 그대로면 허용 벡터가 충분해도 k개보다 적게 반환
+          - HNSW: efSearch를 k 이상으로 (탐색 후보 목록이 결과 수의 상한)
+          - IVF: 허용 비율이 작을수록 nprobe를 그 역수만큼 늘림 (클러스터 1개에 든 허용 벡터 수 감소 보정, 최대 nlist)
+        """
+
+        if "nprobe" in search_params:
+            nprobe = search_params["nprobe"]
+            ntotal = int(index.ntotal)
+            if 0 < num_allowed < ntotal:
+                nlist = int(faiss.extract_index_ivf(index).nlist)
+                nprobe = min(nlist, max(nprobe, math.ceil(nprobe * ntotal / num_allowed)))
+            return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+        if "efSearch" in search_params:
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(search_params["efSearch"], int(k)))
+        return faiss.SearchParameters(sel=selector)
+
+    def _get_refine_vectors(self) -> np.ndarray:
+        with self._lazy_lock:
+            if self._refine_vectors is None:
+                if self.refine_vectors_path is None or not self.refine_vectors_path.exists():
+                    raise FileNotFoundError(f"재정렬용 원본 벡터 파일이 없습니다: {self.refine_vectors_path}")
+                # 전체를 메모리에 올리지 않고 후보 행만 읽음
+                self._refine_vectors = np.load(self.refine_vectors_path, mmap_mode="r")
+            return self._refine_vectors
+
+    def _get_sparse(self) -> SparseIndex:
+        with self._lazy_lock:
+            if self._sparse is None:
+                sparse = SparseIndex.load(self.sparse_index_path)
+                # sparse 청크 ordinal -> vector_idx (임베딩되지 않은 청크는 -1)
+                vidx_of_code = np.full(len(self.chunk_ids), -1, dtype=np.int64)
+                vidxs = np.flatnonzero(self.chunk_codes >= 0)
+                vidx_of_code[self.chunk_codes[vidxs]] = vidxs
+                chunk_sort = np.argsort(self.chunk_ids, kind="stable")
+                table = self.chunk_ids[chunk_sort]
+                query = np.asarray(sparse.chunk_ids, dtype=str)
+                self._sparse_vector_ids = np.full(len(query), -1, dtype=np.int64)
+                if len(table) and len(query):
+                    pos = np.minimum(np.searchsorted(table, query), len(table) - 1)
+                    hit = table[pos] == query
+                    self._sparse_vector_ids[hit] = vidx_of_code[chunk_sort[pos[hit]]]
+                # vector_idx 변환표를 만든 뒤에 공개 (다른 스레드가 반쯤 만든 상태를 보지 않도록)
+                self._sparse = sparse
+            return self._sparse
+
+    def _sparse_search(
+        self,
+        query: str,
+        allowed_vector_ids: Optional[np.ndarray],
+        k: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+
+        # BM25 상위 k개 -> (점수, vector_idx)
+        sparse = self._get_sparse()
+        doc_vids = self._sparse_vector_ids
+        allowed = doc_vids >= 0
+        if allowed_vector_ids is not None:
+            vec_mask = np.zeros(len(self.valid_vectors), dtype=bool)
+            vec_mask[allowed_vector_ids] = True
+            allowed &= vec_mask[np.where(allowed, doc_vids, 0)]
+        scores, docs = sparse.search(query, k, allowed=allowed)
+        return scores, doc_vids[docs]
+
+
+# 경로 조합별로 로드된 서비스를 프로세스 내에서 재사용
+_SERVICES: Dict[tuple, RetrieverService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+# 결과 캐시는 서비스를 다시 만들어도(인덱스 재빌드 후 재로딩 등) 공유, key의 index_version으로 구분
+_RESULT_CACHES: Dict[tuple, ResultCache] = {}
+_RESULT_CACHES_LOCK = threading.Lock()
+
+
+def get_result_cache(max_items: int = 256, ttl_seconds: float = 600.0) -> ResultCache:
+    key = (int(max_items), float(ttl_seconds))
+    with _RESULT_CACHES_LOCK:
+        cache = _RESULT_CACHES.get(key)
+        if cache is None:
+            cache = ResultCache(max_items=max_items, ttl_seconds=ttl_seconds)
+            _RESULT_CACHES[key] = cache
+    return cache
+
+
+def get_retriever_service(args: Any) -> RetrieverService:
+    key = (
+        str(args.index),
+        str(args.index_log),
+        str(args.mapping),
+        str(args.chunks),
+        str(args.metadata),
+        str(getattr(args, "eligibility_index", DEFAULT_ELIGIBILITY_INDEX_PATH)),
+        str(getattr(args, "sparse_index", DEFAULT_SPARSE_INDEX_PATH)),
+        getattr(args, "query_model", ""),
+        getattr(args, "api_key_env", "OPENAI_API_KEY"),
+        None if getattr(args, "disable_query_cache", False) else str(getattr(args, "query_cache_dir", DEFAULT_QUERY_CACHE_DIR)),
+        getattr(args, "query_cache_size", 1024),
+        bool(getattr(args, "disable_index_mmap", False)),
+        None
+        if getattr(args, "disable_result_cache", False)
+        else (getattr(args, "result_cache_size", 256), getattr(args, "result_cache_ttl", 600.0)),
+    )
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(key)
+        if service is None:
+            service = RetrieverService.from_args(args)
+            _SERVICES[key] = service
+    return service
+
+
+def run_retrieval(args: argparse.Namespace) -> Dict[str, Any]:
+
+    # 기존 호출부 호환용 : args -> 캐시된 RetrieverService.search
+    service = get_retriever_service(args)
+    return service.search(
+        args.query,
+        filters=RetrievalFilters.from_args(args),
+        top_k=args.top_k,
+        options=RetrievalOptions.from_args(args),
+    )
+
+
+async def aretrieve(args: Any) -> Dict[str, Any]:
+
+    """
+    run_retrieval의 비동기 버전 (Streamlit/API 서버 등 이벤트 루프 안에서 호출)
+    - 서비스 로딩(첫 호출)은 스레드에서 수행하고 이후 호출은 캐시된 서비스를 공유
+    - 여러 코루틴이 동시에 호출해도 인덱스는 프로세스에 1번만 로드
+    """
+
+    loop = asyncio.get_running_loop()
+    service = await loop.run_in_executor(None, get_retriever_service, args)
+    return await service.asearch(
+        args.query,
+        filters=RetrievalFilters.from_args(args),
+        top_k=args.top_k,
+        options=RetrievalOptions.from_args(args),
+    )
+
+
+def run_retrieval_batch(
+    args: Any,
+    queries: List[str],
+    filters_per_query: Optional[List[Optional[RetrievalFilters]]] = None,
+) -> List[Dict[str, Any]]:
+
+    # 오프라인 리포트/다중 질의 확장용 : args의 경로/옵션으로 여러 질의를 한 번에 검색
+    service = get_retriever_service(args)
+    return service.search_batch(
+        queries,
+        filters_per_query=filters_per_query,
+        top_k=args.top_k,
+        options=RetrievalOptions.from_args(args),
+    )
 
 
 def main() -> None:
@@ -501,8 +2237,14 @@ def main() -> None:
     if args.json:
         print(json.dumps(results, ensure_ascii=False, indent=2))
         return
+    if not args.return_text:
+        # 참조 결과는 출력에 필요한 필드(미리보기까지)만 채움
+        fields = tuple(f for f in HYDRATE_FIELDS if f != "text")
+        results = get_retriever_service(args).hydrate(results, fields=fields, preview_chars=args.preview_chars)
 
     print(f"[query] {args.query}")
+    if debug["mode"] != "dense":
+        print(f"[mode] {debug['mode']} (sparse_candidates= {debug['sparse_candidates']})")
     # print(f"[model] {debug['query_model']}")
     # print(f"[metric] {debug['metric']}")
     if not args.disable_dynamic_section_weight and not args.disable_section_weight:
@@ -520,8 +2262,30 @@ def main() -> None:
             f", region(시/군/구)= {debug['region_sigungu'] or '-'}"
             f", allowed_policies= {debug['allowed_policy_ids_count']}"
         )
+        struct = {k: v for k, v in debug["eligibility_filters"].items() if v not in (None, "")}
+        if struct:
+            print(f"[eligibility_filter] {struct}")
     print(f"[dedup_skipped] {debug['dedup_skipped']}")
+    if debug["embedding_cache"] is not None:
+        cache_stats = debug["embedding_cache"]
+        print(f"[embedding_cache] hits= {cache_stats['hits']}, misses= {cache_stats['misses']}")
+    if "result_cache" in debug:
+        print(f"[result_cache] {debug['result_cache']}")
+    print("[timings_ms] " + " ".join(f"{k}={v:.2f}" for k, v in debug["timings_ms"].items()))
     print(f"[result_count] {debug['result_count']}")
+    if debug["group_by"] == "policy":
+        for i, p in enumerate(results, start=1):
+            print("=" * 80)
+            print(
+                f"{i}. policy_score={p['policy_score']:.4f} ({p['aggregation']}) "
+                f"hits={p['hit_count']} policy_id={p['policy_id']}"
+            )
+            print(f"정책명: {p['title']}")
+            for r in p["chunks"]:
+                print("-" * 80)
+                print(f"score={r['score']:.4f} rank={r['rank_score']:.4f} chunk_id={r['chunk_id']} section={r['section']}")
+                print(r["text_preview"])
+        return
     for i, r in enumerate(results, start=1):
         print("-" * 80)
         print(
@@ -0,0 +1,145 @@
+# 한국어 문자 n-gram 기반 sparse(BM25) 인덱스 코드
+
+"""
+입력
+- chunking 단계의 청크 리스트 (chunk_id, text)
+
+출력
+- .npz : CSR 형태 역색인
+  - vocab: n-gram 사전 (정렬)
+  - indptr: vocab별 posting 시작 위치 (len = vocab + 1)
+  - doc_ids / tfs: posting (청크 ordinal, 등장 횟수)
+  - doc_len: 청크별 n-gram 개수
+  - chunk_ids: 청크 ordinal -> chunk_id
+
+정책명("행복주택", "전세임대")처럼 정확한 표현을 임베딩 호출 없이 찾기 위한 용도
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+NGRAM_SIZES = (2, 3)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_SPLIT_RE = re.compile(r"[^0-9a-z가-힣]+")
+
+
+# 소문자화 후 한글/영문/숫자 토큰 단위로 문자 bigram/trigram 생성
+def char_ngrams(text: str, sizes: Tuple[int, ...] = NGRAM_SIZES) -> List[str]:
+    out: List[str] = []
+    for token in TOKEN_SPLIT_RE.split((text or "").lower()):
+        if not token:
+            continue
+        if len(token) < min(sizes):
+            continue
+        for n in sizes:
+            for i in range(len(token) - n + 1):
+                out.append(token[i : i + n])
+    return out
+
+
+def build_sparse_index(chunks: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    doc_len = np.zeros(len(chunks), dtype=np.int32)
+    for ordinal, chunk in enumerate(chunks):
+        counts = Counter(char_ngrams(str(chunk.get("text", ""))))
+        doc_len[ordinal] = sum(counts.values())
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((ordinal, tf))
+
+    vocab = sorted(postings.keys())
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    for i, term in enumerate(vocab):
+        indptr[i + 1] = indptr[i] + len(postings[term])
+
+    doc_ids = np.empty(int(indptr[-1]), dtype=np.int32)
+    tfs = np.empty(int(indptr[-1]), dtype=np.float32)
+    for i, term in enumerate(vocab):
+        rows = postings[term]
+        doc_ids[indptr[i] : indptr[i + 1]] = [d for d, _ in rows]
+        tfs[indptr[i] : indptr[i + 1]] = [tf for _, tf in rows]
+
+    return {
+        "vocab": np.asarray(vocab, dtype=str),
+        "indptr": indptr,
+        "doc_ids": doc_ids,
+        "tfs": tfs,
+        "doc_len": doc_len,
+        "chunk_ids": np.asarray([str(c.get("chunk_id")) for c in chunks], dtype=str),
+    }
+
+
+def save_sparse_index(path: Path, arrays: Dict[str, np.ndarray]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **arrays)
+
+
+class SparseIndex:
+
+    """
+    CSR 역색인 위 BM25 검색
+    - search(): 질의 n-gram posting만 훑어 청크 ordinal별 점수를 누적
+    - allowed 마스크로 필터 통과 청크만 반환
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.vocab = arrays["vocab"]
+        self.indptr = arrays["indptr"]
+        self.doc_ids = arrays["doc_ids"]
+        self.tfs = arrays["tfs"]
+        self.doc_len = arrays["doc_len"].astype(np.float32)
+        self.chunk_ids: List[str] = [str(x) for x in arrays["chunk_ids"].tolist()]
+        self.num_docs = len(self.chunk_ids)
+        self.avgdl = float(self.doc_len.mean()) if self.num_docs else 0.0
+        self._term_index = {str(t): i for i, t in enumerate(self.vocab.tolist())}
+
+    @classmethod
+    def load(cls, path: Path) -> "SparseIndex":
+        if not path.exists():
+            raise FileNotFoundError(f"sparse 인덱스 파일이 없습니다: {path}")
+        with np.load(path) as data:
+            return cls({k: data[k] for k in data.files})
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(self.num_docs, dtype=np.float32)
+        if not self.num_docs:
+            return out
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_len / max(self.avgdl, 1e-6))
+        for term in set(char_ngrams(query)):
+            t = self._term_index.get(term)
+            if t is None:
+                continue
+            start, end = int(self.indptr[t]), int(self.indptr[t + 1])
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end]
+            df = end - start
+            idf = math.log(1.0 + (self.num_docs - df + 0.5) / (df + 0.5))
+            out[docs] += idf * tf * (BM25_K1 + 1.0) / (tf + norm[docs])
+        return out
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+
+        # 상위 k개 (점수 내림차순, 동점은 청크 ordinal 순), 점수 0인 청크는 제외
+        # k번째 점수와 같은 동점은 모두 남긴 뒤 정렬해서 자름 (argpartition은 경계 동점 중 임의로 고름)
+        scores = self.scores(query)
+        if allowed is not None:
+            scores = np.where(allowed, scores, 0.0)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            if k <= 0:
+                candidates = candidates[:0]
+            else:
+                kth = np.partition(-scores[candidates], k - 1)[k - 1]
+                candidates = candidates[-scores[candidates] <= kth]
+        order = candidates[np.lexsort((candidates, -scores[candidates]))][: max(k, 0)]
+        return scores[order], order
@@ -12,7 +12,8 @@ class Regions:
 class EligibilityStruct:
     age_min: Optional[int] = None
     age_max: Optional[int] = None
-    income_max_m: Optional[int] = None # 월 소득 상한 (만 단위)
+    income_max_m: Optional[int] = None # 소득 상한 (만 단위, 기간은 income_period)
+    income_period: Optional[str] = None # income_max_m 기간 단위 ("month" / "year", 원문에 표기가 없으면 None)
     asset_max_m: Optional[int] = None # 월 자산 상한 (만 단위)
 
     household_types: List[str] = field(default_factory=list) # 대상 가구 유형 (예: "청년", "신혼", "다자녀", "1인 가구" 등)
@@ -0,0 +1,45 @@
+# pytest 공통 설정
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.housing_agent.benchmarks.retrieval_benchmark import build_corpus, build_index, hash_embedding
+from src.housing_agent.pipeline.retriever import RetrieverService
+
+# data/processed 산출물을 직접 출력해 보는 확인용 스크립트 (pytest 수집 대상 아님)
+collect_ignore = ["chunking_test.py", "output_test.py"]
+
+EMBED_DIM = 64
+
+
+@pytest.fixture(scope="session")
+def bench_corpus(tmp_path_factory: pytest.TempPathFactory) -> Dict[str, Any]:
+    # 벤치마크와 같은 합성 정책 산출물 (근사 중복 군집 포함) + flat 인덱스
+    corpus = build_corpus(tmp_path_factory.mktemp("corpus"), num_policies=40, dim=EMBED_DIM, seed=7, near_dup=True)
+    corpus["index"] = build_index(corpus, "flat", "none")
+    return corpus
+
+
+@pytest.fixture(scope="session")
+def retriever(bench_corpus: Dict[str, Any]) -> RetrieverService:
+    # 가짜 임베딩(문자 bigram hashing)을 주입한 서비스 (OpenAI 호출/질의 캐시/결과 캐시 없음)
+    paths = bench_corpus["paths"]
+    return RetrieverService(
+        index_path=bench_corpus["index"]["index"],
+        index_log_path=bench_corpus["index"]["index_log"],
+        mapping_path=paths["mapping"],
+        chunk_path=paths["chunks"],
+        metadata_path=paths["metadata"],
+        eligibility_index_path=paths["eligibility_index"],
+        sparse_index_path=paths["sparse_index"],
+        embedder=lambda queries: [hash_embedding(q, EMBED_DIM) for q in queries],
+    )
@@ -0,0 +1,185 @@
+# 주거 의견서 데몬 소켓 프로토콜/어댑터 테스트 : 메시지 경계, 오류 처리, 데몬이 없을 때 프로세스 내 실행 대체
+
+from __future__ import annotations
+
+import argparse
+import functools
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from integrations import housing_adapter
+from src.housing_agent.pipeline import daemon_protocol, housing_daemon
+
+
+def test_round_trip_keeps_message_boundaries() -> None:
+    a, b = socket.socketpair()
+    with a, b:
+        messages = [{"op": "ping"}, {"op": "housing", "user_profile": {"name": "홍길동", "age": 29}}, {}]
+        for m in messages:
+            daemon_protocol.send_message(a, m)
+        assert [daemon_protocol.recv_message(b) for _ in messages] == messages
+        a.shutdown(socket.SHUT_WR)
+        assert daemon_protocol.recv_message(b) is None  # 메시지 경계에서 닫힘
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b"\x00\x00",  # 헤더 도중 끊김
+        daemon_protocol.HEADER.pack(10) + b"{}",  # 본문 도중 끊김
+        daemon_protocol.HEADER.pack(daemon_protocol.MAX_MESSAGE_BYTES + 1),  # 크기 초과
+        daemon_protocol.HEADER.pack(3) + b"{x}",  # JSON 오류
+        daemon_protocol.HEADER.pack(2) + b"[]",  # dict 아님
+    ],
+)
+def test_malformed_messages_raise_value_error(raw: bytes) -> None:
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(raw)
+        a.shutdown(socket.SHUT_WR)
+        with pytest.raises(ValueError):
+            daemon_protocol.recv_message(b)
+
+
+def test_send_rejects_oversized_message(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(daemon_protocol, "MAX_MESSAGE_BYTES", 16)
+    a, b = socket.socketpair()
+    with a, b:
+        with pytest.raises(ValueError):
+            daemon_protocol.send_message(a, {"text": "x" * 32})
+
+
+def test_missing_socket_is_unavailable(tmp_path: Path) -> None:
+    with pytest.raises(daemon_protocol.DaemonUnavailableError):
+        daemon_protocol.request({"op": "ping"}, socket_path=tmp_path / "none.sock", timeout=1.0)
+
+
+def test_permission_denied_socket_is_unavailable(monkeypatch: pytest.MonkeyPatch) -> None:
+    # 다른 사용자 소유 소켓 등 접근 권한이 없으면 데몬이 없는 것과 같게 처리 (root는 권한 검사를 건너뛰므로 connect를 대체)
+    def denied(self: socket.socket, address: Any) -> None:
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(daemon_protocol.socket, "socket", type("DeniedSocket", (socket.socket,), {"connect": denied}))
+    with pytest.raises(daemon_protocol.DaemonUnavailableError):
+        daemon_protocol.connect(Path("/unused.sock"), timeout=1.0)
+
+
+@pytest.fixture()
+def silent_socket(tmp_path: Path) -> Iterator[Path]:
+    # 연결은 받지만 응답하지 않는 소켓 (멈춘 데몬)
+    path = tmp_path / "silent.sock"
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen(1)
+    with server:
+        yield path
+
+
+def test_request_times_out_on_silent_daemon(silent_socket: Path) -> None:
+    with pytest.raises(TimeoutError, match="응답 대기 시간"):
+        daemon_protocol.request({"op": "ping"}, socket_path=silent_socket, timeout=0.2)
+
+
+@pytest.fixture()
+def daemon(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[housing_daemon.HousingDaemon]:
+    # 의견서 생성은 가짜로 바꾼 데몬 (인덱스/OpenAI 없이 소켓 처리만 확인)
+    def fake_opinion(args: argparse.Namespace, user_profile: Dict[str, Any]) -> Dict[str, Any]:
+        if user_profile.get("fail"):
+            raise ValueError("생성 실패")
+        return {"housing_memo": {"summary": f"{user_profile.get('name')} 요약"}, "debug_verbose": args.debug_verbose}
+
+    monkeypatch.setattr(housing_daemon, "run_housing_opinion", fake_opinion)
+    server = housing_daemon.HousingDaemon(tmp_path / "d.sock", argparse.Namespace(debug_verbose=False), max_concurrency=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=5)
+
+
+def test_daemon_serves_requests(daemon: housing_daemon.HousingDaemon) -> None:
+    request = functools.partial(daemon_protocol.request, socket_path=daemon.socket_path, timeout=5.0)
+    assert request({"op": "ping"})["served"] == 0
+    result = request({"op": "housing", "user_profile": {"name": "A"}, "debug_verbose": True})
+    assert result == {"housing_memo": {"summary": "A 요약"}, "debug_verbose": True}
+    # 요청별 debug_verbose가 공통 옵션에 남지 않음
+    assert daemon.opinion_args.debug_verbose is False
+    with pytest.raises(RuntimeError, match="생성 실패"):
+        request({"op": "housing", "user_profile": {"fail": True}})
+    with pytest.raises(RuntimeError, match="지원하지 않는 요청"):
+        request({"op": "unknown"})
+    assert request({"op": "ping"})["served"] == 1
+
+    # 한 연결에서 여러 번 주고받기
+    with daemon_protocol.connect(daemon.socket_path, timeout=5.0) as sock:
+        for name in ("B", "C"):
+            daemon_protocol.send_message(sock, {"op": "housing", "user_profile": {"name": name}})
+            assert daemon_protocol.recv_message(sock)["result"]["housing_memo"]["summary"] == f"{name} 요약"
+
+
+def test_daemon_refuses_second_instance_and_replaces_stale_socket(daemon: housing_daemon.HousingDaemon, tmp_path: Path) -> None:
+    with pytest.raises(RuntimeError):
+        housing_daemon.HousingDaemon(daemon.socket_path, argparse.Namespace())
+    # 비정상 종료로 남은 소켓 파일 (받는 쪽이 없음)
+    stale = tmp_path / "stale.sock"
+    leftover = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    leftover.bind(str(stale))
+    leftover.close()
+    server = housing_daemon.HousingDaemon(stale, argparse.Namespace())
+    server.server_close()
+    assert not stale.exists()
+
+
+@pytest.fixture()
+def in_process_calls(monkeypatch: pytest.MonkeyPatch) -> List[Dict[str, Any]]:
+    calls: List[Dict[str, Any]] = []
+
+    def fake_run(user_profile: Dict[str, Any]) -> Dict[str, Any]:
+        calls.append(user_profile)
+        return {"housing_memo": {"summary": "프로세스 내 실행"}}
+
+    monkeypatch.setattr(housing_adapter, "_run_in_process", fake_run)
+    return calls
+
+
+def test_adapter_falls_back_when_socket_is_missing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, in_process_calls: List[Dict[str, Any]]
+) -> None:
+    monkeypatch.setattr(
+        daemon_protocol, "request", functools.partial(daemon_protocol.request, socket_path=tmp_path / "none.sock")
+    )
+    hm = housing_adapter.run_housing({"name": "A"})
+    assert in_process_calls == [{"name": "A"}]
+    assert hm["_status"] == "ok" and hm["summary"] == "프로세스 내 실행"
+    assert hm["eligible_policies"] == [] and hm["evidence"] == []
+
+
+def test_adapter_uses_daemon_and_reports_errors(
+    daemon: housing_daemon.HousingDaemon, monkeypatch: pytest.MonkeyPatch, in_process_calls: List[Dict[str, Any]]
+) -> None:
+    monkeypatch.setattr(
+        daemon_protocol, "request", functools.partial(daemon_protocol.request, socket_path=daemon.socket_path)
+    )
+    hm = housing_adapter.run_housing({"name": "A"})
+    assert hm["_status"] == "ok" and hm["summary"] == "A 요약"
+    # 데몬에 연결된 뒤의 실패는 프로세스 내 실행으로 대체하지 않고 오류 안내
+    hm = housing_adapter.run_housing({"fail": True})
+    assert hm["_status"] == "error" and "생성 실패" in hm["evidence"][0]["snippet"]
+    assert in_process_calls == []
+
+
+def test_adapter_reports_timeout_without_fallback(
+    silent_socket: Path, monkeypatch: pytest.MonkeyPatch, in_process_calls: List[Dict[str, Any]]
+) -> None:
+    monkeypatch.setattr(daemon_protocol, "DEFAULT_TIMEOUT_S", 0.2)
+    monkeypatch.setattr(
+        daemon_protocol, "request", functools.partial(daemon_protocol.request, socket_path=silent_socket)
+    )
+    hm = housing_adapter.run_housing({"name": "A"})
+    assert hm["_status"] == "error" and "응답 대기 시간" in hm["evidence"][0]["snippet"]
+    assert in_process_calls == []
@@ -0,0 +1,88 @@
+# 정책 자격 조건 필터(EligibilityIndex) 테스트
+
+from __future__ import annotations
+
+import itertools
+from pathlib import Path
+from typing import Any, Dict
+
+from src.housing_agent.normalize.common import extract_household_types, extract_income_limit
+from src.housing_agent.pipeline.retriever import EligibilityIndex, _policy_passes_filters
+
+
+def _policy(**es: Any) -> Dict[str, Any]:
+    return {"eligibility_struct": es}
+
+
+METADATA: Dict[str, Any] = {
+    "p_month": _policy(income_max_m=300, income_period="month", housing_types=["월세"]),
+    "p_year": _policy(income_max_m=4800, income_period="year", household_types=["신혼부부"]),
+    "p_unknown": _policy(income_max_m=250, housing_types=["전세"]),
+    "p_sale": _policy(housing_types=["분양"], requires_no_house=True),
+    "p_age": _policy(age_min=19, age_max=34, regions={"sido": ["서울"], "sigungu": []}),
+    "p_none": _policy(),
+}
+
+
+def test_extract_income_limit_records_period() -> None:
+    assert extract_income_limit("연소득 5,000만원 이하") == (5000, "year")
+    assert extract_income_limit("연소득 4천 이하") == (4000, "year")
+    assert extract_income_limit("월평균 소득 300만원 이하") == (300, "month")
+    assert extract_income_limit("소득 250만원 이하 가구") == (250, None)
+    assert extract_income_limit("") == (None, None)
+
+
+def test_extract_household_types() -> None:
+    assert extract_household_types("만 19~34세 청년 또는 혼인 7년 이내 신혼부부") == ["청년", "신혼부부"]
+    assert extract_household_types("무주택 1인 가구, 다자녀 가구 우대") == ["1인 가구", "다자녀"]
+    assert extract_household_types("대학(원) 재학생") == ["대학생"]
+    assert extract_household_types("소득 기준 충족 시") == []
+
+
+def test_extracted_household_types_filter_policies() -> None:
+    metadata = {
+        "p_youth": _policy(household_types=extract_household_types("만 19세~34세 청년")),
+        "p_newlywed": _policy(household_types=extract_household_types("예비 부부 및 신혼부부")),
+        "p_both": _policy(household_types=extract_household_types("청년 및 신혼부부")),
+        "p_multi": _policy(household_types=extract_household_types("다자녀 가구")),
+    }
+    index = EligibilityIndex.load(Path("/nonexistent"), metadata)
+    assert index.allowed_policy_ids(None, "", "", household_type="청년(1인가구)") == {"p_youth", "p_both", "p_multi"}
+    assert index.allowed_policy_ids(None, "", "", household_type="신혼부부") == {"p_newlywed", "p_both", "p_multi"}
+
+
+def test_annual_limit_is_compared_in_monthly_units() -> None:
+    index = EligibilityIndex.load(Path("/nonexistent"), METADATA)
+    # 연 4800만원 = 월 400만원, 기간 단위를 모르는 상한(p_unknown)은 소득 필터 미적용
+    assert "p_year" in index.allowed_policy_ids(None, "", "", monthly_income_m=400)
+    assert "p_year" not in index.allowed_policy_ids(None, "", "", monthly_income_m=401)
+    assert "p_month" not in index.allowed_policy_ids(None, "", "", monthly_income_m=301)
+    assert "p_unknown" in index.allowed_policy_ids(None, "", "", monthly_income_m=10_000)
+
+
+def test_unmatched_types_are_kept() -> None:
+    index = EligibilityIndex.load(Path("/nonexistent"), METADATA)
+    allowed = index.allowed_policy_ids(None, "", "", rent_type="월세", household_type="청년(1인가구)")
+    # "분양"만 있는 정책은 주거 형태를 판단할 수 없으므로 통과, "전세"만 있는 정책은 제외
+    assert "p_sale" in allowed
+    assert "p_unknown" not in allowed
+    assert "p_year" not in allowed
+    # 표에 없는 프로필 값은 필터 미적용
+    assert index.allowed_policy_ids(None, "", "", rent_type="반전세") is None
+
+
+def test_index_matches_per_policy_filter() -> None:
+    index = EligibilityIndex.load(Path("/nonexistent"), METADATA)
+    grid = itertools.product(
+        (None, 25, 40),
+        ("", "서울", "부산"),
+        (None, 300, 400, 450),
+        ("", "청년(1인가구)", "신혼부부", "기타"),
+        ("", "월세", "전세", "상관없음"),
+        (None, True),
+    )
+    for age, sido, income, household, rent, owns_house in grid:
+        filters = dict(monthly_income_m=income, household_type=household, rent_type=rent, owns_house=owns_house)
+        expected = {pid for pid, meta in METADATA.items() if _policy_passes_filters(meta, age, sido, "", **filters)}
+        got = index.allowed_policy_ids(age, sido, "", **filters)
+        assert (set(METADATA) if got is None else got) == expected, (age, sido, filters)
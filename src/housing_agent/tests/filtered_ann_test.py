@@ -0,0 +1,79 @@
+# 근사 인덱스(HNSW/IVF) + IDSelector 필터 검색 테스트
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import faiss
+import numpy as np
+import pytest
+
+from src.housing_agent.benchmarks.retrieval_benchmark import build_corpus, build_index, hash_embedding, make_filters, make_queries
+from src.housing_agent.pipeline.retriever import RetrievalOptions, RetrieverService
+
+EMBED_DIM = 64
+QUERIES = make_queries(40, seed=3)
+FILTERS = make_filters(40, seed=3)
+
+
+def _vectors(n: int, dim: int = 16) -> np.ndarray:
+    return np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+
+
+def test_search_parameters_widen_for_selective_filters() -> None:
+    x = _vectors(2000)
+    hnsw = faiss.IndexHNSWFlat(x.shape[1], 16)
+    hnsw.add(x)
+    ivf = faiss.IndexIVFFlat(faiss.IndexFlatL2(x.shape[1]), x.shape[1], 32)
+    ivf.train(x)
+    ivf.add(x)
+    selector = faiss.IDSelectorBatch(np.arange(100, dtype=np.int64))
+
+    # HNSW : efSearch는 기록값과 k 중 큰 값
+    assert RetrieverService._search_parameters(hnsw, selector, {"efSearch": 64}, 10, 100).efSearch == 64
+    assert RetrieverService._search_parameters(hnsw, selector, {"efSearch": 64}, 300, 100).efSearch == 300
+
+    # IVF : 허용 비율의 역수만큼 nprobe 확대 (최대 nlist), 필터가 없으면 기록값
+    assert RetrieverService._search_parameters(ivf, selector, {"nprobe": 4}, 10, 2000).nprobe == 4
+    assert RetrieverService._search_parameters(ivf, selector, {"nprobe": 4}, 10, 1000).nprobe == 8
+    assert RetrieverService._search_parameters(ivf, selector, {"nprobe": 4}, 10, 100).nprobe == 32
+
+
+@pytest.fixture(scope="module")
+def ann_corpus(tmp_path_factory: pytest.TempPathFactory) -> Dict[str, Any]:
+    # 필터 허용 벡터가 수십~수백 개가 되는 크기 (작은 말뭉치는 그래프/클러스터가 작아 문제가 드러나지 않음)
+    return build_corpus(tmp_path_factory.mktemp("ann"), num_policies=200, dim=EMBED_DIM, seed=7, near_dup=True)
+
+
+def _service(corpus: Dict[str, Any], index_type: str, compression: str) -> RetrieverService:
+    index = build_index(corpus, index_type, compression)
+    paths = corpus["paths"]
+    return RetrieverService(
+        index_path=index["index"],
+        index_log_path=index["index_log"],
+        mapping_path=paths["mapping"],
+        chunk_path=paths["chunks"],
+        metadata_path=paths["metadata"],
+        eligibility_index_path=paths["eligibility_index"],
+        sparse_index_path=paths["sparse_index"],
+        embedder=lambda queries: [hash_embedding(q, EMBED_DIM) for q in queries],
+    )
+
+
+@pytest.mark.parametrize("index_type,compression", [("hnsw", "none"), ("hnsw", "sq8"), ("ivf_flat", "none")])
+@pytest.mark.parametrize("mode", ["dense", "hybrid"])
+def test_filtered_ann_returns_top_k_when_enough_eligible(
+    ann_corpus: Dict[str, Any], index_type: str, compression: str, mode: str
+) -> None:
+    # flat 인덱스(전수 검색)에서 top_k개가 나오는 질의 = 중복 제거 후에도 허용 청크가 충분한 질의
+    flat = _service(ann_corpus, "flat", "none")
+    ann = _service(ann_corpus, index_type, compression)
+    options = RetrievalOptions(mode=mode)
+    for top_k in (5, 20):
+        expected = flat.search_batch(QUERIES, FILTERS, top_k=top_k, options=options)
+        got = ann.search_batch(QUERIES, FILTERS, top_k=top_k, options=options)
+        assert [len(p["results"]) for p in got] == [len(p["results"]) for p in expected]
+        assert sum(len(p["results"]) == top_k for p in got) > len(QUERIES) // 2
+        for p in got:
+            rounds = p["debug"]["search_rounds"]
+            assert rounds[-1]["stop"] in ("satisfied", "exhausted")
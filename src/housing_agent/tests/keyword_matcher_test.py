@@ -0,0 +1,69 @@
+# 다중 키워드 매칭(KeywordMatcher) 테스트 : 기존 부분 문자열 카운트와 같은 결과인지
+
+from __future__ import annotations
+
+import random
+import re
+from typing import Dict, List
+
+from src.housing_agent.normalize.keyword_matcher import KeywordMatcher
+from src.housing_agent.pipeline.merge2 import APPLY_KW, BENEFIT_KW, ELIGIBILITY_KW, LINE_MATCHER
+from src.housing_agent.pipeline.retriever import (
+    ALL_CATEGORIES,
+    ALL_SECTIONS,
+    CATEGORY_KEYWORDS,
+    SECTION_KEYWORDS,
+    infer_intent_scores,
+)
+
+FILLER = ["", " ", "을 ", "에 대한 ", "및 ", "\n", "2024년 ", "가", "문의처 ", "ABC "]
+
+
+def _texts(keywords: List[str], n: int, seed: int) -> List[str]:
+    # 키워드 조각/전체를 섞은 문장 (겹치는 키워드, 잘린 키워드, 공백 변형 포함)
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(0, 6)):
+            kw = rng.choice(keywords)
+            cut = rng.randint(1, len(kw))
+            parts.append(rng.choice([kw, kw[:cut], kw[cut - 1 :], kw.upper(), " ".join(kw)]))
+            parts.append(rng.choice(FILLER))
+        out.append("".join(parts))
+    return out
+
+
+def _substring_counts(groups: Dict[str, List[str]], text: str) -> Dict[str, int]:
+    # 기존 방식 : 그룹별 sum(kw in text)
+    return {g: sum(1 for kw in dict.fromkeys(kws) if kw in text) for g, kws in groups.items()}
+
+
+def test_counts_match_substring_loop() -> None:
+    groups = {"apply": APPLY_KW, "eligibility": ELIGIBILITY_KW, "benefit": BENEFIT_KW}
+    for text in _texts(APPLY_KW + ELIGIBILITY_KW + BENEFIT_KW, 500, seed=1):
+        assert LINE_MATCHER.counts(text) == _substring_counts(groups, text), text
+
+
+def test_overlapping_keywords_and_shared_groups() -> None:
+    groups = {"a": ["보증", "보증금", "금리"], "b": ["금리", "리스"], "c": ["he", "she", "his", "hers"]}
+    matcher = KeywordMatcher(groups)
+    for text in ["보증금리스", "ushers", "보증", "금", "", "hishers 보증금"]:
+        assert matcher.counts(text) == _substring_counts(groups, text), text
+    assert matcher.first_group("리스 상품", order=["a", "b"]) == "b"
+    assert matcher.first_group("해당 없음") is None
+    assert matcher.any_match("ushers") and not matcher.any_match("usrs")
+
+
+def test_intent_scores_match_previous_double_scan() -> None:
+    # 기존 infer_*_intent : 소문자 질의 또는 공백 제거 질의에 키워드가 있으면 hit (공백 없는 키워드 기준)
+    def previous(query: str, table: Dict[str, List[str]]) -> Dict[str, int]:
+        q = (query or "").strip().lower()
+        q_nospace = re.sub(r"\s+", "", q)
+        return {name: sum(1 for kw in kws if kw.lower() in q or kw.lower() in q_nospace) for name, kws in table.items()}
+
+    vocab = [kw for kws in list(SECTION_KEYWORDS.values()) + list(CATEGORY_KEYWORDS.values()) for kw in kws if " " not in kw]
+    for query in _texts(vocab, 500, seed=2):
+        section_scores, category_scores = infer_intent_scores(query)
+        assert section_scores == {sec: previous(query, SECTION_KEYWORDS).get(sec, 0) for sec in ALL_SECTIONS}, query
+        assert category_scores == {cat: previous(query, CATEGORY_KEYWORDS).get(cat, 0) for cat in ALL_CATEGORIES}, query
@@ -0,0 +1,110 @@
+# 청크 근사 중복 군집(near_duplicate_groups) 테스트
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.housing_agent.benchmarks.retrieval_benchmark import build_corpus, build_index, hash_embedding
+from src.housing_agent.pipeline.near_dup import JACCARD_THRESHOLD, MIN_TEXT_LEN, _normalize, _shingles, near_duplicate_groups
+from src.housing_agent.pipeline.retriever import RetrievalOptions, RetrieverService
+
+SYLLABLES = [chr(c) for c in range(0xAC00, 0xAC00 + 400, 7)]
+
+
+def _text(rng: random.Random, n: int = 160) -> str:
+    words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))) for _ in range(n // 3)]
+    return " ".join(words)[:n]
+
+
+def _edit(rng: random.Random, text: str, num_edits: int) -> str:
+    chars = list(text)
+    for _ in range(num_edits):
+        chars[rng.randrange(len(chars))] = rng.choice(SYLLABLES)
+    return "".join(chars)
+
+
+def _components(texts: List[str], threshold: float, min_len: int) -> List[int]:
+    # 전수 비교 : Jaccard >= threshold 쌍을 잇는 연결 요소 (가장 앞 ordinal)
+    sets = [
+        _shingles(_normalize(t)) if len(t.strip()) >= min_len and _normalize(t) else None for t in texts
+    ]
+    group = list(range(len(texts)))
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            if sets[i] is None or sets[j] is None:
+                continue
+            if len(sets[i] & sets[j]) / len(sets[i] | sets[j]) >= threshold:
+                gi, gj = group[i], group[j]
+                group = [min(gi, gj) if g in (gi, gj) else g for g in group]
+    return group
+
+
+def test_exact_and_formatting_duplicates_share_first_ordinal() -> None:
+    rng = random.Random(1)
+    base = _text(rng)
+    texts = [_text(rng), base, "  " + base.upper() + " !!", base.replace(" ", "\n"), _text(rng)]
+    assert near_duplicate_groups(texts) == [0, 1, 1, 1, 4]
+
+
+def test_short_and_empty_texts_are_not_grouped() -> None:
+    short = "신청 방법은 공고문을 확인하세요."
+    assert near_duplicate_groups([short, short, "", ""]) == [0, 1, 2, 3]
+    assert near_duplicate_groups([short, short], min_len=5) == [0, 0]
+
+
+def test_groups_match_brute_force_components() -> None:
+    rng = random.Random(2)
+    texts: List[str] = []
+    for _ in range(30):
+        base = _text(rng)
+        texts.append(base)
+        # 근사 중복(몇 글자 수정)과 크게 바뀐 변형을 섞음
+        for num_edits in rng.sample([1, 2, 3, 40, 80], k=rng.randint(0, 3)):
+            texts.append(_edit(rng, base, num_edits))
+    rng.shuffle(texts)
+    groups = near_duplicate_groups(texts)
+    expected = _components(texts, JACCARD_THRESHOLD, 80)
+    assert len(set(expected)) < len(texts)
+    # LSH는 후보쌍만 검증하므로 묶인 청크는 항상 전수 비교에서도 같은 군집 (오탐 없음)
+    assert all(expected[i] == expected[g] for i, g in enumerate(groups))
+    # 몇 글자 수정 수준의 근사 중복은 같은 band를 가질 확률이 매우 높아 모두 묶임
+    assert groups == expected
+
+
+def test_threshold_controls_grouping() -> None:
+    rng = random.Random(3)
+    base = _text(rng)
+    texts = [base, _edit(rng, base, 3)]
+    assert near_duplicate_groups(texts, threshold=0.99) == [0, 1]
+    assert near_duplicate_groups(texts, threshold=0.5) == [0, 0]
+
+
+def test_runtime_min_len_mismatch_warns_once(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    # 빌드 시점 군집의 min_len이 인덱스 로그에 남고, 다른 --text-dedup-min-len은 값마다 1번 경고
+    corpus = build_corpus(tmp_path, num_policies=6, dim=16, seed=1, near_dup=True)
+    index = build_index(corpus, "flat", "none")
+    assert index["info"]["dup_min_len"] == MIN_TEXT_LEN
+    paths = corpus["paths"]
+    service = RetrieverService(
+        index_path=index["index"],
+        index_log_path=index["index_log"],
+        mapping_path=paths["mapping"],
+        chunk_path=paths["chunks"],
+        metadata_path=paths["metadata"],
+        eligibility_index_path=paths["eligibility_index"],
+        sparse_index_path=paths["sparse_index"],
+        embedder=lambda queries: [hash_embedding(q, 16) for q in queries],
+    )
+    assert service.dup_group_codes is not None
+
+    service.search_batch(["청년 월세"], top_k=3, options=RetrievalOptions(text_dedup_min_len=MIN_TEXT_LEN))
+    assert capsys.readouterr().err == ""
+    for _ in range(2):
+        service.search_batch(["청년 월세"], top_k=3, options=RetrievalOptions(text_dedup_min_len=40))
+    assert capsys.readouterr().err.count("--text-dedup-min-len=40") == 1
+    service.search_batch(["청년 월세"], top_k=3, options=RetrievalOptions(text_dedup_min_len=40, disable_text_dedup=True))
+    assert capsys.readouterr().err == ""
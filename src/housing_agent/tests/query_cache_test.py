@@ -0,0 +1,62 @@
+# 질의 임베딩 디스크 캐시 테스트
+
+from __future__ import annotations
+
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+
+from src.housing_agent.pipeline.query_cache import QueryEmbeddingCache
+
+DIM = 8
+
+
+def _vec(query: str) -> np.ndarray:
+    return np.full(DIM, float(sum(map(ord, query)) % 997), dtype=np.float32)
+
+
+def _writer(store_dir: str, prefix: str, n: int) -> None:
+    cache = QueryEmbeddingCache(store_dir=Path(store_dir))
+    for start in range(0, n, 5):
+        queries = [f"{prefix} 질의 {i}" for i in range(start, min(start + 5, n))]
+        cache.put_many("m", queries, [_vec(q) for q in queries])
+
+
+def test_concurrent_writers_keep_keys_and_rows_paired(tmp_path: Path) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(str(tmp_path), f"w{w}", 40)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    cache = QueryEmbeddingCache(store_dir=tmp_path)
+    for w in range(4):
+        for i in range(40):
+            q = f"w{w} 질의 {i}"
+            np.testing.assert_array_equal(cache.get("m", q), _vec(q))
+    assert cache.stats()["disk_items"] == 160
+
+
+def test_reader_sees_rows_added_by_another_process(tmp_path: Path) -> None:
+    reader = QueryEmbeddingCache(store_dir=tmp_path)
+    assert reader.get("m", "나중에 추가") is None
+
+    ctx = multiprocessing.get_context("spawn")
+    p = ctx.Process(target=_writer, args=(str(tmp_path), "나중에", 3))
+    p.start()
+    p.join(timeout=60)
+    assert p.exitcode == 0
+
+    np.testing.assert_array_equal(reader.get("m", "나중에 질의 2"), _vec("나중에 질의 2"))
+    assert reader.contains("m", "나중에 질의 0")
+
+
+def test_put_many_skips_existing_keys(tmp_path: Path) -> None:
+    first = QueryEmbeddingCache(store_dir=tmp_path)
+    second = QueryEmbeddingCache(store_dir=tmp_path)
+    assert first.put_many("m", ["a", "b"], [_vec("a"), _vec("b")]) == 2
+    assert second.put_many("m", ["b", "c"], [_vec("b"), _vec("c")]) == 1
+    assert (tmp_path / "m.keys.jsonl").read_text(encoding="utf-8").count("\n") == 3
@@ -0,0 +1,146 @@
+# 후보 랭킹(_rank_candidates) / 정책 묶음(_group_by_policy) 테스트 : 배열 연산 결과가 기존 Python 루프와 같은지
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Set, Tuple
+
+import numpy as np
+import pytest
+
+from src.housing_agent.pipeline.manifest import decode
+from src.housing_agent.pipeline.retriever import (
+    RetrievalOptions,
+    RetrieverService,
+    build_text_key,
+    compute_rank_score,
+)
+
+QUERY = "청년 월세 지원 신청 방법과 소득 자격"
+
+
+def _candidates(num_vectors: int, n: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    # 고정 후보 : 반복 vector_idx, -1 패딩, 동점 점수 포함 (검색 점수 내림차순, 동점 안은 도착 순서 그대로)
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, num_vectors, size=n)
+    indices[rng.random(n) < 0.05] = -1
+    distances = np.sort(np.round(rng.uniform(0.2, 0.9, size=n), 2))[::-1]
+    return distances.astype(np.float32), indices.astype(np.int64)
+
+
+def _loop_rank(
+    retriever: RetrieverService,
+    distances: np.ndarray,
+    indices: np.ndarray,
+    weights: Dict[str, Any],
+    options: RetrievalOptions,
+) -> Tuple[List[Dict[str, Any]], int]:
+    # 기존 방식 : 후보를 (검색 점수 내림차순, vector_idx) 순서로 보며 청크/텍스트 중복 제거 후 가중치 점수로 안정 정렬
+    rows: List[Dict[str, Any]] = []
+    seen_chunks: Set[str] = set()
+    seen_keys: Set[Any] = set()
+    skipped = 0
+    candidates = [(s, v) for s, v in zip(distances.tolist(), indices.tolist()) if v >= 0 and retriever.valid_vectors[v]]
+    for score, vidx in sorted(candidates, key=lambda c: (-c[0], c[1])):
+        chunk_id = str(decode(retriever.manifest, "chunk", vidx))
+        if chunk_id in seen_chunks:
+            skipped += 1
+            continue
+        key: Any = ""
+        if not options.disable_text_dedup:
+            if retriever.dup_group_codes is not None:
+                code = int(retriever.dup_group_codes[vidx])
+                key = code if code >= 0 else ""
+            else:
+                key = build_text_key(retriever.chunks.text(chunk_id), min_len=max(1, options.text_dedup_min_len))
+            if key != "" and key in seen_keys:
+                skipped += 1
+                continue
+        seen_chunks.add(chunk_id)
+        if key != "":
+            seen_keys.add(key)
+        rank_score = compute_rank_score(
+            raw_score=float(score),
+            metric=retriever.metric,
+            section=str(decode(retriever.manifest, "section", vidx) or ""),
+            section_weights=weights["effective_section_weights"],
+            category=str(decode(retriever.manifest, "category", vidx) or ""),
+            category_weights=weights["dynamic_category_weights"],
+        )
+        rows.append({"chunk_id": chunk_id, "policy_id": decode(retriever.manifest, "policy", vidx), "rank_score": rank_score})
+    return rows, skipped
+
+
+def _loop_group(rows: List[Dict[str, Any]], top_k: int, options: RetrievalOptions) -> List[Tuple[str, float, int, List[str]]]:
+    # 기존 방식 : 정책별 dict에 청크를 모아 집계 후 정렬
+    by_policy: Dict[str, List[Tuple[float, int, str]]] = {}
+    for pos, row in enumerate(rows):
+        if row["policy_id"] is not None:
+            by_policy.setdefault(row["policy_id"], []).append((row["rank_score"], pos, row["chunk_id"]))
+    per_policy = max(1, options.chunks_per_policy)
+    scored = []
+    for policy_id, hits in by_policy.items():
+        hits.sort(key=lambda h: (-h[0], h[1]))
+        values = [h[0] for h in hits]
+        if options.policy_agg == "max":
+            agg = values[0]
+        elif options.policy_agg == "sum_top_n":
+            agg = sum(values[:per_policy])
+        else:
+            temp = max(options.policy_softmax_temp, 1e-6)
+            w = [math.exp((v - values[0]) / temp) for v in values]
+            agg = sum(wi * v for wi, v in zip(w, values)) / sum(w)
+        scored.append((agg, hits[0][1], policy_id, len(hits), [h[2] for h in hits[:per_policy]]))
+    scored.sort(key=lambda s: (-s[0], s[1]))
+    return [(policy_id, agg, count, members) for agg, _, policy_id, count, members in scored[:top_k]]
+
+
+def _ranked(
+    retriever: RetrieverService, distances: np.ndarray, indices: np.ndarray, top_k: int, options: RetrievalOptions
+) -> Tuple[List[Dict[str, Any]], int]:
+    weights = retriever._resolve_weights(QUERY, options)
+    return retriever._rank_candidates(distances, indices, retriever.metric, weights, top_k, options)
+
+
+@pytest.mark.parametrize("text_dedup", ["dup_group", "text_key", "off"])
+@pytest.mark.parametrize("top_k", [1, 5, 50])
+def test_rank_matches_loop(
+    retriever: RetrieverService, monkeypatch: pytest.MonkeyPatch, text_dedup: str, top_k: int
+) -> None:
+    # dup_group 열이 없는 manifest는 본문 dedup key로 대체
+    if text_dedup == "text_key":
+        monkeypatch.setattr(retriever, "dup_group_codes", None)
+    options = RetrievalOptions(disable_text_dedup=text_dedup == "off")
+    weights = retriever._resolve_weights(QUERY, options)
+    for seed in range(5):
+        distances, indices = _candidates(retriever.num_vectors, 120, seed)
+        results, skipped = _ranked(retriever, distances, indices, top_k, options)
+        rows, expected_skipped = _loop_rank(retriever, distances, indices, weights, options)
+        expected = sorted(rows, key=lambda r: -r["rank_score"])[:top_k]
+        assert skipped == expected_skipped
+        assert [r["chunk_id"] for r in results] == [r["chunk_id"] for r in expected]
+        assert [r["rank_score"] for r in results] == pytest.approx([r["rank_score"] for r in expected])
+
+
+@pytest.mark.parametrize("policy_agg", ["max", "sum_top_n", "softmax"])
+@pytest.mark.parametrize("top_k", [1, 3, 50])
+def test_group_by_policy_matches_loop(retriever: RetrieverService, policy_agg: str, top_k: int) -> None:
+    options = RetrievalOptions(group_by="policy", policy_agg=policy_agg, chunks_per_policy=2)
+    weights = retriever._resolve_weights(QUERY, options)
+    for seed in range(5):
+        distances, indices = _candidates(retriever.num_vectors, 120, seed)
+        results, _ = _ranked(retriever, distances, indices, top_k, options)
+        rows, _ = _loop_rank(retriever, distances, indices, weights, options)
+        expected = _loop_group(rows, top_k, options)
+        assert [r["policy_id"] for r in results] == [e[0] for e in expected]
+        assert [r["policy_score"] for r in results] == pytest.approx([e[1] for e in expected])
+        assert [r["hit_count"] for r in results] == [e[2] for e in expected]
+        assert [[c["chunk_id"] for c in r["chunks"]] for r in results] == [e[3] for e in expected]
+
+
+def test_empty_candidates(retriever: RetrieverService) -> None:
+    empty_d = np.full(4, np.nan, dtype=np.float32)
+    results, skipped = _ranked(retriever, empty_d, np.full(4, -1, dtype=np.int64), 5, RetrievalOptions())
+    assert results == [] and skipped == 0
+    results, _ = _ranked(retriever, empty_d, np.full(4, -1, dtype=np.int64), 5, RetrievalOptions(group_by="policy"))
+    assert results == []
@@ -0,0 +1,113 @@
+# 검색 결과 캐시(ResultCache) 테스트 : TTL, LRU, 복사본 반환
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from src.housing_agent.benchmarks.retrieval_benchmark import hash_embedding
+from src.housing_agent.pipeline.result_cache import ResultCache
+from src.housing_agent.pipeline.retriever import RetrievalFilters, RetrievalOptions, RetrieverService
+from src.housing_agent.tests.conftest import EMBED_DIM
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_expires_items() -> None:
+    clock = FakeClock()
+    cache = ResultCache(max_items=4, ttl_seconds=10.0, clock=clock)
+    cache.put("a", {"results": [1]})
+    clock.now = 9.9
+    assert cache.get("a") == {"results": [1]}
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "expired": 1, "hit_rate": 0.5, "items": 0}
+
+    # ttl_seconds <= 0 이면 만료 없음
+    forever = ResultCache(ttl_seconds=0, clock=clock)
+    forever.put("a", {})
+    clock.now = 1e9
+    assert forever.get("a") == {}
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = ResultCache(max_items=2, ttl_seconds=60.0, clock=FakeClock())
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # a가 최근 사용 -> b가 제거 대상
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1} and cache.get("c") == {"v": 3}
+
+    # 같은 key를 다시 넣으면 값/만료 시각 갱신 + 최근 사용
+    cache.put("a", {"v": 10})
+    cache.put("d", {"v": 4})
+    assert cache.get("c") is None
+    assert cache.get("a") == {"v": 10}
+    assert cache.stats()["items"] == 2
+
+
+def test_returns_isolated_copies() -> None:
+    cache = ResultCache(clock=FakeClock())
+    payload: Dict[str, Any] = {"results": [{"chunk_id": "c1"}], "debug": {}}
+    cache.put("k", payload)
+    payload["results"].append({"chunk_id": "c2"})  # 넣은 뒤 원본 수정
+    got = cache.get("k")
+    assert got == {"results": [{"chunk_id": "c1"}], "debug": {}}
+    got["results"][0]["chunk_id"] = "changed"  # 꺼낸 값 수정
+    got["debug"]["result_cache"] = "hit"
+    assert cache.get("k") == {"results": [{"chunk_id": "c1"}], "debug": {}}
+
+
+@pytest.fixture()
+def cached_retriever(bench_corpus: Dict[str, Any]) -> tuple[RetrieverService, List[str]]:
+    # 결과 캐시를 붙인 서비스 + 임베딩 호출 기록
+    calls: List[str] = []
+
+    def embedder(queries: List[str]) -> List[np.ndarray]:
+        calls.extend(queries)
+        return [hash_embedding(q, EMBED_DIM) for q in queries]
+
+    paths = bench_corpus["paths"]
+    service = RetrieverService(
+        index_path=bench_corpus["index"]["index"],
+        index_log_path=bench_corpus["index"]["index_log"],
+        mapping_path=paths["mapping"],
+        chunk_path=paths["chunks"],
+        metadata_path=paths["metadata"],
+        eligibility_index_path=paths["eligibility_index"],
+        sparse_index_path=paths["sparse_index"],
+        result_cache=ResultCache(max_items=8, ttl_seconds=60.0),
+        embedder=embedder,
+    )
+    return service, calls
+
+
+def test_service_serves_hits_without_search(cached_retriever: tuple[RetrieverService, List[str]]) -> None:
+    service, calls = cached_retriever
+    first = service.search("청년 월세 지원", None, top_k=5)
+    assert first["debug"]["result_cache"] == "miss"
+    first["results"].clear()  # 호출부 수정이 캐시에 남지 않아야 함
+
+    # 공백만 다른 질의는 같은 key (normalize_query_text)
+    second = service.search("  청년   월세 지원 ", None, top_k=5)
+    assert second["debug"]["result_cache"] == "hit"
+    assert second["query"] == "  청년   월세 지원 "
+    assert len(second["results"]) == 5
+    assert calls == ["청년 월세 지원"]
+
+    # 필터/top_k/옵션이 다르면 다른 key
+    service.search("청년 월세 지원", RetrievalFilters(age=25), top_k=5)
+    service.search("청년 월세 지원", None, top_k=3)
+    service.search("청년 월세 지원", None, top_k=5, options=RetrievalOptions(mode="hybrid"))
+    assert service.result_cache.stats()["hits"] == 1
+    assert service.result_cache.stats()["items"] == 4
@@ -0,0 +1,91 @@
+# 하위 질의 결과 RRF 결합(fuse_result_lists, reciprocal_rank_fusion) 테스트
+
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from src.housing_agent.pipeline.housing_opinion_prompt import build_auto_query, build_sub_queries
+from src.housing_agent.pipeline.retriever import fuse_result_lists, reciprocal_rank_fusion
+
+
+def _loop_rrf(result_lists: List[List[Dict[str, Any]]], top_k: int, rrf_k: int) -> List[Dict[str, Any]]:
+    # dict 누적 RRF : 점수 내림차순, 동점은 처음 나온 순서
+    first: Dict[Any, Dict[str, Any]] = {}
+    score: Dict[Any, float] = {}
+    matched: Dict[Any, List[int]] = {}
+    for list_no, results in enumerate(result_lists):
+        for rank, row in enumerate(results, start=1):
+            key = row["policy_id"] if "chunks" in row else row["vector_idx"]
+            first.setdefault(key, row)
+            score[key] = score.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            matched.setdefault(key, []).append(list_no)
+    order = sorted(first, key=lambda key: -score[key])
+    return [{**first[key], "rrf_score": score[key], "matched_queries": matched[key]} for key in order[:top_k]]
+
+
+def _chunk_lists(seed: int) -> List[List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    return [
+        [{"vector_idx": v, "rank_score": rng.random(), "from": list_no} for v in rng.sample(range(40), rng.randint(0, 15))]
+        for list_no in range(rng.randint(1, 5))
+    ]
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 100])
+@pytest.mark.parametrize("rrf_k", [1, 60])
+def test_chunk_results_match_loop(top_k: int, rrf_k: int) -> None:
+    for seed in range(20):
+        lists = _chunk_lists(seed)
+        fused = fuse_result_lists(lists, top_k=top_k, rrf_k=rrf_k)
+        expected = _loop_rrf(lists, top_k, rrf_k)
+        assert [r["vector_idx"] for r in fused] == [r["vector_idx"] for r in expected]
+        assert [r["matched_queries"] for r in fused] == [r["matched_queries"] for r in expected]
+        assert [r["from"] for r in fused] == [r["from"] for r in expected]  # 처음 나온 리스트의 항목 dict
+        assert [r["rrf_score"] for r in fused] == pytest.approx([r["rrf_score"] for r in expected])
+
+
+def test_policy_results_merge_by_policy_id() -> None:
+    lists = [
+        [{"policy_id": "P1", "chunks": [1]}, {"policy_id": "P2", "chunks": [2]}],
+        [{"policy_id": "P2", "chunks": [3]}, {"policy_id": "P3", "chunks": []}],
+    ]
+    fused = fuse_result_lists(lists, top_k=10, rrf_k=60)
+    assert [(r["policy_id"], r["chunks"], r["matched_queries"]) for r in fused] == [
+        ("P2", [2], [0, 1]),
+        ("P1", [1], [0]),
+        ("P3", [], [1]),
+    ]
+    assert fused[0]["rrf_score"] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_ties_keep_first_seen_order_and_empty_inputs() -> None:
+    # 두 리스트에서 같은 순위 -> 같은 점수, 먼저 나온 항목이 앞
+    lists = [[{"vector_idx": 7}], [{"vector_idx": 3}]]
+    assert [r["vector_idx"] for r in fuse_result_lists(lists, top_k=2)] == [7, 3]
+    assert fuse_result_lists([], top_k=5) == []
+    assert fuse_result_lists([[], []], top_k=5) == []
+
+    # FAISS 패딩(-1)은 순위에서 제외
+    scores, ids = reciprocal_rank_fusion([np.array([5, -1, 2]), np.array([2])], rrf_k=0)
+    assert ids.tolist() == [2, 5]
+    assert scores.tolist() == pytest.approx([1 / 2 + 1.0, 1.0])
+
+
+def test_sub_queries_start_with_auto_query() -> None:
+    profile = {
+        "age": 27,
+        "household_type": "청년(1인가구)",
+        "region": {"city": "서울", "gu": "마포구"},
+        "monthly_income_m": 250,
+        "monthly_housing_budget_m": 60,
+        "rent_type": "월세",
+    }
+    queries = build_sub_queries(profile)
+    assert queries[0] == build_auto_query(profile)
+    assert len(queries) == len(set(queries)) >= 3
+    assert any("27세" in q and "월소득 250만원" in q for q in queries[1:])
+    assert any("월 주거예산 60만원" in q for q in queries[1:])
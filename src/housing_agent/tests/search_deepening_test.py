@@ -0,0 +1,63 @@
+# 검색 후보폭(search_k) 자동 결정 + 결과 부족 시 확장 검색 테스트
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from src.housing_agent.benchmarks.retrieval_benchmark import make_filters, make_queries
+from src.housing_agent.pipeline.retriever import RetrievalOptions, RetrieverService
+
+QUERIES = make_queries(30, seed=7)
+FILTERS = make_filters(30, seed=7)
+
+
+def _chunk_ids(payload: Dict[str, Any]) -> List[str]:
+    return [r["chunk_id"] for r in payload["results"]]
+
+
+@pytest.mark.parametrize("mode", ["dense", "sparse", "hybrid"])
+@pytest.mark.parametrize("filtered", [False, True])
+def test_common_case_is_one_round(retriever: RetrieverService, mode: str, filtered: bool) -> None:
+    filters = FILTERS if filtered else None
+    payloads = retriever.search_batch(QUERIES, filters, top_k=5, options=RetrievalOptions(mode=mode))
+    assert [len(p["debug"]["search_rounds"]) for p in payloads] == [1] * len(QUERIES)
+
+
+@pytest.mark.parametrize("mode", ["dense", "sparse"])
+@pytest.mark.parametrize("filtered", [False, True])
+def test_results_match_previous_single_pass(retriever: RetrieverService, mode: str, filtered: bool) -> None:
+    # 이전 경로 : search_k = top_k * 8로 1번만 검색
+    filters = FILTERS if filtered else None
+    for top_k in (5, 10):
+        new = retriever.search_batch(QUERIES, filters, top_k=top_k, options=RetrievalOptions(mode=mode))
+        old = retriever.search_batch(
+            QUERIES, filters, top_k=top_k, options=RetrievalOptions(mode=mode, search_k=top_k * 8, max_search_rounds=1)
+        )
+        assert [_chunk_ids(p) for p in new] == [_chunk_ids(p) for p in old]
+
+
+@pytest.mark.parametrize("mode", ["dense", "sparse"])
+def test_deepening_reuses_candidates(retriever: RetrieverService, mode: str) -> None:
+    # 후보폭을 top_k로 작게 주면 중복 제거 후 부족한 질의만 확장
+    payloads = retriever.search_batch(QUERIES, None, top_k=10, options=RetrievalOptions(mode=mode, search_k=10))
+    deepened = [p for p in payloads if len(p["debug"]["search_rounds"]) > 1]
+    assert deepened
+    for p in payloads:
+        rounds = p["debug"]["search_rounds"]
+        assert [r["stop"] for r in rounds[:-1]] == ["deepen"] * (len(rounds) - 1)
+        assert rounds[-1]["stop"] in ("satisfied", "exhausted", "max_rounds")
+        # 확장 라운드는 이미 가져온 후보를 다시 가져오지 않음 (누적 후보 수 = search_k)
+        assert all(r["fetched"] == r["search_k"] for r in rounds if r["stop"] == "deepen")
+        # 누적 후보로 랭킹한 결과 = 마지막 search_k로 한 번에 검색한 결과
+        final_k = rounds[-1]["search_k"]
+        single = retriever.search(
+            p["query"], None, top_k=10, options=RetrievalOptions(mode=mode, search_k=final_k, max_search_rounds=1)
+        )
+        assert _chunk_ids(p) == _chunk_ids(single)
+
+    shallow = retriever.search_batch(
+        [p["query"] for p in deepened], None, top_k=10, options=RetrievalOptions(mode=mode, search_k=10, max_search_rounds=1)
+    )
+    assert all(len(s["results"]) < len(p["results"]) for s, p in zip(shallow, deepened))
@@ -0,0 +1,67 @@
+# 카테고리 샤드 인덱스 검색 테스트 : shard_search=all 결과가 단일 인덱스와 같은지
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+import pytest
+
+from src.housing_agent.benchmarks.retrieval_benchmark import hash_embedding, make_filters, make_queries
+from src.housing_agent.pipeline.retriever import RetrievalOptions, RetrieverService
+from src.housing_agent.tests.conftest import EMBED_DIM, ROOT
+
+QUERIES = make_queries(30, seed=7)
+FILTERS = make_filters(30, seed=7)
+
+
+@pytest.fixture(scope="module")
+def sharded(bench_corpus: Dict[str, Any]) -> RetrieverService:
+    # 같은 벡터로 faiss_building --shard-by-category 실행
+    paths = bench_corpus["paths"]
+    out_dir = paths["vectors"].parent
+    index_path = out_dir / "index_shards.faiss"
+    info_path = out_dir / "index_shards_log.json"
+    cmd = [
+        sys.executable,
+        "-m",
+        "src.housing_agent.pipeline.faiss_building",
+        "--vectors", str(paths["vectors"]),
+        "--mapping", str(paths["mapping"]),
+        "--embed-log", str(paths["embed_log"]),
+        "--out-index", str(index_path),
+        "--out-info", str(info_path),
+        "--shard-by-category",
+    ]
+    subprocess.run(cmd, cwd=str(ROOT), check=True, capture_output=True, text=True)
+    return RetrieverService(
+        index_path=index_path,
+        index_log_path=info_path,
+        mapping_path=paths["mapping"],
+        chunk_path=paths["chunks"],
+        metadata_path=paths["metadata"],
+        eligibility_index_path=paths["eligibility_index"],
+        sparse_index_path=paths["sparse_index"],
+        embedder=lambda queries: [hash_embedding(q, EMBED_DIM) for q in queries],
+    )
+
+
+def _ids(payload: Dict[str, Any]) -> List[Any]:
+    return [r.get("policy_id") if "chunks" in r else r["vector_idx"] for r in payload["results"]]
+
+
+@pytest.mark.parametrize("mode", ["dense", "hybrid"])
+@pytest.mark.parametrize("group_by", ["chunk", "policy"])
+@pytest.mark.parametrize("filtered", [False, True])
+def test_all_shards_match_single_index(
+    retriever: RetrieverService, sharded: RetrieverService, mode: str, group_by: str, filtered: bool
+) -> None:
+    # 중복 벡터(동점)가 샤드 병합에서 다른 순서로 도착해도 중복 군집 대표가 같게 정해져야 함
+    assert sharded.shards
+    filters = FILTERS if filtered else None
+    options = RetrievalOptions(mode=mode, group_by=group_by, shard_search="all")
+    for top_k in (5, 10):
+        single = retriever.search_batch(QUERIES, filters, top_k=top_k, options=options)
+        shards = sharded.search_batch(QUERIES, filters, top_k=top_k, options=options)
+        assert [_ids(p) for p in shards] == [_ids(p) for p in single]
@@ -0,0 +1,102 @@
+# 문자 n-gram BM25 sparse 인덱스 테스트 : CSR 역색인 점수가 전수 BM25 계산과 같은지
+
+from __future__ import annotations
+
+import math
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from src.housing_agent.pipeline.sparse_index import (
+    BM25_B,
+    BM25_K1,
+    SparseIndex,
+    build_sparse_index,
+    char_ngrams,
+    save_sparse_index,
+)
+
+WORDS = ["행복주택", "전세임대", "청년", "월세", "지원", "신혼부부", "보증금", "대출", "LH", "2024년", "매입임대", "주거급여"]
+
+
+def _chunks(n: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    chunks = [{"chunk_id": f"c{i}", "text": " ".join(rng.choices(WORDS, k=rng.randint(0, 12)))} for i in range(n)]
+    chunks.append({"chunk_id": f"c{n}", "text": chunks[0]["text"]})  # 동점 확인용 같은 본문
+    return chunks
+
+
+def _brute_force_bm25(chunks: List[Dict[str, Any]], query: str) -> np.ndarray:
+    # 청크마다 n-gram을 세어 BM25를 그대로 계산
+    docs = [Counter(char_ngrams(c["text"])) for c in chunks]
+    lengths = [sum(d.values()) for d in docs]
+    avgdl = sum(lengths) / len(docs)
+    out = np.zeros(len(docs))
+    for term in set(char_ngrams(query)):
+        df = sum(1 for d in docs if term in d)
+        if not df:
+            continue
+        idf = math.log(1.0 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i, d in enumerate(docs):
+            tf = d.get(term, 0)
+            if tf:
+                out[i] += idf * tf * (BM25_K1 + 1.0) / (tf + BM25_K1 * (1.0 - BM25_B + BM25_B * lengths[i] / avgdl))
+    return out
+
+
+def test_char_ngrams() -> None:
+    assert char_ngrams("LH 행복주택!") == ["lh", "행복", "복주", "주택", "행복주", "복주택"]
+    assert char_ngrams("a 및") == []
+
+
+@pytest.mark.parametrize("query", ["행복주택 신청", "청년 월세 지원", "LH 전세임대 보증금", "없는단어", ""])
+def test_scores_match_brute_force(query: str) -> None:
+    chunks = _chunks(60, seed=1)
+    index = SparseIndex(build_sparse_index(chunks))
+    assert index.scores(query) == pytest.approx(_brute_force_bm25(chunks, query), rel=1e-5, abs=1e-6)
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 200])
+def test_search_orders_by_score_then_ordinal(k: int) -> None:
+    chunks = _chunks(60, seed=2)
+    index = SparseIndex(build_sparse_index(chunks))
+    rng = np.random.default_rng(2)
+    allowed = rng.random(len(chunks)) < 0.6
+    allowed[0] = allowed[-1] = True
+    for query in ["행복주택 신청", "청년 월세 지원", chunks[0]["text"]]:
+        for mask in (None, allowed):
+            scores, order = index.search(query, k, allowed=mask)
+            expected = _brute_force_bm25(chunks, query).astype(np.float32)
+            if mask is not None:
+                expected[~mask] = 0.0
+            ranked = sorted((i for i in range(len(chunks)) if expected[i] > 0), key=lambda i: (-expected[i], i))[:k]
+            assert order.tolist() == ranked
+            assert scores == pytest.approx(expected[ranked], rel=1e-5)
+
+
+def test_save_load_round_trip(tmp_path: Path) -> None:
+    chunks = _chunks(20, seed=3)
+    path = tmp_path / "sparse.npz"
+    save_sparse_index(path, build_sparse_index(chunks))
+    loaded = SparseIndex.load(path)
+    assert loaded.chunk_ids == [c["chunk_id"] for c in chunks]
+    assert loaded.scores("청년 월세") == pytest.approx(_brute_force_bm25(chunks, "청년 월세"), rel=1e-5, abs=1e-6)
+    with pytest.raises(FileNotFoundError):
+        SparseIndex.load(tmp_path / "none.npz")
+
+
+def test_boundary_ties_keep_lowest_ordinals() -> None:
+    # 점수가 몇 단계뿐인 말뭉치 : k번째 점수와 같은 동점 중 앞 ordinal이 남아야 함
+    rng = random.Random(4)
+    texts = ["행복주택 행복주택", "행복주택", "행복주택 청년 월세 지원 신청", "전세임대"]
+    chunks = [{"chunk_id": f"c{i}", "text": rng.choice(texts)} for i in range(50)]
+    index = SparseIndex(build_sparse_index(chunks))
+    scores = index.scores("행복주택")
+    ranked = sorted((i for i in range(len(chunks)) if scores[i] > 0), key=lambda i: (-scores[i], i))
+    for k in range(1, len(chunks)):
+        _, order = index.search("행복주택", k)
+        assert order.tolist() == ranked[:k]